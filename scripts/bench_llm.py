@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""Benchmark end-to-end LLM latency: single prompt vs concurrent field prompts.
+
+Transcripts come from text files given on the command line, or from the
+most recent rows in the Oracle DB (--recent). Each transcript is
+structured with both strategies (cache off), alternating the order per
+run, and the wall times are reported per transcript and overall.
+Transcripts longer than llm_window_chars take the map-reduce path with
+either strategy and are skipped.
+
+Set llm_parallel to Ollama's OLLAMA_NUM_PARALLEL for a fair comparison.
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from memoant import config
+from memoant.structure import extract_structure
+
+STRATEGIES = ["single", "fields"]
+
+
+def _from_db(db_path: str, limit: int) -> list[tuple[str, str]]:
+    db = sqlite3.connect(db_path)
+    try:
+        rows = db.execute(
+            "SELECT source_file, transcript FROM os_audio_logs ORDER BY processed_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+    finally:
+        db.close()
+    return [(name, text) for name, text in rows if text]
+
+
+def _from_files(paths: list[str]) -> list[tuple[str, str]]:
+    transcripts = []
+    for path in paths:
+        with open(path) as f:
+            transcripts.append((os.path.basename(path), f.read()))
+    return transcripts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LLM structuring strategies")
+    parser.add_argument("files", nargs="*", help="Transcript text files")
+    parser.add_argument("--recent", type=int, default=5, help="Use the N most recent DB transcripts")
+    parser.add_argument("--db", default=config.ORACLE_DB, help="Path to oracle.db")
+    parser.add_argument("--model", default=config.OLLAMA_MODEL)
+    parser.add_argument("--runs", type=int, default=2, help="Runs per transcript and strategy")
+    args = parser.parse_args()
+
+    transcripts = _from_files(args.files) if args.files else _from_db(args.db, args.recent)
+    transcripts = [(n, t) for n, t in transcripts if len(t) <= config.LLM_WINDOW_CHARS]
+    if not transcripts:
+        print("No transcripts short enough to compare")
+        sys.exit(1)
+
+    print(f"{len(transcripts)} transcripts, {args.runs} runs, llm_parallel = {config.LLM_PARALLEL}")
+    times = {s: [] for s in STRATEGIES}
+    for name, text in transcripts:
+        per = {s: [] for s in STRATEGIES}
+        for run in range(args.runs):
+            order = STRATEGIES if run % 2 == 0 else STRATEGIES[::-1]
+            for strategy in order:
+                start = time.perf_counter()
+                result = extract_structure(text, model=args.model, use_cache=False, strategy=strategy)
+                elapsed = time.perf_counter() - start
+                if result.get("error"):
+                    print(f"  {name}: {strategy} failed: {result['error']}")
+                per[strategy].append(elapsed)
+        line = "  ".join(f"{s} {statistics.median(per[s]):6.1f}s" for s in STRATEGIES)
+        print(f"  {len(text):6} chars  {line}  {name}")
+        for s in STRATEGIES:
+            times[s].extend(per[s])
+
+    print()
+    for s in STRATEGIES:
+        print(f"{s:7} median {statistics.median(times[s]):6.1f}s  mean {statistics.mean(times[s]):6.1f}s")
+    speedup = statistics.median(times["single"]) / statistics.median(times["fields"])
+    print(f"Speedup (median): {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
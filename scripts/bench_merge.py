@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""Micro-benchmark: merge.assign_speakers against a full per-word scan.
+
+Generates synthetic words and (partly overlapping) diarization turns for
+recordings of increasing length, checks that both give identical labels,
+and prints the timings.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from memoant.merge import assign_speakers
+from memoant.words import WordTable
+
+WORDS_PER_MINUTE = 170
+TURNS_PER_MINUTE = 25
+
+
+def assign_speakers_scan(words: list[dict], diarization_segments: list[dict]) -> list[dict]:
+    """The original O(words x segments) implementation, for comparison."""
+    for word in words:
+        w_start = word["start"]
+        w_end = word["end"]
+        if w_end - w_start <= 0:
+            word["speaker"] = "UNKNOWN"
+            continue
+        speaker_overlap = {}
+        for seg in diarization_segments:
+            overlap = min(w_end, seg["end"]) - max(w_start, seg["start"])
+            if overlap > 0:
+                speaker_overlap[seg["speaker"]] = speaker_overlap.get(seg["speaker"], 0) + overlap
+        if speaker_overlap:
+            word["speaker"] = max(speaker_overlap, key=speaker_overlap.get)
+        else:
+            word["speaker"] = "UNKNOWN"
+    return words
+
+
+def synthetic(minutes: float, speakers: int, rng: random.Random) -> tuple[WordTable, list]:
+    """Words and diarization turns for a recording of the given length."""
+    duration = minutes * 60
+    words = []
+    t = 0.0
+    for _ in range(int(minutes * WORDS_PER_MINUTE)):
+        t += rng.uniform(0.05, 0.6)
+        length = 0.0 if rng.random() < 0.01 else rng.uniform(0.1, 0.5)  # some zero-length
+        words.append({"word": "w", "start": round(t, 2), "end": round(t + length, 2)})
+        t += length
+    segments = []
+    t = 0.0
+    for _ in range(int(minutes * TURNS_PER_MINUTE)):
+        length = rng.uniform(0.5, 6.0)
+        start = max(0.0, t - rng.uniform(0, 0.8))  # overlapping speech
+        segments.append({
+            "start": round(start, 2),
+            "end": round(min(duration, start + length), 2),
+            "speaker": f"SPEAKER_{rng.randrange(speakers):02d}",
+        })
+        t = start + length + rng.uniform(0, 1.0)  # and gaps with no speaker
+    rng.shuffle(segments)  # pyannote order isn't guaranteed sorted
+    return WordTable.from_words(words), segments
+
+
+def _time_sweep(words: WordTable, segments: list[dict]) -> tuple[float, list[str]]:
+    start = time.perf_counter()
+    labeled = assign_speakers(words, segments)
+    return time.perf_counter() - start, labeled.labels()
+
+
+def _time_scan(words: WordTable, segments: list[dict]) -> tuple[float, list[str]]:
+    dicts = words.to_words()  # same float32 timings as the table
+    start = time.perf_counter()
+    assign_speakers_scan(dicts, segments)
+    return time.perf_counter() - start, [w["speaker"] for w in dicts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark speaker assignment")
+    parser.add_argument(
+        "--minutes", type=float, nargs="+", default=[5, 15, 30, 60, 120, 180],
+        help="Recording lengths to generate (default: 5 15 30 60 120 180)"
+    )
+    parser.add_argument("--speakers", type=int, default=4, help="Speakers per recording")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--skip-scan-above", type=float, default=60,
+        help="Don't time the full scan above this many minutes (it's slow)"
+    )
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'minutes':>8} {'words':>7} {'turns':>6} {'sweep':>9} {'scan':>9} {'speedup':>8}")
+    for minutes in args.minutes:
+        words, segments = synthetic(minutes, args.speakers, rng)
+        sweep_s, sweep_labels = _time_sweep(words, segments)
+        if minutes > args.skip_scan_above:
+            print(f"{minutes:>8.0f} {len(words):>7} {len(segments):>6} {sweep_s*1000:>7.1f}ms {'-':>9} {'-':>8}")
+            continue
+        scan_s, scan_labels = _time_scan(words, segments)
+        if sweep_labels != scan_labels:
+            mismatches = sum(a != b for a, b in zip(sweep_labels, scan_labels))
+            print(f"MISMATCH at {minutes} minutes: {mismatches} words differ")
+            sys.exit(1)
+        print(
+            f"{minutes:>8.0f} {len(words):>7} {len(segments):>6} "
+            f"{sweep_s*1000:>7.1f}ms {scan_s*1000:>7.1f}ms {scan_s/sweep_s:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
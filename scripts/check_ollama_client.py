@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""Check the pooled Ollama client (memoant.ollama) against stub servers.
+
+Starts local http.server stubs that speak enough of /api/generate
+(streamed NDJSON over chunked HTTP/1.1) to exercise:
+
+    abort      the stream is dropped once the JSON object is complete,
+               long before the stub runs out of tokens
+    keepalive  sequential requests reuse one pooled connection, and every
+               request carries the keep_alive hint
+    routing    concurrent requests spread over the least-loaded endpoints
+    backoff    a failing endpoint (HTTP 500) is retried elsewhere and then
+               skipped while it backs off
+    reject     an HTTP 400 raises straight away without retries
+
+No Ollama install is needed. Exits non-zero if any check fails.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from memoant.ollama import OllamaClient
+
+JSON_TOKENS = ['{"summary', '": "', 'stub', ' result', '"}']
+TRAILING_TOKENS = 200  # generated after the JSON unless the client hangs up
+
+
+class Stub(ThreadingHTTPServer):
+    """Stub Ollama. mode: "json" (JSON then trailing tokens), "done" (just
+    the JSON, then a normal finish), "error" (HTTP 500) or "reject"
+    (HTTP 400). delay is the pause between streamed tokens."""
+
+    daemon_threads = True
+
+    def __init__(self, mode: str = "json", delay: float = 0.0):
+        super().__init__(("127.0.0.1", 0), Handler)
+        self.mode = mode
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.requests = []  # parsed request bodies
+        self.connections = 0
+        self.sent = []  # tokens written per streamed request
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        stub = self.server
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        with stub.lock:
+            stub.requests.append(body)
+        if stub.mode in ("error", "reject"):
+            status = 500 if stub.mode == "error" else 400
+            payload = json.dumps({"error": f"stub {stub.mode}"}).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        if stub.mode == "done":
+            tokens = JSON_TOKENS
+        else:
+            tokens = JSON_TOKENS + [" more"] * TRAILING_TOKENS
+        sent = 0
+        try:
+            for token in tokens:
+                self._chunk({"response": token, "done": False})
+                sent += 1
+                time.sleep(stub.delay)
+            self._chunk({"response": "", "done": True, "eval_count": sent})
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+        finally:
+            with stub.lock:
+                stub.sent.append(sent)
+
+    def _chunk(self, msg: dict):
+        data = (json.dumps(msg) + "\n").encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def check_abort() -> str | None:
+    stub = Stub("json", delay=0.005)
+    result = OllamaClient([stub.url]).generate("m", "p")
+    time.sleep(0.2)  # let the stub notice the closed connection
+    if not result["aborted"] or json.loads(result["response"]) != {"summary": "stub result"}:
+        return f"unexpected result {result}"
+    total = len(JSON_TOKENS) + TRAILING_TOKENS
+    if not stub.sent or stub.sent[0] >= total:
+        return f"stub sent {stub.sent} of {total} tokens"
+    return None
+
+
+def check_keepalive() -> str | None:
+    stub = Stub("done")
+    client = OllamaClient([stub.url], keep_alive="42m")
+    for _ in range(3):
+        # Read to the end: an aborted stream closes its connection
+        result = client.generate("m", "p", stop_on_json=False)
+        if result["aborted"]:
+            return "a complete response was reported as aborted"
+    if stub.connections != 1:
+        return f"3 requests used {stub.connections} connections"
+    if any(r.get("keep_alive") != "42m" or not r.get("stream") for r in stub.requests):
+        return f"missing keep_alive/stream in {stub.requests}"
+    return None
+
+
+def check_routing() -> str | None:
+    stubs = [Stub("done", delay=0.05) for _ in range(2)]
+    client = OllamaClient([s.url for s in stubs])
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(lambda _: client.generate("m", "p"), range(4)))
+    counts = [len(s.requests) for s in stubs]
+    if counts != [2, 2]:
+        return f"4 concurrent requests split {counts}"
+    return None
+
+
+def check_backoff() -> str | None:
+    bad, good = Stub("error"), Stub("done")
+    client = OllamaClient([bad.url, good.url], backoff=5.0)
+    client.generate("m", "p")
+    client.generate("m", "p")
+    failing = client.endpoints[0]
+    if len(bad.requests) != 1 or len(good.requests) != 2:
+        return f"bad endpoint got {len(bad.requests)} requests, good {len(good.requests)}"
+    if failing.down_until <= time.time() or failing.failures != 1:
+        return f"bad endpoint not backing off (failures={failing.failures})"
+    return None
+
+
+def check_reject() -> str | None:
+    stub = Stub("reject")
+    try:
+        OllamaClient([stub.url]).generate("m", "p", retries=2)
+    except RuntimeError as e:
+        if "rejected" not in str(e):
+            return f"unexpected error: {e}"
+    else:
+        return "no error raised"
+    if len(stub.requests) != 1:
+        return f"rejected request was sent {len(stub.requests)} times"
+    return None
+
+
+CHECKS = [
+    ("abort", check_abort),
+    ("keepalive", check_keepalive),
+    ("routing", check_routing),
+    ("backoff", check_backoff),
+    ("reject", check_reject),
+]
+
+
+def main():
+    failed = 0
+    for name, check in CHECKS:
+        try:
+            problem = check()
+        except Exception as e:
+            problem = f"{type(e).__name__}: {e}"
+        print(f"  {name:10} {'FAIL: ' + problem if problem else 'ok'}")
+        failed += problem is not None
+    print()
+    print(f"{len(CHECKS) - failed}/{len(CHECKS)} checks passed")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
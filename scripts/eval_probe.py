@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""Measure the probe's false-rejection rate on a labelled fixture set.
+
+Fixtures are audio files under two subdirectories:
+
+    FIXTURES/speech/   recordings that contain speech (must not be rejected)
+    FIXTURES/silent/   pocket recordings, empty memos, etc. (should be)
+
+Runs probe.probe() on each file with the current [probe] settings (or the
+overrides below) and reports how many speech files were wrongly rejected,
+how many silent files were caught, and the time spent probing versus a
+full decode + VAD (--full).
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from memoant import audio, config
+from memoant.probe import probe
+
+
+def _files(directory: str) -> list[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        os.path.join(directory, name) for name in os.listdir(directory)
+        if os.path.splitext(name)[1].lower() in config.AUDIO_EXTENSIONS
+    )
+
+
+def _full_vad(path: str) -> tuple[float, float]:
+    """(speech seconds, wall seconds) for the full decode + VAD path."""
+    start = time.perf_counter()
+    pcm_path = audio.decode_pcm(path)
+    try:
+        samples = audio.load_pcm(pcm_path)
+        speech = audio.total_speech_duration(audio.detect_speech_segments(samples))
+    finally:
+        os.unlink(pcm_path)
+    return speech, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the silent-recording probe")
+    parser.add_argument("fixtures", help="Directory with speech/ and silent/ subdirectories")
+    parser.add_argument("--windows", type=int, default=config.PROBE_WINDOWS)
+    parser.add_argument("--window-seconds", type=float, default=config.PROBE_WINDOW_SECONDS)
+    parser.add_argument("--min-file-seconds", type=float, default=config.PROBE_MIN_FILE_SECONDS)
+    parser.add_argument("--min-speech-seconds", type=float, default=config.PROBE_MIN_SPEECH_SECONDS)
+    parser.add_argument(
+        "--reject-windows", type=int, default=config.PROBE_REJECT_WINDOWS,
+        help="Reject files with no speech in at least this many windows (0 = never)"
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Also run the full decode + VAD for comparison (slow)"
+    )
+    parser.add_argument(
+        "--max-false-rejections", type=float, default=0.0,
+        help="Exit non-zero if the false-rejection rate exceeds this (default: 0)"
+    )
+    args = parser.parse_args()
+
+    config.ensure_dirs()
+    labelled = [(p, "speech") for p in _files(os.path.join(args.fixtures, "speech"))]
+    labelled += [(p, "silent") for p in _files(os.path.join(args.fixtures, "silent"))]
+    if not labelled:
+        print(f"No fixtures found under {args.fixtures}/speech or {args.fixtures}/silent")
+        sys.exit(1)
+
+    counts = {"speech": 0, "silent": 0, "false_reject": 0, "caught": 0}
+    probe_time = full_time = 0.0
+    for path, label in labelled:
+        start = time.perf_counter()
+        result = probe(
+            path,
+            windows=args.windows,
+            window_seconds=args.window_seconds,
+            min_file_seconds=args.min_file_seconds,
+            min_speech_seconds=args.min_speech_seconds,
+            reject_windows=args.reject_windows,
+        )
+        elapsed = time.perf_counter() - start
+        probe_time += elapsed
+        rejected = result["verdict"] == "silent"
+        counts[label] += 1
+        if label == "speech" and rejected:
+            counts["false_reject"] += 1
+        if label == "silent" and rejected:
+            counts["caught"] += 1
+
+        line = (
+            f"  {label:6} {result['verdict']:6} {elapsed:6.2f}s  "
+            f"{os.path.basename(path)} ({result['reason']})"
+        )
+        if args.full:
+            speech, full_elapsed = _full_vad(path)
+            full_time += full_elapsed
+            line += f"  full VAD: {speech:.1f}s speech in {full_elapsed:.1f}s"
+        print(line)
+
+    false_rate = counts["false_reject"] / counts["speech"] if counts["speech"] else 0.0
+    catch_rate = counts["caught"] / counts["silent"] if counts["silent"] else 0.0
+    print()
+    print(f"False rejections: {counts['false_reject']}/{counts['speech']} ({false_rate:.1%})")
+    print(f"Silent caught:    {counts['caught']}/{counts['silent']} ({catch_rate:.1%})")
+    print(f"Probe time:       {probe_time:.1f}s total")
+    if args.full:
+        print(f"Full VAD time:    {full_time:.1f}s total")
+
+    if false_rate > args.max_false_rejections:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
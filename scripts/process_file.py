@@ -8,6 +8,7 @@ import sys
 # Add src to path for direct execution
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
+from memoant.checkpoint import STAGES
 from memoant.config import NOTES_DIR, ORACLE_DB, ensure_dirs
 from memoant.pipeline import process_file
 
@@ -31,6 +32,10 @@ def main():
         "--mode", default="auto", choices=["auto", "meeting", "dictation"],
         help="Processing mode hint (default: auto)"
     )
+    parser.add_argument(
+        "--from-stage", default=None, choices=STAGES,
+        help="Rerun from this stage, reusing upstream checkpoints (implies --force)"
+    )
     args = parser.parse_args()
 
     if not os.path.isfile(args.file):
@@ -45,6 +50,7 @@ def main():
         skip_diarization=args.skip_diarization,
         force=args.force,
         mode=args.mode,
+        from_stage=args.from_stage,
     )
 
     if result["status"] == "processed":
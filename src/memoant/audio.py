@@ -1,11 +1,26 @@
-"""Audio conversion (ffmpeg) and voice activity detection (silero VAD)."""
+"""Audio conversion (ffmpeg) and voice activity detection (silero VAD).
 
+The pipeline decodes each input once into a raw 16 kHz mono int16 PCM file
+(decode_pcm) and memory-maps it (load_pcm). VAD, chunking, transcription and
+diarization all work on views of that buffer instead of re-reading audio.
+"""
+
+import os
 import subprocess
 import tempfile
+import threading
 
+import numpy as np
 import torch
 
-from .config import AUDIO_SAMPLE_RATE, SILENCE_THRESHOLD, TMP_DIR
+from . import models
+from .config import AUDIO_SAMPLE_RATE, PCM_DIR, SILENCE_THRESHOLD, TMP_DIR
+
+# VAD runs over the buffer in blocks so only one block is ever held as float32
+VAD_BLOCK_SECONDS = 600
+# The cached silero model carries RNN state between calls, so concurrent
+# VAD runs (several io slots) would corrupt each other's segments
+_vad_lock = threading.Lock()
 
 
 def convert_to_wav(input_path: str, output_path: str = None) -> str:
@@ -30,6 +45,55 @@ def convert_to_wav(input_path: str, output_path: str = None) -> str:
     return output_path
 
 
+def decode_pcm(input_path: str, output_path: str = None) -> str:
+    """Decode any audio/video file to raw 16kHz mono int16 PCM using ffmpeg.
+
+    The output has no header, so it can be memory-mapped directly with
+    load_pcm(). Returns path to the .pcm file.
+    """
+    if output_path is None:
+        output_path = tempfile.mktemp(suffix=".pcm", dir=PCM_DIR)
+
+    cmd = [
+        "ffmpeg", "-y",
+        "-i", input_path,
+        "-vn",
+        "-ar", str(AUDIO_SAMPLE_RATE),
+        "-ac", "1",
+        "-c:a", "pcm_s16le",
+        "-f", "s16le",
+        output_path,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr[:500]}")
+    return output_path
+
+
+def load_pcm(pcm_path: str) -> np.ndarray:
+    """Memory-map a raw PCM file from decode_pcm() as a read-only int16 array."""
+    if os.path.getsize(pcm_path) == 0:
+        return np.zeros(0, dtype=np.int16)  # mmap rejects empty files
+    return np.memmap(pcm_path, dtype=np.int16, mode="r")
+
+
+def pcm_duration(samples: np.ndarray) -> float:
+    """Duration in seconds of a 16kHz sample buffer."""
+    return len(samples) / AUDIO_SAMPLE_RATE
+
+
+def slice_seconds(samples: np.ndarray, start: float, end: float) -> np.ndarray:
+    """Return a view of samples between start and end (seconds)."""
+    return samples[int(start * AUDIO_SAMPLE_RATE):int(end * AUDIO_SAMPLE_RATE)]
+
+
+def to_float32(samples: np.ndarray) -> np.ndarray:
+    """Convert int16 PCM to float32 in [-1, 1] (the format models expect)."""
+    if samples.dtype == np.float32:
+        return samples
+    return samples.astype(np.float32) / 32768.0
+
+
 def get_duration(file_path: str) -> float:
     """Get audio duration in seconds using ffprobe."""
     cmd = [
@@ -45,28 +109,49 @@ def get_duration(file_path: str) -> float:
     return float(result.stdout.strip())
 
 
-def detect_speech_segments(wav_path: str) -> list[dict]:
-    """Run silero VAD on a WAV file. Returns list of speech segments.
-
-    Each segment: {"start": float_seconds, "end": float_seconds}
-    """
-    model, utils = torch.hub.load(
+def load_vad_model():
+    """Load the silero VAD model and its helper functions via torch.hub."""
+    return torch.hub.load(
         repo_or_dir="snakers4/silero-vad",
         model="silero_vad",
         trust_repo=True,
     )
-    (get_speech_timestamps, _, read_audio, _, _) = utils
 
-    wav = read_audio(wav_path, sampling_rate=AUDIO_SAMPLE_RATE)
-    speech_timestamps = get_speech_timestamps(
-        wav,
-        model,
-        sampling_rate=AUDIO_SAMPLE_RATE,
-        threshold=SILENCE_THRESHOLD,
-        return_seconds=True,
-    )
 
-    return [{"start": ts["start"], "end": ts["end"]} for ts in speech_timestamps]
+def detect_speech_segments(audio: str | np.ndarray) -> list[dict]:
+    """Run silero VAD on a WAV file or 16kHz sample buffer.
+
+    Returns list of speech segments.
+    Each segment: {"start": float_seconds, "end": float_seconds}
+    """
+    model, utils = models.get("vad", load_vad_model)
+    (get_speech_timestamps, _, read_audio, _, _) = utils
+
+    if isinstance(audio, str):
+        audio = read_audio(audio, sampling_rate=AUDIO_SAMPLE_RATE).numpy()
+
+    block = VAD_BLOCK_SECONDS * AUDIO_SAMPLE_RATE
+    segments = []
+    with _vad_lock:
+        for block_start in range(0, len(audio), block):
+            wav = torch.from_numpy(to_float32(audio[block_start:block_start + block]))
+            offset = block_start / AUDIO_SAMPLE_RATE
+            speech_timestamps = get_speech_timestamps(
+                wav,
+                model,
+                sampling_rate=AUDIO_SAMPLE_RATE,
+                threshold=SILENCE_THRESHOLD,
+                return_seconds=True,
+            )
+            for ts in speech_timestamps:
+                start, end = ts["start"] + offset, ts["end"] + offset
+                # Rejoin speech that was split at a block boundary
+                if segments and start - segments[-1]["end"] < 0.1:
+                    segments[-1]["end"] = end
+                else:
+                    segments.append({"start": start, "end": end})
+
+    return segments
 
 
 def total_speech_duration(segments: list[dict]) -> float:
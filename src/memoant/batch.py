@@ -0,0 +1,252 @@
+"""Bulk backfill: process a directory or glob of recordings on a worker pool.
+
+Files are hashed up front and checked against os_audio_logs in one pass, so
+already-processed recordings never reach a worker. The rest are ordered
+(longest first by default, which keeps the pool busy until the end) and
+fanned out to worker processes that each keep their models warm across
+files, or with pipelined=True run through executor.run_pipelined() in a
+single process with stages overlapped across files. Progress and ETA are
+measured in audio seconds, and a JSON summary with throughput
+(audio-hours per wall-hour) is written at the end.
+"""
+
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+from . import db
+from .config import AUDIO_EXTENSIONS, BATCH_WORKERS, NOTES_DIR, ORACLE_DB, STATE_DIR, ensure_dirs
+
+ORDERS = ["longest", "shortest", "oldest", "newest"]
+
+
+def collect_files(target: str) -> list[str]:
+    """Expand a directory (recursively) or glob pattern to audio file paths."""
+    target = os.path.expanduser(target)
+    if os.path.isdir(target):
+        paths = []
+        for root, _, names in os.walk(target):
+            paths.extend(os.path.join(root, n) for n in names)
+    else:
+        paths = glob.glob(target, recursive=True)
+    return sorted(
+        os.path.abspath(p) for p in paths
+        if os.path.isfile(p) and os.path.splitext(p)[1].lower() in AUDIO_EXTENSIONS
+    )
+
+
+def _probe(path: str) -> dict:
+    """Hash and probe one file (runs on a thread pool)."""
+    from .audio import get_duration
+    from .fingerprint import file_id
+
+    item = {"path": path, "file_id": file_id(path), "mtime": os.path.getmtime(path)}
+    try:
+        item["duration"] = get_duration(path)
+    except (RuntimeError, ValueError):
+        item["duration"] = None
+    return item
+
+
+def plan_batch(paths: list[str], db_path: str, force: bool = False, order: str = "longest") -> dict:
+    """Hash, dedup and order files.
+
+    Returns {"todo": [...], "duplicates": [...], "already_processed": [...]},
+    where each item is {"path", "file_id", "mtime", "duration"}.
+    """
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        items = list(pool.map(_probe, paths))
+
+    seen = set()
+    unique = []
+    duplicates = []
+    for item in items:
+        if item["file_id"] in seen:
+            duplicates.append(item)
+        else:
+            seen.add(item["file_id"])
+            unique.append(item)
+
+    existing = set()
+    if not force:
+        database = db.open_db(db_path)
+        db.ensure_schema(database)
+        existing = db.existing_file_ids(database, seen)
+        database.close()
+
+    todo = [i for i in unique if i["file_id"] not in existing]
+    done = [i for i in unique if i["file_id"] in existing]
+
+    if order in ("longest", "shortest"):
+        todo.sort(key=lambda i: i["duration"] or 0, reverse=order == "longest")
+    else:
+        todo.sort(key=lambda i: i["mtime"], reverse=order == "newest")
+
+    return {"todo": todo, "duplicates": duplicates, "already_processed": done}
+
+
+def _init_worker(log_path: str):
+    """Send worker output to the batch log instead of the terminal."""
+    sys.stdout = open(log_path, "a", buffering=1)
+    sys.stderr = sys.stdout
+
+
+def _process_one(item: dict, options: dict) -> dict:
+    """Worker task: run the pipeline on one file. Never raises."""
+    from .pipeline import process_file
+
+    start = time.time()
+    try:
+        result = process_file(item["path"], file_id=item["file_id"], **options)
+        status = result["status"]
+        error = None
+        duration = result.get("duration", item["duration"])
+    except Exception as e:
+        status = "failed"
+        error = f"{type(e).__name__}: {e}"
+        duration = item["duration"]
+        print(f"  FAILED {item['path']}: {error}")
+    return {
+        "path": item["path"],
+        "file_id": item["file_id"],
+        "status": status,
+        "duration": duration,
+        "wall_seconds": time.time() - start,
+        "error": error,
+    }
+
+
+def _run_pipelined(todo: list[dict], options: dict, report):
+    """Run the batch through the stage-pipelined executor in this process."""
+    from .executor import run_pipelined
+
+    by_path = {item["path"]: item for item in todo}
+
+    def on_result(job: dict):
+        item = by_path[job["input_path"]]
+        result = job["result"]
+        report({
+            "path": item["path"],
+            "file_id": item["file_id"],
+            "status": result["status"],
+            "duration": result.get("duration", item["duration"]),
+            "wall_seconds": time.time() - job["start_time"],
+            "error": result.get("error"),
+        })
+
+    run_pipelined(
+        [(item["path"], item["file_id"]) for item in todo],
+        on_result=on_result,
+        **options,
+    )
+
+
+def _fmt_hms(seconds: float) -> str:
+    m, s = divmod(int(seconds), 60)
+    h, m = divmod(m, 60)
+    return f"{h}h{m:02d}m" if h else f"{m}m{s:02d}s"
+
+
+def run_batch(
+    target: str,
+    db_path: str = ORACLE_DB,
+    notes_dir: str = NOTES_DIR,
+    workers: int = BATCH_WORKERS,
+    skip_diarization: bool = False,
+    force: bool = False,
+    mode: str = "auto",
+    order: str = "longest",
+    summary_path: str | None = None,
+    dry_run: bool = False,
+    pipelined: bool = False,
+) -> dict:
+    """Process every audio file under target. Returns the summary dict."""
+    ensure_dirs()
+    started_at = datetime.now(tz=timezone.utc)
+    stamp = started_at.strftime("%Y%m%d-%H%M%S")
+    summary_path = summary_path or os.path.join(STATE_DIR, f"batch-{stamp}.json")
+    log_path = os.path.join(STATE_DIR, f"batch-{stamp}.log")
+
+    paths = collect_files(target)
+    print(f"Found {len(paths)} audio files in {target}")
+    print("Hashing and probing...")
+    plan = plan_batch(paths, db_path, force=force, order=order)
+    todo = plan["todo"]
+    total_audio = sum(i["duration"] or 0 for i in todo)
+    print(f"  To process: {len(todo)} ({total_audio / 3600:.1f}h of audio)")
+    print(f"  Already processed: {len(plan['already_processed'])}")
+    print(f"  Duplicates in batch: {len(plan['duplicates'])}")
+
+    results = []
+    wall_start = time.time()
+    done_audio = [0.0]
+    report_lock = threading.Lock()  # the pipelined executor reports from its stage threads
+
+    def report(res: dict):
+        with report_lock:
+            results.append(res)
+            done_audio[0] += res["duration"] or 0
+            elapsed = time.time() - wall_start
+            if done_audio[0] > 0 and total_audio > done_audio[0]:
+                eta = _fmt_hms(elapsed * (total_audio - done_audio[0]) / done_audio[0])
+            else:
+                eta = "-"
+            pct = 100 * done_audio[0] / total_audio if total_audio else 100.0
+            print(
+                f"[{len(results)}/{len(todo)}] {pct:5.1f}% of audio, "
+                f"elapsed {_fmt_hms(elapsed)}, ETA {eta}  "
+                f"{res['status']:<9} {os.path.basename(res['path'])}"
+            )
+
+    if todo and not dry_run:
+        options = {
+            "db_path": db_path,
+            "notes_dir": notes_dir,
+            "skip_diarization": skip_diarization,
+            "force": force,
+            "mode": mode,
+        }
+        if pipelined:
+            print("Processing with the pipelined executor\n")
+            _run_pipelined(todo, options, report)
+        else:
+            print(f"Processing with {workers} workers (log: {log_path})\n")
+            with ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker, initargs=(log_path,)
+            ) as pool:
+                futures = [pool.submit(_process_one, item, options) for item in todo]
+                for fut in as_completed(futures):
+                    report(fut.result())
+    wall_seconds = time.time() - wall_start
+
+    counts = {}
+    for res in results:
+        counts[res["status"]] = counts.get(res["status"], 0) + 1
+    processed_audio = sum(r["duration"] or 0 for r in results if r["status"] == "processed")
+    summary = {
+        "target": target,
+        "started_at": started_at.isoformat(),
+        "finished_at": datetime.now(tz=timezone.utc).isoformat(),
+        "workers": "pipelined" if pipelined else workers,
+        "order": order,
+        "dry_run": dry_run,
+        "files_found": len(paths),
+        "already_processed": len(plan["already_processed"]),
+        "duplicates": len(plan["duplicates"]),
+        "queued": len(todo),
+        "status_counts": counts,
+        "wall_seconds": wall_seconds,
+        "audio_seconds_processed": processed_audio,
+        "audio_hours_per_wall_hour": processed_audio / wall_seconds if wall_seconds > 0 else None,
+        "files": results,
+        "log": log_path if results and not pipelined else None,
+    }
+    with open(summary_path, "w") as f:
+        json.dump(summary, f, indent=2)
+    summary["summary_path"] = summary_path
+    return summary
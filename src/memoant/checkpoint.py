@@ -0,0 +1,143 @@
+"""Per-file stage checkpoints so reruns resume from the last valid stage.
+
+Each stage of the pipeline stores its output under
+CHECKPOINT_DIR/<file_id>/<stage>.json together with a key derived from the
+stage inputs and the model/config versions it depends on. Keys are chained
+(every stage key includes its upstream keys), so changing e.g. WHISPER_MODEL
+invalidates transcription and everything built on it, but not VAD or
+diarization (which only needs the audio).
+
+Checkpoints outlive a successful run, so `--force` after a failed LLM call
+or `--from-stage llm` reuses the transcript and diarization. prune() keeps
+the directory bounded: files whose checkpoints were last written more than
+CHECKPOINT_MAX_AGE_DAYS ago are dropped, then the oldest first until the
+total fits in CHECKPOINT_MAX_MB.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+
+from .config import CHECKPOINT_DIR, CHECKPOINT_MAX_AGE_DAYS, CHECKPOINT_MAX_MB
+
+# Pipeline order, and the stages each one is computed from. Invalidating a
+# stage also invalidates every stage that depends on it, directly or not.
+STAGES = ["probe", "convert", "vad", "transcribe", "diarize", "merge", "llm"]
+UPSTREAM = {
+    "probe": [],
+    "convert": ["probe"],
+    "vad": ["convert"],
+    "transcribe": ["vad"],
+    "diarize": ["vad"],  # compaction uses the VAD regions; the transcript is not needed
+    "merge": ["transcribe", "diarize"],
+    "llm": ["merge"],
+}
+
+
+def downstream(stage: str) -> list[str]:
+    """stage and every stage that depends on it, in pipeline order."""
+    if stage not in STAGES:
+        raise ValueError(f"Unknown stage: {stage!r}")
+    affected = {stage}
+    for s in STAGES:
+        if any(u in affected for u in UPSTREAM[s]):
+            affected.add(s)
+    return [s for s in STAGES if s in affected]
+
+
+def stage_key(*parts) -> str:
+    """Build a stable cache key from JSON-serializable parts."""
+    h = hashlib.sha256()
+    for part in parts:
+        h.update(json.dumps(part, sort_keys=True, default=str).encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class CheckpointStore:
+    """JSON checkpoint files for a single file_id."""
+
+    def __init__(self, file_id: str, root: str = CHECKPOINT_DIR):
+        self.file_id = file_id
+        self.dir = os.path.join(root, file_id)
+
+    def _path(self, stage: str) -> str:
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage!r}")
+        return os.path.join(self.dir, f"{stage}.json")
+
+    def load(self, stage: str, key: str):
+        """Return the stored value for stage if its key matches, else None."""
+        path = self._path(stage)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry.get("key") != key:
+            return None
+        return entry.get("value")
+
+    def save(self, stage: str, key: str, value):
+        """Atomically write a stage checkpoint."""
+        os.makedirs(self.dir, exist_ok=True)
+        path = self._path(stage)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"key": key, "value": value}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def invalidate(self, from_stage: str):
+        """Drop the checkpoint for from_stage and every stage downstream of it."""
+        for stage in downstream(from_stage):
+            try:
+                os.unlink(self._path(stage))
+            except FileNotFoundError:
+                pass
+
+    def stages(self) -> list[str]:
+        """List stages that currently have a checkpoint on disk."""
+        return [s for s in STAGES if os.path.isfile(self._path(s))]
+
+    def clear(self):
+        """Remove all checkpoints for this file."""
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+def prune(root: str = CHECKPOINT_DIR, now: float | None = None,
+          max_age_days: float = CHECKPOINT_MAX_AGE_DAYS, max_mb: float = CHECKPOINT_MAX_MB) -> int:
+    """Drop the checkpoints of files not written for max_age_days, then the
+    least recently written until the rest fit in max_mb. Returns the number
+    of files whose checkpoints were removed."""
+    now = now or time.time()
+    entries = []  # (last written, size, dir)
+    try:
+        names = os.listdir(root)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        path = os.path.join(root, name)
+        mtime, size = 0.0, 0
+        try:
+            for f in os.scandir(path):
+                st = f.stat()
+                mtime = max(mtime, st.st_mtime)
+                size += st.st_size
+        except OSError:
+            continue
+        entries.append((mtime, size, path))
+    entries.sort()
+
+    removed = 0
+    total = sum(size for _, size, _ in entries)
+    for mtime, size, path in entries:
+        if mtime >= now - max_age_days * 86400 and total <= max_mb * 1024 * 1024:
+            break
+        shutil.rmtree(path, ignore_errors=True)
+        total -= size
+        removed += 1
+    return removed
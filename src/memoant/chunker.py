@@ -1,6 +1,23 @@
-"""Split long audio files into chunks at silence boundaries."""
+"""Split long audio files into chunks at silence boundaries.
 
-from .config import MAX_CHUNK_SECONDS, MIN_SILENCE_MS
+Chunks carry a core range ("start"/"end", which tile the recording) and a
+slightly wider audio range ("audio_start"/"audio_end") that overlaps the
+neighbouring chunks. stitch_transcripts() uses the core ranges plus word
+alignment to merge the per-chunk results without duplicates or gaps.
+"""
+
+import math
+import re
+
+import numpy as np
+
+from .config import (
+    CHUNK_OVERLAP_SECONDS,
+    MAX_CHUNK_SECONDS,
+    MIN_PARALLEL_CHUNK_SECONDS,
+    MIN_SILENCE_MS,
+)
+from .words import WordTable
 
 
 def find_silence_gaps(speech_segments: list[dict], min_gap_ms: int = MIN_SILENCE_MS) -> list[dict]:
@@ -22,22 +39,47 @@ def find_silence_gaps(speech_segments: list[dict], min_gap_ms: int = MIN_SILENCE
     return gaps
 
 
+def target_chunk_seconds(
+    total_duration: float,
+    max_chunk_seconds: int = MAX_CHUNK_SECONDS,
+    workers: int = 1,
+    min_chunk_seconds: int = MIN_PARALLEL_CHUNK_SECONDS,
+) -> float:
+    """Pick a chunk length that keeps every worker busy.
+
+    The chunk count is rounded up to a multiple of workers (so no worker
+    idles on the last round), but chunks never drop below min_chunk_seconds
+    or exceed max_chunk_seconds.
+    """
+    n_chunks = max(1, math.ceil(total_duration / max_chunk_seconds))
+    if workers > 1:
+        n_chunks = math.ceil(n_chunks / workers) * workers
+        if total_duration / n_chunks < min_chunk_seconds:
+            n_chunks = max(1, int(total_duration // min_chunk_seconds))
+    return min(max_chunk_seconds, total_duration / n_chunks)
+
+
 def plan_chunks(
     total_duration: float,
     silence_gaps: list[dict],
     max_chunk_seconds: int = MAX_CHUNK_SECONDS,
+    workers: int = 1,
+    overlap_seconds: float = CHUNK_OVERLAP_SECONDS,
 ) -> list[dict]:
-    """Plan chunk boundaries at silence gaps, targeting max_chunk_seconds per chunk.
+    """Plan chunk boundaries at silence gaps, sized for the worker count.
 
-    Returns list of {"start": float, "end": float} for each chunk.
-    If total_duration <= max_chunk_seconds, returns a single chunk.
+    Returns list of {"start", "end", "audio_start", "audio_end"} for each
+    chunk. start/end tile the recording; audio_start/audio_end extend them
+    by overlap_seconds on each inner boundary.
+    If the recording fits in one chunk, returns a single chunk.
     """
-    if total_duration <= max_chunk_seconds:
-        return [{"start": 0.0, "end": total_duration}]
+    chunk_seconds = target_chunk_seconds(total_duration, max_chunk_seconds, workers)
+    if total_duration <= chunk_seconds:
+        return [_with_overlap(0.0, total_duration, total_duration, 0.0)]
 
     chunks = []
     chunk_start = 0.0
-    target_end = max_chunk_seconds
+    target_end = chunk_seconds
 
     while chunk_start < total_duration:
         if target_end >= total_duration:
@@ -56,7 +98,7 @@ def plan_chunks(
                 best_distance = distance
                 best_gap = gap
 
-        if best_gap and best_distance < max_chunk_seconds * 0.3:
+        if best_gap and best_distance < chunk_seconds * 0.3:
             split_point = (best_gap["start"] + best_gap["end"]) / 2
             chunks.append({"start": chunk_start, "end": split_point})
             chunk_start = split_point
@@ -64,6 +106,150 @@ def plan_chunks(
             chunks.append({"start": chunk_start, "end": target_end})
             chunk_start = target_end
 
-        target_end = chunk_start + max_chunk_seconds
+        target_end = chunk_start + chunk_seconds
+
+    return [
+        _with_overlap(c["start"], c["end"], total_duration, overlap_seconds)
+        for c in chunks
+    ]
+
+
+def _with_overlap(start: float, end: float, total_duration: float, overlap: float) -> dict:
+    return {
+        "start": start,
+        "end": end,
+        "audio_start": max(0.0, start - overlap),
+        "audio_end": min(total_duration, end + overlap),
+    }
+
+
+def _mid(item: dict) -> float:
+    return (item["start"] + item["end"]) / 2
+
+
+def _norm(text: str) -> str:
+    return re.sub(r"[^\w']", "", text.lower())
+
+
+def stitch_transcripts(results: list[dict], chunks: list[dict], tolerance: float = 0.5) -> dict:
+    """Merge per-chunk transcripts (absolute timestamps) into one result.
+
+    Each chunk owns the words whose midpoint falls in its core range.
+    Words within `tolerance` seconds of a boundary that only the
+    non-owning chunk heard are rescued, and boundary words both chunks
+    kept (same text, midpoints within `tolerance`, from different chunks)
+    are deduplicated. Repeats within one chunk ("no no") are kept. The
+    text and segments are rebuilt from the stitched words, so a segment
+    spanning a boundary is trimmed to the words kept from its chunk.
+    Results without word timings fall back to whole segments by midpoint.
+
+    Returns {"text", "words", "segments"} like transcribe.transcribe().
+    """
+    last = len(chunks) - 1
+    if not any(len(r["words"]) for r in results):
+        return _stitch_segments(results, chunks)
+    parts = []
+    sources = []  # chunk index each part came from
+    for i, (result, chunk) in enumerate(zip(results, chunks)):
+        lo = chunk["start"] if i > 0 else float("-inf")
+        hi = chunk["end"] if i < last else float("inf")
+        mid = result["words"].midpoints()
+        parts.append(result["words"].select((lo <= mid) & (mid < hi)))
+        sources.append(i)
+
+    # Rescue boundary words the owning chunk missed
+    owned = WordTable.concat(parts)
+    owned_mid = owned.midpoints()
+    for i in range(last):
+        boundary = chunks[i]["end"]
+        near = np.flatnonzero(np.abs(owned_mid - boundary) < tolerance)
+        nearby = [(_norm(owned.word(j)), owned_mid[j]) for j in near.tolist()]
+        # Words past the boundary, as heard by the chunk that doesn't own them
+        for source, side in ((i, 1), (i + 1, -1)):
+            table = results[source]["words"]
+            mid = table.midpoints()
+            past = side * (mid - boundary)
+            picked = np.flatnonzero((0 <= past) & (past < tolerance))
+            rescued = []
+            for j in picked.tolist():
+                key = (_norm(table.word(j)), mid[j])
+                if not any(key[0] == n and abs(key[1] - m) < tolerance for n, m in nearby):
+                    rescued.append(j)
+                    nearby.append(key)
+            if rescued:
+                parts.append(table.select(rescued))
+                sources.append(source)
+
+    words = WordTable.concat(parts)
+    order = np.argsort(words.starts, kind="stable")
+    words = words.select(order)
+    origin = np.concatenate(
+        [np.full(len(p), s) for p, s in zip(parts, sources)] or [np.empty(0, int)]
+    )[order].tolist()
+    norms = [_norm(t) for t in words.texts()]
+    mids = words.midpoints()
+    boundaries = np.array([c["end"] for c in chunks[:-1]])
+    near_boundary = (
+        (np.abs(mids[:, None] - boundaries[None, :]) < tolerance).any(axis=1).tolist()
+        if len(boundaries) else [False] * len(words)
+    )
+    mids = mids.tolist()
+    keep = []
+    for j in range(len(words)):
+        k = keep[-1] if keep else None
+        if (
+            k is not None and near_boundary[j] and origin[j] != origin[k]
+            and norms[j] == norms[k] and abs(mids[j] - mids[k]) < tolerance
+        ):
+            continue
+        keep.append(j)
+
+    words = words.select(keep)
+    origin = [origin[j] for j in keep]
+    return {
+        "text": words.text,
+        "words": words,
+        "segments": _split_segments(results, words, origin),
+    }
+
+
+def _split_segments(results: list[dict], words: WordTable, origin: list[int]) -> list[dict]:
+    """Rebuild segments from stitched words: each word joins the segment of
+    its own chunk that it falls in, and segments keep only those words."""
+    starts = [np.array([s["start"] for s in r["segments"]]) for r in results]
+    groups = {}  # (chunk, segment index) -> word indices
+    for j, (source, mid) in enumerate(zip(origin, words.midpoints().tolist())):
+        if not len(starts[source]):
+            index = -1
+        else:
+            index = max(0, int(np.searchsorted(starts[source], mid, side="right")) - 1)
+        groups.setdefault((source, index), []).append(j)
+
+    segments = []
+    for (source, index), members in groups.items():
+        seg = dict(results[source]["segments"][index]) if index >= 0 else {}
+        text = " ".join(words.word(j) for j in members)
+        if text != seg.get("text", "").strip():
+            seg.pop("tokens", None)  # no longer matches the trimmed text
+        seg.update(
+            start=round(float(words.starts[members[0]]), 3),
+            end=round(float(max(words.ends[j] for j in members)), 3),
+            text=text,
+        )
+        segments.append(seg)
+    segments.sort(key=lambda s: s["start"])
+    return segments
+
 
-    return chunks
+def _stitch_segments(results: list[dict], chunks: list[dict]) -> dict:
+    """Stitch results that have no word timings: each chunk keeps the
+    segments whose midpoint falls in its core range."""
+    last = len(chunks) - 1
+    segments = []
+    for i, (result, chunk) in enumerate(zip(results, chunks)):
+        lo = chunk["start"] if i > 0 else float("-inf")
+        hi = chunk["end"] if i < last else float("inf")
+        segments.extend(s for s in result["segments"] if lo <= _mid(s) < hi)
+    segments.sort(key=lambda s: s["start"])
+    text = " ".join(s.get("text", "").strip() for s in segments).strip()
+    return {"text": text, "words": WordTable.empty(), "segments": segments}
@@ -0,0 +1,327 @@
+"""Local classifier for the categorical fields.
+
+sphere, conversation_type, sentiment and tags are classification outputs,
+and os_audio_logs already holds plenty of labelled examples. train()
+fits one linear model per field on hashed TF-IDF features of the plain
+transcript (word unigrams and bigrams, plus speaker-count and duration
+tokens): softmax regression for the single-label fields, one-vs-rest
+logistic regression over the common tags. classify() fills the fields it
+is at least CLASSIFIER_MIN_CONFIDENCE sure about, in milliseconds, and
+the LLM is only asked for the rest (see structure.extract_structure).
+
+Trained with `memoant train-classifier`; the model lives in
+CLASSIFIER_PATH as a NumPy .npz file.
+"""
+
+import json
+import math
+import os
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from .config import CLASSIFIER_ENABLED, CLASSIFIER_MIN_CONFIDENCE, CLASSIFIER_PATH, ORACLE_DB
+from .db import ensure_schema, open_db
+
+N_FEATURES = 1 << 18
+SINGLE_FIELDS = ["sphere", "conversation_type", "sentiment"]
+MIN_EXAMPLES = 50  # labelled rows needed to train a field
+MIN_TAG_EXAMPLES = 10  # rows a tag must appear in to be predicted
+MAX_TAGS = 50
+HOLDOUT = 0.2
+
+_TOKEN_RE = re.compile(r"[a-z0-9']+")
+_loaded = {}  # path -> (mtime, model)
+
+
+# ── Features ─────────────────────────────────────────────────────────
+
+
+def _grams(text: str, speaker_count: int, duration: float) -> Counter:
+    tokens = _TOKEN_RE.findall(text.lower())
+    grams = Counter(tokens)
+    grams.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    grams[f"__speakers_{min(speaker_count or 1, 4)}"] += 1
+    grams[f"__minutes_{min(int(math.log2(1 + (duration or 0) / 60)), 8)}"] += 1
+    return grams
+
+
+def hash_features(text: str, speaker_count: int, duration: float) -> tuple[np.ndarray, np.ndarray]:
+    """Sorted feature indices and log term frequencies (collisions summed)."""
+    grams = _grams(text, speaker_count, duration)
+    idx = np.fromiter(
+        (zlib.crc32(g.encode()) & (N_FEATURES - 1) for g in grams), dtype=np.int64, count=len(grams)
+    )
+    tf = 1.0 + np.log(np.fromiter(grams.values(), dtype=np.float32, count=len(grams)))
+    order = np.argsort(idx, kind="stable")
+    idx, tf = idx[order], tf[order]
+    uniq, starts = np.unique(idx, return_index=True)
+    return uniq, np.add.reduceat(tf, starts).astype(np.float32)
+
+
+def _weighted(example: tuple[np.ndarray, np.ndarray], idf: np.ndarray):
+    idx, tf = example
+    val = tf * idf[idx]
+    norm = float(np.linalg.norm(val))
+    return idx, val / norm if norm else val
+
+
+class _Batch:
+    """Several sparse rows flattened for vectorized scoring and updates."""
+
+    def __init__(self, rows: list[tuple[np.ndarray, np.ndarray]]):
+        lengths = np.array([len(idx) for idx, _ in rows])
+        self.size = len(rows)
+        self.idx = np.concatenate([idx for idx, _ in rows])
+        self.val = np.concatenate([val for _, val in rows])
+        self.starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        self.rows = np.repeat(np.arange(len(rows)), lengths)
+
+    def scores(self, W: np.ndarray, b: np.ndarray) -> np.ndarray:
+        return np.add.reduceat(W[self.idx] * self.val[:, None], self.starts) + b
+
+    def update(self, W: np.ndarray, b: np.ndarray, delta: np.ndarray, lr: float):
+        """W -= lr * X^T delta / size, summing repeated features first."""
+        grad = delta[self.rows] * self.val[:, None]
+        order = np.argsort(self.idx, kind="stable")
+        uniq, starts = np.unique(self.idx[order], return_index=True)
+        W[uniq] -= lr / self.size * np.add.reduceat(grad[order], starts)
+        b -= lr / self.size * delta.sum(axis=0)
+
+
+# ── Training ─────────────────────────────────────────────────────────
+
+
+def _softmax(z: np.ndarray) -> np.ndarray:
+    z = z - z.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def _sigmoid(z: np.ndarray) -> np.ndarray:
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _fit(X: list, Y: np.ndarray, n_out: int, multilabel: bool, epochs: int = 15,
+         lr: float = 2.0, l2: float = 1e-4, batch_size: int = 64,
+         seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    """Mini-batch gradient descent. Y is class indices (softmax) or a 0/1
+    matrix (one-vs-rest)."""
+    W = np.zeros((N_FEATURES, n_out), dtype=np.float32)
+    b = np.zeros(n_out, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+    for _ in range(epochs):
+        order = rng.permutation(len(X))
+        for start in range(0, len(order), batch_size):
+            pick = order[start:start + batch_size]
+            batch = _Batch([X[i] for i in pick])
+            z = batch.scores(W, b)
+            if multilabel:
+                delta = _sigmoid(z) - Y[pick]
+            else:
+                delta = _softmax(z)
+                delta[np.arange(len(pick)), Y[pick]] -= 1.0
+            batch.update(W, b, delta.astype(np.float32), lr)
+        # Weight decay once per epoch keeps the sparse updates cheap
+        W *= max(0.5, 1.0 - lr * l2 * math.ceil(len(X) / batch_size))
+    return W, b
+
+
+def _probabilities(X: list, W: np.ndarray, b: np.ndarray, multilabel: bool) -> np.ndarray:
+    out = []
+    for start in range(0, len(X), 256):
+        z = _Batch(X[start:start + 256]).scores(W, b)
+        out.append(_sigmoid(z) if multilabel else _softmax(z))
+    return np.concatenate(out)
+
+
+def load_examples(db_path: str = ORACLE_DB) -> list[dict]:
+    """Processed rows with a transcript and no LLM error.
+
+    Fields the classifier itself filled (llm_stats["classified"]) are left
+    unlabelled, so retraining never learns from its own predictions.
+    """
+    db = open_db(db_path)
+    try:
+        ensure_schema(db)
+        rows = db.execute(
+            """SELECT transcript_plain, speaker_count, duration_seconds, sphere,
+                      conversation_type, sentiment, tags, llm_stats
+               FROM os_audio_logs
+               WHERE error IS NULL AND status IS NULL AND transcript_plain != ''"""
+        ).fetchall()
+    finally:
+        db.close()
+    examples = []
+    for r in rows:
+        example = {
+            "text": r[0],
+            "speaker_count": r[1] or 1,
+            "duration": r[2] or 0.0,
+            "sphere": r[3],
+            "conversation_type": r[4],
+            "sentiment": r[5],
+            "tags": [t.lower() for t in json.loads(r[6] or "[]") if isinstance(t, str)],
+        }
+        for field in json.loads(r[7] or "{}").get("classified", []):
+            example[field] = [] if field == "tags" else None
+        examples.append(example)
+    return examples
+
+
+def _head_labels(examples: list[dict], field: str):
+    """(row indices, label matrix or indices, class names) for one field."""
+    if field == "tags":
+        counts = Counter(t for e in examples for t in set(e["tags"]))
+        classes = [t for t, n in counts.most_common(MAX_TAGS) if n >= MIN_TAG_EXAMPLES]
+        rows = [i for i, e in enumerate(examples) if e["tags"]]
+        col = {t: j for j, t in enumerate(classes)}
+        Y = np.zeros((len(rows), len(classes)), dtype=np.float32)
+        for r, i in enumerate(rows):
+            for t in examples[i]["tags"]:
+                if t in col:
+                    Y[r, col[t]] = 1.0
+        return rows, Y, classes
+    rows = [i for i, e in enumerate(examples) if e[field]]
+    classes = sorted({examples[i][field] for i in rows})
+    col = {c: j for j, c in enumerate(classes)}
+    return rows, np.array([col[examples[i][field]] for i in rows], dtype=np.int64), classes
+
+
+def _evaluate(P: np.ndarray, Y: np.ndarray, multilabel: bool, threshold: float) -> dict:
+    """Holdout accuracy overall and on the predictions classify() would use."""
+    if multilabel:
+        predicted = P >= threshold
+        used = predicted.any(axis=1)
+        truth = Y.astype(bool)
+        # A tag prediction is right if every predicted tag is a true tag;
+        # overall accuracy is for the single most likely tag
+        correct = ~(predicted & ~truth).any(axis=1)
+        return {
+            "accuracy": float(truth[np.arange(len(P)), P.argmax(axis=1)].mean()),
+            "coverage": float(used.mean()),
+            "confident_accuracy": float(correct[used].mean()) if used.any() else None,
+        }
+    confidence = P.max(axis=1)
+    correct = P.argmax(axis=1) == Y
+    used = confidence >= threshold
+    return {
+        "accuracy": float(correct.mean()),
+        "coverage": float(used.mean()),
+        "confident_accuracy": float(correct[used].mean()) if used.any() else None,
+    }
+
+
+def train(db_path: str = ORACLE_DB, out_path: str = CLASSIFIER_PATH,
+          threshold: float = CLASSIFIER_MIN_CONFIDENCE) -> dict:
+    """Train every field with enough examples and save the model.
+
+    Each field is first fit on 80% of its rows and scored on the rest
+    (the report), then refit on all of them. Returns
+    {field: {"examples", "classes", "accuracy", "coverage",
+    "confident_accuracy"}}; fields without enough data are reported with
+    "skipped".
+    """
+    examples = load_examples(db_path)
+    raw = [hash_features(e["text"], e["speaker_count"], e["duration"]) for e in examples]
+
+    # Document frequency over hashed features
+    df = np.zeros(N_FEATURES, dtype=np.float32)
+    for idx, _ in raw:
+        df[idx] += 1
+    idf = np.log((1 + len(raw)) / (1 + df)).astype(np.float32) + 1.0
+    X = [_weighted(r, idf) for r in raw]
+
+    rng = np.random.default_rng(0)
+    arrays = {"idf": idf}
+    meta = {"threshold": threshold, "examples": len(examples), "fields": {}}
+    report = {}
+    for field in [*SINGLE_FIELDS, "tags"]:
+        multilabel = field == "tags"
+        rows, Y, classes = _head_labels(examples, field)
+        if len(rows) < MIN_EXAMPLES or len(classes) < (1 if multilabel else 2):
+            report[field] = {"examples": len(rows), "skipped": "not enough labelled examples"}
+            continue
+
+        Xf = [X[i] for i in rows]
+        split = rng.permutation(len(rows))
+        n_test = max(1, int(len(rows) * HOLDOUT))
+        test, fit = split[:n_test], split[n_test:]
+        W, b = _fit([Xf[i] for i in fit], Y[fit], len(classes), multilabel)
+        P = _probabilities([Xf[i] for i in test], W, b, multilabel)
+        report[field] = {
+            "examples": len(rows),
+            "classes": len(classes),
+            **_evaluate(P, Y[test], multilabel, threshold),
+        }
+
+        W, b = _fit(Xf, Y, len(classes), multilabel)
+        arrays[f"W_{field}"] = W
+        arrays[f"b_{field}"] = b
+        meta["fields"][field] = {"classes": classes, "multilabel": multilabel}
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    tmp = out_path + ".tmp.npz"
+    np.savez_compressed(tmp, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp, out_path)
+    _loaded.pop(out_path, None)
+    return report
+
+
+# ── Inference ────────────────────────────────────────────────────────
+
+
+def load(path: str = CLASSIFIER_PATH) -> dict | None:
+    """The trained model (cached until the file changes), or None."""
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _loaded.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with np.load(path) as data:
+        model = {name: data[name] for name in data.files}
+    model["meta"] = json.loads(str(model["meta"]))
+    _loaded[path] = (mtime, model)
+    return model
+
+
+def predict(text: str, speaker_count: int, duration: float, path: str = CLASSIFIER_PATH) -> dict:
+    """{field: (value, confidence)} for every trained field. For tags the
+    value is the list of tags at or above the threshold and the confidence
+    is the lowest of theirs (0.0 with no tag above it)."""
+    model = load(path)
+    if model is None:
+        return {}
+    x = _weighted(hash_features(text, speaker_count, duration), model["idf"])
+    batch = _Batch([x])
+    threshold = model["meta"]["threshold"]
+    out = {}
+    for field, info in model["meta"]["fields"].items():
+        z = batch.scores(model[f"W_{field}"], model[f"b_{field}"])
+        classes = info["classes"]
+        if info["multilabel"]:
+            p = _sigmoid(z)[0]
+            picked = np.nonzero(p >= threshold)[0]
+            tags = [classes[j] for j in picked[np.argsort(-p[picked])]]
+            out[field] = (tags, float(p[picked].min()) if len(picked) else 0.0)
+        else:
+            p = _softmax(z)[0]
+            out[field] = (classes[int(p.argmax())], float(p.max()))
+    return out
+
+
+def classify(text: str, speaker_count: int, duration: float,
+             min_confidence: float = CLASSIFIER_MIN_CONFIDENCE) -> dict:
+    """{field: value} for the fields predicted with at least
+    min_confidence; empty when disabled or untrained."""
+    if not CLASSIFIER_ENABLED:
+        return {}
+    return {
+        field: value
+        for field, (value, confidence) in predict(text, speaker_count, duration).items()
+        if value and confidence >= min_confidence
+    }
@@ -5,6 +5,8 @@ import sys
 
 import click
 
+from .batch import ORDERS
+from .checkpoint import STAGES
 from .config import (
     DEFAULT_MODE,
     NOTES_DIR,
@@ -13,6 +15,7 @@ from .config import (
     ensure_dirs,
     load_config,
 )
+from .jobs import STATUSES as JOB_STATUSES
 
 
 @click.group()
@@ -34,7 +37,12 @@ def cli():
     default=None,
     help="Processing mode hint",
 )
-def record(device, screen, mode):
+@click.option(
+    "--live/--no-live",
+    default=None,
+    help="Transcribe while recording (default: [recording] live); follow with 'memoant live'",
+)
+def record(device, screen, mode, live):
     """Start recording audio or screen."""
     ensure_dirs()
 
@@ -52,7 +60,7 @@ def record(device, screen, mode):
 
         effective_mode = mode or "auto"
         try:
-            state = start(device=device, mode=effective_mode)
+            state = start(device=device, mode=effective_mode, live=live)
         except RuntimeError as e:
             click.echo(f"Error: {e}", err=True)
             sys.exit(1)
@@ -63,17 +71,20 @@ def record(device, screen, mode):
     click.echo(f"  Device: {state['device']}")
     click.echo(f"  Mode: {state['mode']}")
     click.echo(f"  File: {state['path']}")
+    if state.get("live_dir"):
+        click.echo("  Live transcript: run 'memoant live' to follow it")
     click.echo("\nRun 'memoant stop' to finish and process.")
 
 
 @cli.command()
 @click.option("--no-process", is_flag=True, help="Stop without processing")
-def stop(no_process):
+@click.option("--background", is_flag=True, help="Queue for the watcher instead of processing now")
+def stop(no_process, background):
     """Stop recording and process the audio."""
     from .recorder import stop as recorder_stop
 
     try:
-        result = recorder_stop(process=not no_process)
+        result = recorder_stop(process=not no_process, background=background)
     except RuntimeError as e:
         click.echo(f"Error: {e}", err=True)
         sys.exit(1)
@@ -101,6 +112,8 @@ def stop(no_process):
         click.echo(f"Processing time: {pipeline['processing_time']:.1f}s")
     elif no_process:
         click.echo("\nSkipped processing (--no-process).")
+    elif pipeline and pipeline.get("status") == "queued":
+        click.echo(f"\nQueued as job {pipeline['job_id']} (see 'memoant queue').")
     elif pipeline:
         click.echo(f"\nPipeline status: {pipeline.get('status', 'unknown')}")
 
@@ -119,10 +132,30 @@ def status():
         click.echo(f"  Mode: {state['mode']}")
         click.echo(f"  Device: {state['device']}")
         click.echo(f"  File: {state['path']}")
+        if state.get("live_dir"):
+            click.echo("  Live transcript: on ('memoant live')")
     else:
         click.echo("Idle (no recording in progress)")
 
 
+@cli.command()
+@click.option("--no-follow", is_flag=True, help="Print the transcript so far and exit")
+def live(no_follow):
+    """Show the live transcript of the current recording."""
+    from .live import follow
+    from .recorder import get_status
+
+    state = get_status()
+    if not state or not state.get("live_dir"):
+        click.echo("No live recording in progress (start one with 'memoant record --live').", err=True)
+        sys.exit(1)
+
+    for piece in follow(state["live_dir"], keep_following=not no_follow):
+        mins = int(piece["start"] // 60)
+        secs = int(piece["start"] % 60)
+        click.echo(f"[{mins:02d}:{secs:02d}] {piece['text']}")
+
+
 # ── Processing Commands ──────────────────────────────────────────────
 
 
@@ -138,18 +171,54 @@ def status():
     default=None,
     help="Processing mode hint",
 )
-def process(file, db, notes, skip_diarization, force, mode):
-    """Process an audio file through the full pipeline."""
-    from .pipeline import process_file
+@click.option(
+    "--from-stage",
+    type=click.Choice(STAGES),
+    default=None,
+    help="Rerun from this stage, reusing upstream checkpoints (implies --force)",
+)
+@click.option(
+    "--compact/--no-compact",
+    default=None,
+    help="Transcribe only the detected speech (default: compact_speech)",
+)
+@click.option(
+    "--probe/--no-probe",
+    default=None,
+    help="Sample the file first and skip it if silent (default: [probe] enabled)",
+)
+@click.option(
+    "--preview/--no-preview",
+    default=None,
+    help="Write a preview note right after transcription (default: preview_notes)",
+)
+@click.option(
+    "--no-llm-cache",
+    is_flag=True,
+    help="Always call Ollama instead of reusing a cached result for the same transcript",
+)
+def process(
+    file, db, notes, skip_diarization, force, mode, from_stage, compact, probe, preview, no_llm_cache
+):
+    """Process an audio file through the full pipeline.
+
+    Runs on the model server if one is running (see `memoant server`).
+    """
+    from .server import run_process_file
 
     ensure_dirs()
-    result = process_file(
+    result = run_process_file(
         file,
         db_path=db or ORACLE_DB,
         notes_dir=notes or NOTES_DIR,
         skip_diarization=skip_diarization,
         force=force,
         mode=mode or DEFAULT_MODE,
+        from_stage=from_stage,
+        compact=compact,
+        probe=probe,
+        preview=preview,
+        llm_cache=False if no_llm_cache else None,
     )
 
     if result["status"] == "processed":
@@ -158,10 +227,62 @@ def process(file, db, notes, skip_diarization, force, mode):
         click.echo(f"Speakers: {result['speaker_count']} | Sphere: {result.get('sphere', 'N/A')}")
         click.echo(f"Note: {result.get('note_path', 'N/A')}")
         click.echo(f"Processing time: {result['processing_time']:.1f}s")
+        if result.get("first_note_seconds") is not None:
+            click.echo(f"First note after: {result['first_note_seconds']:.1f}s")
+        if result.get("compute_saved") is not None:
+            click.echo(f"Silence skipped: {result['compute_saved']:.0%} of the audio")
     elif result["status"] == "skipped":
         click.echo("File already processed. Use --force to reprocess.")
     elif result["status"] == "no_speech":
         click.echo("No speech detected in file.")
+        if result.get("probe"):
+            click.echo(f"Probe: {result['probe']['reason']} (use --no-probe to process anyway)")
+
+
+@cli.command()
+@click.argument("target")
+@click.option("--workers", type=int, default=None, help="Worker processes (default: batch_workers)")
+@click.option("--db", default=None, help="Path to oracle.db")
+@click.option("--notes", default=None, help="Notes output directory")
+@click.option("--skip-diarization", is_flag=True, help="Skip speaker diarization")
+@click.option("--force", is_flag=True, help="Reprocess files already in DB")
+@click.option(
+    "--mode",
+    type=click.Choice(["auto", "meeting", "dictation"]),
+    default=None,
+    help="Processing mode hint",
+)
+@click.option("--order", type=click.Choice(ORDERS), default="longest", help="Processing order")
+@click.option("--summary", default=None, help="Write the JSON summary here")
+@click.option("--dry-run", is_flag=True, help="Hash and plan only, don't process")
+@click.option(
+    "--pipelined", is_flag=True,
+    help="Overlap stages across files in one process instead of a worker pool",
+)
+def batch(target, workers, db, notes, skip_diarization, force, mode, order, summary, dry_run, pipelined):
+    """Process every audio file in a directory or glob (bulk backfill)."""
+    from . import config as cfg
+    from .batch import run_batch
+
+    result = run_batch(
+        target,
+        db_path=db or ORACLE_DB,
+        notes_dir=notes or NOTES_DIR,
+        workers=workers or cfg.BATCH_WORKERS,
+        skip_diarization=skip_diarization,
+        force=force,
+        mode=mode or DEFAULT_MODE,
+        order=order,
+        summary_path=summary,
+        dry_run=dry_run,
+        pipelined=pipelined,
+    )
+
+    click.echo(f"\nProcessed: {result['status_counts']}")
+    click.echo(f"Wall time: {result['wall_seconds']:.0f}s")
+    if result["audio_hours_per_wall_hour"]:
+        click.echo(f"Throughput: {result['audio_hours_per_wall_hour']:.2f} audio-hours per wall-hour")
+    click.echo(f"Summary: {result['summary_path']}")
 
 
 @cli.command()
@@ -170,8 +291,10 @@ def process(file, db, notes, skip_diarization, force, mode):
 @click.option("--skip-diarization", is_flag=True, help="Skip speaker diarization")
 @click.option("--no-voice-memos", is_flag=True, help="Don't watch Voice Memos folder")
 @click.option("--no-inbox", is_flag=True, help="Don't watch inbox folder")
-def watch(db, notes, skip_diarization, no_voice_memos, no_inbox):
+@click.option("--workers", type=int, default=None, help="Queue consumer threads")
+def watch(db, notes, skip_diarization, no_voice_memos, no_inbox, workers):
     """Start watching folders for new audio files."""
+    from . import config as cfg
     from .watcher import start_watcher
 
     start_watcher(
@@ -180,9 +303,243 @@ def watch(db, notes, skip_diarization, no_voice_memos, no_inbox):
         skip_diarization=skip_diarization,
         watch_voice_memos=not no_voice_memos and WATCH_VOICE_MEMOS,
         watch_inbox=not no_inbox,
+        workers=workers or cfg.QUEUE_WORKERS,
     )
 
 
+# ── Job Queue ────────────────────────────────────────────────────────
+
+
+def _fmt_time(ts):
+    from datetime import datetime
+
+    return datetime.fromtimestamp(ts).strftime("%m-%d %H:%M") if ts else "-"
+
+
+def _fmt_est(seconds):
+    if seconds is None:
+        return "?"
+    return f"{seconds / 60:.1f}m" if seconds >= 60 else f"{seconds:.0f}s"
+
+
+@cli.group(invoke_without_command=True)
+@click.pass_context
+def queue(ctx):
+    """Show and manage the processing job queue."""
+    if ctx.invoked_subcommand is None:
+        ctx.invoke(queue_list)
+
+
+@queue.command("list")
+@click.option("--status", type=click.Choice(JOB_STATUSES), default=None, help="Only this status")
+@click.option("--limit", type=int, default=30, help="Max jobs to show")
+def queue_list(status, limit):
+    """List recent jobs."""
+    from . import jobs
+
+    db = jobs.open_queue()
+    counts = jobs.counts(db)
+    rows = jobs.list_jobs(db, status=status, limit=limit)
+    db.close()
+
+    click.echo("  ".join(f"{s}: {counts.get(s, 0)}" for s in JOB_STATUSES))
+    if not rows:
+        click.echo("(no jobs)")
+        return
+    for job in rows:
+        click.echo(
+            f"  #{job['id']:<5} {job['status']:<8} {job['attempts']}/{job['max_attempts']}  "
+            f"{_fmt_time(job['enqueued_at'])}  {job['source']:<8} "
+            f"est {_fmt_est(job['est_seconds']):>6}  {os.path.basename(job['path'])}"
+        )
+        if job["last_error"] and job["status"] != "done":
+            click.echo(f"         {job['last_error'][:100]}")
+
+
+@queue.command("requeue")
+@click.argument("job_id", type=int, required=False)
+@click.option("--all-dead", is_flag=True, help="Requeue every dead-lettered job")
+@click.option(
+    "--probe-rejected", is_flag=True,
+    help="Queue every file the probe rejected again, without the probe",
+)
+def queue_requeue(job_id, all_dead, probe_rejected):
+    """Reset a job (or all dead jobs) to pending."""
+    from . import config as cfg
+    from . import db as oracle
+    from . import jobs
+
+    if probe_rejected:
+        database = oracle.open_db(cfg.ORACLE_DB)
+        oracle.ensure_schema(database)
+        paths = oracle.probe_rejected_sources(database)
+        database.close()
+        queue = jobs.open_queue()
+        queued = 0
+        for path in paths:
+            if not os.path.isfile(path):
+                click.echo(f"  Missing: {path}")
+                continue
+            jobs.enqueue(queue, path, "requeue", {"force": True, "probe": False})
+            queued += 1
+        queue.close()
+        click.echo(f"Queued {queued} probe-rejected file(s).")
+        return
+
+    if job_id is None and not all_dead:
+        click.echo("Error: give a JOB_ID, --all-dead or --probe-rejected", err=True)
+        sys.exit(1)
+    db = jobs.open_queue()
+    n, skipped = jobs.requeue(db, job_id=job_id)
+    db.close()
+    click.echo(f"Requeued {n} job(s).")
+    if skipped:
+        click.echo(f"Skipped {skipped} job(s) whose file already has a pending or running job.")
+
+
+@queue.command("work")
+@click.option("--workers", type=int, default=None, help="Consumer threads")
+def queue_work(workers):
+    """Process queued jobs in the foreground (without watching folders)."""
+    import time
+
+    from . import config as cfg
+    from . import jobs
+
+    ensure_dirs()
+    stop_event = jobs.start_consumers(workers or cfg.QUEUE_WORKERS)
+    click.echo("Processing queue, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stop_event.set()
+
+
+@cli.group("llm-cache", invoke_without_command=True)
+@click.pass_context
+def llm_cache(ctx):
+    """Show and manage the LLM result cache."""
+    if ctx.invoked_subcommand is None:
+        ctx.invoke(llm_cache_stats)
+
+
+@llm_cache.command("stats")
+def llm_cache_stats():
+    """Show cache size and hit/miss counts."""
+    from . import config as cfg
+    from . import llm_cache as cache
+
+    s = cache.stats()
+    lookups = s["hits"] + s["misses"]
+    rate = f"{s['hits'] / lookups:.0%}" if lookups else "-"
+    click.echo(
+        f"Entries: {s['entries']} ({s['bytes'] / 1024 / 1024:.1f} / {cfg.LLM_CACHE_MAX_MB} MB)"
+    )
+    click.echo(f"Hits: {s['hits']} | Misses: {s['misses']} | Hit rate: {rate}")
+
+
+@llm_cache.command("clear")
+def llm_cache_clear():
+    """Remove every cached result."""
+    from . import llm_cache as cache
+
+    n = cache.clear()
+    click.echo(f"Removed {n} cached result(s).")
+
+
+@cli.command("train-classifier")
+@click.option("--db", default=None, help="Path to oracle.db")
+@click.option(
+    "--min-confidence", type=float, default=None,
+    help="Confidence needed to fill a field (default: [classifier] min_confidence)",
+)
+def train_classifier(db, min_confidence):
+    """Train the local sphere/type/sentiment/tags classifier from the DB."""
+    from . import classifier
+    from . import config as cfg
+
+    threshold = min_confidence if min_confidence is not None else cfg.CLASSIFIER_MIN_CONFIDENCE
+    click.echo("Training on os_audio_logs...")
+    report = classifier.train(db_path=db or ORACLE_DB, threshold=threshold)
+    for field, r in report.items():
+        if "skipped" in r:
+            click.echo(f"  {field:18} {r['examples']:6} examples  skipped: {r['skipped']}")
+            continue
+        confident = f"{r['confident_accuracy']:.0%}" if r["confident_accuracy"] is not None else "-"
+        click.echo(
+            f"  {field:18} {r['examples']:6} examples  {r['classes']:3} classes  "
+            f"holdout accuracy {r['accuracy']:.0%}  "
+            f"filled {r['coverage']:.0%} at >= {threshold:.2f} ({confident} correct)"
+        )
+    click.echo(f"Saved: {cfg.CLASSIFIER_PATH}")
+
+
+# ── Model Server ─────────────────────────────────────────────────────
+
+
+@cli.group()
+def server():
+    """Long-lived model server that keeps models warm."""
+
+
+@server.command("start")
+@click.option("--idle-timeout", type=float, default=None, help="Unload models after N idle seconds")
+@click.option("--no-warm", is_flag=True, help="Load models on first job instead of at startup")
+def server_start(idle_timeout, no_warm):
+    """Run the model server in the foreground."""
+    from . import config as cfg
+    from .server import serve
+
+    ensure_dirs()
+    try:
+        serve(
+            socket_path=cfg.MODEL_SERVER_SOCKET,
+            idle_timeout=idle_timeout if idle_timeout is not None else cfg.MODEL_IDLE_SECONDS,
+            warm=not no_warm,
+        )
+    except RuntimeError as e:
+        click.echo(f"Error: {e}", err=True)
+        sys.exit(1)
+
+
+@server.command("status")
+def server_status():
+    """Show model server health and loaded models."""
+    from . import config as cfg
+    from .server import request
+
+    try:
+        status = request({"cmd": "status"}, cfg.MODEL_SERVER_SOCKET, timeout=5)["status"]
+    except (OSError, RuntimeError) as e:
+        click.echo(f"Model server not running ({e})")
+        sys.exit(1)
+
+    click.echo(f"Model server running (PID: {status['pid']})")
+    click.echo(f"  Uptime: {status['uptime_seconds'] / 60:.1f}m")
+    click.echo(f"  Models: {', '.join(status['models_loaded']) or '(none loaded)'}")
+    click.echo(f"  Idle: {status['idle_seconds']:.0f}s (unload after {status['idle_timeout']:.0f}s)")
+    click.echo(f"  Jobs: {status['jobs_completed']} done, {status['jobs_failed']} failed")
+    for name, slot in status["slots"].items():
+        click.echo(f"  {name} slots: {slot['busy']}/{slot['slots']} busy, {slot['waiting']} waiting")
+    for job in status["current_jobs"]:
+        click.echo(f"  Current: {job['path']}")
+
+
+@server.command("stop")
+def server_stop():
+    """Ask the model server to shut down."""
+    from . import config as cfg
+    from .server import request
+
+    try:
+        request({"cmd": "shutdown"}, cfg.MODEL_SERVER_SOCKET, timeout=5)
+    except (OSError, RuntimeError) as e:
+        click.echo(f"Model server not running ({e})")
+        sys.exit(1)
+    click.echo("Model server stopping.")
+
+
 # ── Info Commands ────────────────────────────────────────────────────
 
 
@@ -218,12 +575,39 @@ def show_config():
     click.echo(f"  audio_device = {cfg.AUDIO_DEVICE}")
     click.echo(f"  sample_rate = {cfg.SAMPLE_RATE}")
     click.echo(f"  channels = {cfg.CHANNELS}")
+    click.echo(f"  sidecar = {cfg.RECORD_SIDECAR}")
+    click.echo(f"  live = {cfg.LIVE_TRANSCRIPTION}")
+    click.echo(f"  live_segment_seconds = {cfg.LIVE_SEGMENT_SECONDS}")
     click.echo()
     click.echo("[processing]")
     click.echo(f"  whisper_model = {cfg.WHISPER_MODEL}")
     click.echo(f"  ollama_model = {cfg.OLLAMA_MODEL}")
     click.echo(f"  ollama_url = {cfg.OLLAMA_URL}")
+    click.echo(f"  ollama_urls = {cfg.OLLAMA_URLS}")
+    click.echo(f"  ollama_keep_alive = {cfg.OLLAMA_KEEP_ALIVE}")
+    click.echo(f"  ollama_timeout = {cfg.OLLAMA_TIMEOUT_SECONDS}")
+    click.echo(f"  ollama_backoff = {cfg.OLLAMA_BACKOFF_SECONDS}")
+    click.echo(f"  ollama_format = {cfg.OLLAMA_FORMAT}")
+    click.echo(f"  llm_window_chars = {cfg.LLM_WINDOW_CHARS}")
+    click.echo(f"  llm_parallel = {cfg.LLM_PARALLEL}")
+    click.echo(f"  preview_notes = {cfg.PREVIEW_NOTES}")
+    click.echo(f"  preview_model = {cfg.PREVIEW_MODEL or '(ollama_model)'}")
+    click.echo(f"  preview_chars = {cfg.PREVIEW_CHARS}")
+    click.echo(f"  compress_transcript = {cfg.COMPRESS_TRANSCRIPT}")
+    click.echo(f"  compress_drop_low_info = {cfg.COMPRESS_DROP_LOW_INFO}")
+    click.echo(f"  llm_strategy = {cfg.LLM_STRATEGY}")
+    click.echo(f"  llm_cache = {cfg.LLM_CACHE_ENABLED}")
+    click.echo(f"  llm_cache_max_mb = {cfg.LLM_CACHE_MAX_MB}")
+    click.echo(f"  llm_cache_max_age_days = {cfg.LLM_CACHE_MAX_AGE_DAYS}")
     click.echo(f"  default_mode = {cfg.DEFAULT_MODE}")
+    click.echo(f"  pcm_dir = {cfg.PCM_DIR}")
+    click.echo(f"  transcribe_workers = {cfg.TRANSCRIBE_WORKERS}")
+    click.echo(f"  batch_workers = {cfg.BATCH_WORKERS}")
+    click.echo(f"  hash_algorithm = {cfg.HASH_ALGORITHM}")
+    click.echo(f"  checkpoint_max_mb = {cfg.CHECKPOINT_MAX_MB}")
+    click.echo(f"  checkpoint_max_age_days = {cfg.CHECKPOINT_MAX_AGE_DAYS}")
+    click.echo(f"  compact_speech = {cfg.COMPACT_SPEECH}")
+    click.echo(f"  compact_padding = {cfg.COMPACT_PADDING_SECONDS}")
     click.echo()
     click.echo("[output]")
     click.echo(f"  oracle_db = {cfg.ORACLE_DB}")
@@ -231,11 +615,39 @@ def show_config():
     click.echo(f"  recordings_dir = {cfg.RECORDINGS_DIR}")
     click.echo(f"  archive_dir = {cfg.ARCHIVE_DIR}")
     click.echo()
+    click.echo("[classifier]")
+    click.echo(f"  enabled = {cfg.CLASSIFIER_ENABLED}")
+    click.echo(f"  min_confidence = {cfg.CLASSIFIER_MIN_CONFIDENCE}")
+    click.echo(f"  path = {cfg.CLASSIFIER_PATH}")
+    click.echo()
+    click.echo("[probe]")
+    click.echo(f"  enabled = {cfg.PROBE_ENABLED}")
+    click.echo(f"  windows = {cfg.PROBE_WINDOWS}")
+    click.echo(f"  window_seconds = {cfg.PROBE_WINDOW_SECONDS}")
+    click.echo(f"  min_file_seconds = {cfg.PROBE_MIN_FILE_SECONDS}")
+    click.echo(f"  min_speech_seconds = {cfg.PROBE_MIN_SPEECH_SECONDS}")
+    click.echo(f"  sparse_penalty_seconds = {cfg.PROBE_SPARSE_PENALTY_SECONDS}")
+    click.echo(f"  reject_windows = {cfg.PROBE_REJECT_WINDOWS}")
+    click.echo()
     click.echo("[watch]")
     click.echo(f"  voice_memos = {cfg.WATCH_VOICE_MEMOS}")
     click.echo(f"  inbox_dir = {cfg.INBOX_DIR}")
+    click.echo(f"  catchup_interval = {cfg.CATCHUP_INTERVAL_SECONDS}")
     click.echo(f"  voice_memos_dir = {cfg.VOICE_MEMOS_DIR}")
     click.echo()
+    click.echo("[queue]")
+    click.echo(f"  db = {cfg.STATE_DB}")
+    click.echo(f"  workers = {cfg.QUEUE_WORKERS}")
+    click.echo(f"  max_attempts = {cfg.JOB_MAX_ATTEMPTS}")
+    click.echo(f"  backoff_seconds = {cfg.JOB_BACKOFF_SECONDS}")
+    click.echo(f"  aging_rate = {cfg.QUEUE_AGING_RATE}")
+    click.echo(f"  accelerator_slots = {cfg.ACCELERATOR_SLOTS}")
+    click.echo(f"  io_slots = {cfg.IO_SLOTS}")
+    click.echo()
+    click.echo("[server]")
+    click.echo(f"  socket = {cfg.MODEL_SERVER_SOCKET}")
+    click.echo(f"  idle_timeout = {cfg.MODEL_IDLE_SECONDS}")
+    click.echo()
     click.echo("[screen]")
     click.echo(f"  swift_dir = {cfg.SWIFT_DIR}")
     click.echo(f"  window_picker = {cfg.WINDOW_PICKER_BIN} ({'found' if os.path.isfile(cfg.WINDOW_PICKER_BIN) else 'NOT FOUND'})")
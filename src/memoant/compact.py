@@ -0,0 +1,122 @@
+"""Speech-only compaction: drop the silence between VAD regions.
+
+Ambient recordings and meetings with long pauses can be mostly silence,
+and Whisper and pyannote spend compute on every second of it. With
+compaction on, the padded speech regions are copied back to back into a
+shorter buffer, that buffer is transcribed and diarized, and every
+timestamp is mapped back to the original recording through the region
+table:
+
+    [{"start": original start, "end": original end, "offset": compact start}, ...]
+"""
+
+import bisect
+
+import numpy as np
+
+from .config import AUDIO_SAMPLE_RATE, COMPACT_PADDING_SECONDS
+
+
+def plan_regions(speech_segments: list[dict], duration: float,
+                 padding: float = COMPACT_PADDING_SECONDS) -> list[dict]:
+    """Pad speech segments, merge the ones that touch, and lay them out
+    end to end. Gaps shorter than 2 * padding disappear in the merge."""
+    regions = []
+    for seg in speech_segments:
+        start = max(0.0, seg["start"] - padding)
+        end = min(duration, seg["end"] + padding)
+        if regions and start <= regions[-1]["end"]:
+            regions[-1]["end"] = max(regions[-1]["end"], end)
+        else:
+            regions.append({"start": start, "end": end})
+
+    offset = 0.0
+    for region in regions:
+        region["offset"] = offset
+        offset += region["end"] - region["start"]
+    return regions
+
+
+def compact_duration(regions: list[dict]) -> float:
+    if not regions:
+        return 0.0
+    return regions[-1]["offset"] + regions[-1]["end"] - regions[-1]["start"]
+
+
+def junctions(regions: list[dict]) -> list[dict]:
+    """Zero-length "silence gaps" at region joins, for chunker.plan_chunks."""
+    return [{"start": r["offset"], "end": r["offset"]} for r in regions[1:]]
+
+
+def compact_samples(samples: np.ndarray, regions: list[dict], out_path: str) -> np.ndarray:
+    """Copy the regions of a 16kHz buffer back to back into a memory-mapped
+    int16 file at out_path."""
+    bounds = [
+        (int(r["start"] * AUDIO_SAMPLE_RATE), int(r["end"] * AUDIO_SAMPLE_RATE)) for r in regions
+    ]
+    total = sum(max(0, min(b, len(samples)) - a) for a, b in bounds)
+    out = np.memmap(out_path, dtype=np.int16, mode="w+", shape=(max(total, 1),))
+    pos = 0
+    for a, b in bounds:
+        piece = samples[a:b]
+        out[pos:pos + len(piece)] = piece
+        pos += len(piece)
+    out.flush()
+    return out[:total]
+
+
+def to_original(times, regions: list[dict], end: bool = False) -> np.ndarray:
+    """Map compact-timeline times back to the original recording.
+
+    A time exactly on a join belongs to the following region, or to the
+    preceding one when end=True (so an interval ending at a join ends
+    where that region's speech ended).
+    """
+    times = np.asarray(times, dtype=np.float64)
+    offsets = np.array([r["offset"] for r in regions])
+    starts = np.array([r["start"] for r in regions])
+    idx = np.searchsorted(offsets, times, side="left" if end else "right") - 1
+    idx = np.clip(idx, 0, len(regions) - 1)
+    return starts[idx] + (times - offsets[idx])
+
+
+def map_words(words, regions: list[dict]):
+    """WordTable with timestamps moved back to the original timeline."""
+    from .words import WordTable
+
+    return WordTable(
+        words.text, words.offsets,
+        to_original(words.starts, regions), to_original(words.ends, regions, end=True),
+        words.speakers, words.speaker_names,
+    )
+
+
+def map_points(items: list[dict], regions: list[dict]) -> list[dict]:
+    """Map the start/end of each item (e.g. Whisper segments) in place."""
+    if items:
+        starts = to_original([i["start"] for i in items], regions).tolist()
+        ends = to_original([i["end"] for i in items], regions, end=True).tolist()
+        for item, start, end in zip(items, starts, ends):
+            item["start"], item["end"] = start, end
+    return items
+
+
+def map_intervals(segments: list[dict], regions: list[dict]) -> list[dict]:
+    """Map diarization turns back, splitting any turn that spans a join so
+    no turn covers the silence that was cut out."""
+    offsets = [r["offset"] for r in regions]
+    mapped = []
+    for seg in segments:
+        i = max(0, bisect.bisect_right(offsets, seg["start"]) - 1)
+        while i < len(regions) and regions[i]["offset"] < seg["end"]:
+            r = regions[i]
+            lo = max(seg["start"], r["offset"])
+            hi = min(seg["end"], r["offset"] + r["end"] - r["start"])
+            if hi > lo:
+                mapped.append({
+                    **seg,
+                    "start": r["start"] + lo - r["offset"],
+                    "end": r["start"] + hi - r["offset"],
+                })
+            i += 1
+    return mapped
@@ -0,0 +1,112 @@
+"""Shrink the speaker transcript before it goes to the LLM.
+
+Prompt evaluation time grows with the transcript, and much of a raw
+transcript is overhead: "SPEAKER_00: " on every turn, fillers, false
+starts ("we should, we should go"), Whisper repetition loops and
+"yeah" / "okay" backchannel turns. compress_transcript():
+
+    1. strips fillers (um, uh, ...) and collapses immediately repeated
+       n-grams of 2 to MAX_REPEAT_WORDS words; single words only when
+       said three or more times in a row ("the the the"), since doubles
+       are often meant ("very, very good", "bye bye")
+    2. optionally drops turns made only of backchannel words
+    3. merges adjacent turns by the same speaker (including ones that
+       became adjacent in step 2)
+    4. replaces pyannote labels (SPEAKER_00, UNKNOWN) with S1, S2, ...
+
+Token counts are estimated at ~4 characters per token, which is close
+enough to report savings and to size map-reduce windows.
+"""
+
+import re
+
+from .config import COMPRESS_DROP_LOW_INFO
+
+MAX_REPEAT_WORDS = 8
+MIN_WORD_RUN = 3  # a single word repeated this often in a row is a stutter
+FILLERS = {"um", "umm", "uh", "uhh", "uhm", "erm", "er", "ah", "hmm", "hm", "mm", "mhm", "mmm"}
+BACKCHANNEL = {
+    "yeah", "yep", "ok", "okay", "right", "sure", "mhm", "uh-huh", "huh",
+    "oh", "ah", "wow", "cool", "nice", "great", "alright", "true", "exactly",
+}
+
+_TURN_RE = re.compile(r"^([^:\n]{1,40}): (.*)$")
+_LABEL_RE = re.compile(r"^(SPEAKER_\d+|UNKNOWN)$")
+_STRIP = ".,!?;:\"'()-…"
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + 3) // 4
+
+
+def _key(word: str) -> str:
+    return word.strip(_STRIP).lower()
+
+
+def clean_text(text: str) -> str:
+    """Drop fillers and collapse immediately repeated word n-grams (and
+    runs of one word said MIN_WORD_RUN or more times)."""
+    words = [w for w in text.split() if _key(w) not in FILLERS]
+    keys = [_key(w) for w in words]
+    for n in range(MAX_REPEAT_WORDS, 1, -1):
+        i = 0
+        while i + 2 * n <= len(words):
+            if keys[i:i + n] == keys[i + n:i + 2 * n] and any(keys[i:i + n]):
+                # Keep the second copy: it carries the sentence's punctuation
+                del words[i:i + n], keys[i:i + n]
+            else:
+                i += 1
+    i = 0
+    while i < len(words):
+        run = 1
+        while i + run < len(words) and keys[i + run] == keys[i] and keys[i]:
+            run += 1
+        if run >= MIN_WORD_RUN:
+            # Keep the last copy: it carries the sentence's punctuation
+            del words[i:i + run - 1], keys[i:i + run - 1]
+        i += 1
+    return " ".join(words)
+
+
+def _low_info(text: str) -> bool:
+    keys = [_key(w) for w in text.split()]
+    return all(k in BACKCHANNEL or not k for k in keys)
+
+
+def compress_transcript(
+    transcript: str, drop_low_info: bool = COMPRESS_DROP_LOW_INFO
+) -> tuple[str, dict]:
+    """Compressed transcript and {"tokens_before", "tokens_after", "turns_dropped"}."""
+    turns = []  # [speaker or None, text]
+    for line in transcript.splitlines():
+        m = _TURN_RE.match(line)
+        speaker, text = (m.group(1), m.group(2)) if m else (None, line)
+        turns.append([speaker, clean_text(text)])
+
+    kept = []
+    dropped = 0
+    for speaker, text in turns:
+        if not text or (drop_low_info and len(turns) > 1 and _low_info(text)):
+            dropped += 1
+            continue
+        if kept and kept[-1][0] == speaker:
+            kept[-1][1] += " " + text
+        else:
+            kept.append([speaker, text])
+
+    aliases = {}
+    lines = []
+    for speaker, text in kept:
+        if speaker is None:
+            lines.append(text)
+            continue
+        if _LABEL_RE.match(speaker):
+            speaker = aliases.setdefault(speaker, f"S{len(aliases) + 1}")
+        lines.append(f"{speaker}: {text}")
+
+    compressed = "\n".join(lines)
+    return compressed, {
+        "tokens_before": estimate_tokens(transcript),
+        "tokens_after": estimate_tokens(compressed),
+        "turns_dropped": dropped,
+    }
@@ -18,12 +18,38 @@ STATE_DIR = os.path.join(os.path.expanduser("~"), ".memoant", "state")
 AUDIO_DEVICE = "default"
 SAMPLE_RATE = 48000
 CHANNELS = 2
+RECORD_SIDECAR = True  # also write 16 kHz mono PCM so processing skips the decode
+LIVE_TRANSCRIPTION = False  # transcribe while recording (memoant record --live)
+LIVE_SEGMENT_SECONDS = 30  # length of the 16 kHz segment files the live worker reads
 
 # Processing
 WHISPER_MODEL = "mlx-community/whisper-large-v3-turbo"
 OLLAMA_MODEL = "llama3.1:8b"
 OLLAMA_URL = "http://127.0.0.1:11434"
+OLLAMA_URLS = []  # several Ollama servers (overrides ollama_url); least-loaded gets each request
+OLLAMA_KEEP_ALIVE = "30m"  # how long Ollama keeps the model loaded after a request
+OLLAMA_TIMEOUT_SECONDS = 120  # per socket read while streaming
+OLLAMA_BACKOFF_SECONDS = 2  # first backoff for a failing endpoint, doubled per failure
+OLLAMA_FORMAT = "schema"  # structured output: schema | json | none
 DEFAULT_MODE = "auto"  # auto | meeting | dictation
+LLM_WINDOW_CHARS = 12000  # longer transcripts are structured map-reduce style
+LLM_PARALLEL = 2  # concurrent Ollama requests (match OLLAMA_NUM_PARALLEL)
+PREVIEW_NOTES = True  # write a transcript-only note right after transcription
+# Model for the preview note's quick summary; "" = ollama_model. A different
+# model stays resident in Ollama next to it (or is swapped in per file).
+PREVIEW_MODEL = ""
+PREVIEW_CHARS = 6000  # transcript characters the quick summary sees
+COMPRESS_TRANSCRIPT = True  # strip fillers/repeats and shorten speaker labels for the LLM
+COMPRESS_DROP_LOW_INFO = False  # also drop "yeah" / "okay" backchannel turns
+LLM_STRATEGY = "single"  # single prompt, or "fields": smaller per-field prompts in parallel
+LLM_CACHE_ENABLED = True  # reuse structuring results for identical transcripts
+LLM_CACHE_MAX_MB = 64
+LLM_CACHE_MAX_AGE_DAYS = 90  # entries unused this long are evicted
+
+# Local classifier for sphere / conversation_type / sentiment / tags
+CLASSIFIER_ENABLED = True  # used once `memoant train-classifier` has been run
+CLASSIFIER_MIN_CONFIDENCE = 0.85  # below this the LLM decides the field
+CLASSIFIER_PATH = os.path.join(os.path.expanduser("~"), ".memoant", "classifier.npz")
 
 # Output
 ORACLE_DB = os.path.join(os.path.expanduser("~"), ".oracle", "oracle.db")
@@ -36,6 +62,7 @@ ARCHIVE_DIR = os.path.join(os.path.expanduser("~"), ".memoant", "archive")
 # Watch
 WATCH_VOICE_MEMOS = True
 INBOX_DIR = os.path.join(os.path.expanduser("~"), ".memoant", "inbox")
+CATCHUP_INTERVAL_SECONDS = 600  # rescan watched folders for missed files (0 = startup only)
 
 # Voice Memos (iCloud sync path)
 VOICE_MEMOS_DIR = os.path.join(
@@ -50,13 +77,60 @@ VOICE_MEMOS_DIR = os.path.join(
 AUDIO_SAMPLE_RATE = 16000  # whisper input rate
 AUDIO_CHANNELS = 1
 MAX_CHUNK_SECONDS = 1800
+MIN_PARALLEL_CHUNK_SECONDS = 300  # don't split below this just to fill workers
+CHUNK_OVERLAP_SECONDS = 2.0  # audio shared by neighbouring chunks
+# Chunks transcribed concurrently. Above 1, chunks go to this many worker
+# processes with one Whisper model each (memory grows with the count).
+TRANSCRIBE_WORKERS = 2
+BATCH_WORKERS = 2  # worker processes for `memoant batch`
+HASH_ALGORITHM = "sha256"  # file_id hash; changing it re-keys dedup for new files
+
+# Pipelined executor: concurrent jobs per stage, and queue depth between stages
+STAGE_CONCURRENCY = {"prepare": 2, "speech": 1, "structure": 2, "write": 1}
+STAGE_QUEUE_SIZE = 2
 MIN_SILENCE_MS = 500
 SILENCE_THRESHOLD = 0.3
+COMPACT_SPEECH = False  # transcribe/diarize only the VAD speech regions
+COMPACT_PADDING_SECONDS = 0.3  # audio kept either side of each speech region
+
+# Probe: sample a few windows before the full decode to reject silent files
+PROBE_ENABLED = True
+PROBE_WINDOWS = 8  # windows spread evenly over the recording
+PROBE_WINDOW_SECONDS = 15
+PROBE_MIN_FILE_SECONDS = 180  # shorter files skip the probe and decode fully
+PROBE_MIN_SPEECH_SECONDS = 0.5  # less speech than this in the windows = "sparse"
+PROBE_SPARSE_PENALTY_SECONDS = 600  # added to a sparse file's scheduling priority
+# Reject without a full decode when at least this many windows were decoded
+# and none had speech (0 = never reject on windows). Tune with
+# scripts/eval_probe.py --reject-windows against the false-rejection rate.
+PROBE_REJECT_WINDOWS = 8
 
 # File handling
 AUDIO_EXTENSIONS = {".m4a", ".wav", ".mp3", ".aac", ".flac", ".ogg", ".wma", ".mp4", ".mov", ".mkv"}
-FILE_SETTLE_SECONDS = 5
+FILE_SETTLE_SECONDS = 5  # max interval between size polls while waiting to settle
+SETTLE_DEBOUNCE_SECONDS = 1.0  # quiet period after the last event before polling
+SETTLE_TIMEOUT_SECONDS = 120  # give up waiting and enqueue anyway
 TMP_DIR = os.path.join(os.path.expanduser("~"), ".memoant", "tmp")
+PCM_DIR = TMP_DIR  # decoded PCM buffers; point at a tmpfs to keep them in RAM
+CHECKPOINT_DIR = os.path.join(os.path.expanduser("~"), ".memoant", "checkpoints")
+CHECKPOINT_MAX_MB = 512
+CHECKPOINT_MAX_AGE_DAYS = 30  # files whose checkpoints were not written this long are pruned
+LIVE_DIR = os.path.join(os.path.expanduser("~"), ".memoant", "live")  # live segments + transcripts
+
+# Job queue (separate from the Oracle DB)
+STATE_DB = os.path.join(os.path.expanduser("~"), ".memoant", "memoant.db")
+QUEUE_WORKERS = 2  # concurrent queue consumers in the watcher
+JOB_MAX_ATTEMPTS = 3  # attempts before a job is dead-lettered
+JOB_BACKOFF_SECONDS = 60  # first retry delay, doubled on each further attempt
+
+# Scheduling: shortest expected job first, with aging so long jobs still run
+QUEUE_AGING_RATE = 0.5  # seconds of expected cost forgiven per second waited
+ACCELERATOR_SLOTS = 1  # concurrent Whisper/pyannote calls across all jobs (one GPU)
+IO_SLOTS = 4  # concurrent decode/VAD, Ollama and DB/note work across all jobs
+
+# Model server (keeps Whisper / VAD / pyannote warm between jobs)
+MODEL_SERVER_SOCKET = os.path.join(STATE_DIR, "modeld.sock")
+MODEL_IDLE_SECONDS = 900  # unload models after this long without a job
 
 # Swift binaries (screen recording)
 _PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -72,10 +146,26 @@ def _expand(path: str) -> str:
 
 def load_config():
     """Load config.toml and override module-level defaults."""
-    global AUDIO_DEVICE, SAMPLE_RATE, CHANNELS
-    global WHISPER_MODEL, OLLAMA_MODEL, OLLAMA_URL, DEFAULT_MODE
+    global AUDIO_DEVICE, SAMPLE_RATE, CHANNELS, RECORD_SIDECAR
+    global LIVE_TRANSCRIPTION, LIVE_SEGMENT_SECONDS
+    global WHISPER_MODEL, OLLAMA_MODEL, OLLAMA_URL, DEFAULT_MODE, LLM_WINDOW_CHARS, LLM_PARALLEL
+    global OLLAMA_URLS, OLLAMA_KEEP_ALIVE, OLLAMA_TIMEOUT_SECONDS, OLLAMA_BACKOFF_SECONDS
+    global OLLAMA_FORMAT
+    global PREVIEW_NOTES, PREVIEW_MODEL, PREVIEW_CHARS
+    global COMPRESS_TRANSCRIPT, COMPRESS_DROP_LOW_INFO
+    global LLM_STRATEGY, LLM_CACHE_ENABLED, LLM_CACHE_MAX_MB, LLM_CACHE_MAX_AGE_DAYS
+    global PCM_DIR, TRANSCRIBE_WORKERS, BATCH_WORKERS, HASH_ALGORITHM
+    global CHECKPOINT_MAX_MB, CHECKPOINT_MAX_AGE_DAYS
+    global COMPACT_SPEECH, COMPACT_PADDING_SECONDS
+    global PROBE_ENABLED, PROBE_WINDOWS, PROBE_WINDOW_SECONDS, PROBE_MIN_FILE_SECONDS
+    global PROBE_MIN_SPEECH_SECONDS, PROBE_SPARSE_PENALTY_SECONDS, PROBE_REJECT_WINDOWS
+    global CLASSIFIER_ENABLED, CLASSIFIER_MIN_CONFIDENCE, CLASSIFIER_PATH
     global ORACLE_DB, NOTES_DIR, RECORDINGS_DIR, ARCHIVE_DIR
-    global WATCH_VOICE_MEMOS, INBOX_DIR
+    global WATCH_VOICE_MEMOS, INBOX_DIR, CATCHUP_INTERVAL_SECONDS
+    global MODEL_SERVER_SOCKET, MODEL_IDLE_SECONDS
+    global STAGE_CONCURRENCY, STAGE_QUEUE_SIZE
+    global STATE_DB, QUEUE_WORKERS, JOB_MAX_ATTEMPTS, JOB_BACKOFF_SECONDS
+    global QUEUE_AGING_RATE, ACCELERATOR_SLOTS, IO_SLOTS
 
     if not os.path.isfile(CONFIG_FILE):
         return
@@ -87,12 +177,53 @@ def load_config():
     AUDIO_DEVICE = rec.get("audio_device", AUDIO_DEVICE)
     SAMPLE_RATE = rec.get("sample_rate", SAMPLE_RATE)
     CHANNELS = rec.get("channels", CHANNELS)
+    RECORD_SIDECAR = rec.get("sidecar", RECORD_SIDECAR)
+    LIVE_TRANSCRIPTION = rec.get("live", LIVE_TRANSCRIPTION)
+    LIVE_SEGMENT_SECONDS = rec.get("live_segment_seconds", LIVE_SEGMENT_SECONDS)
 
     proc = cfg.get("processing", {})
     WHISPER_MODEL = proc.get("whisper_model", WHISPER_MODEL)
     OLLAMA_MODEL = proc.get("ollama_model", OLLAMA_MODEL)
     OLLAMA_URL = proc.get("ollama_url", OLLAMA_URL)
+    OLLAMA_URLS = proc.get("ollama_urls", OLLAMA_URLS)
+    OLLAMA_KEEP_ALIVE = proc.get("ollama_keep_alive", OLLAMA_KEEP_ALIVE)
+    OLLAMA_TIMEOUT_SECONDS = proc.get("ollama_timeout", OLLAMA_TIMEOUT_SECONDS)
+    OLLAMA_BACKOFF_SECONDS = proc.get("ollama_backoff", OLLAMA_BACKOFF_SECONDS)
+    OLLAMA_FORMAT = proc.get("ollama_format", OLLAMA_FORMAT)
+    LLM_WINDOW_CHARS = proc.get("llm_window_chars", LLM_WINDOW_CHARS)
+    LLM_PARALLEL = proc.get("llm_parallel", LLM_PARALLEL)
+    PREVIEW_NOTES = proc.get("preview_notes", PREVIEW_NOTES)
+    PREVIEW_MODEL = proc.get("preview_model", PREVIEW_MODEL)
+    PREVIEW_CHARS = proc.get("preview_chars", PREVIEW_CHARS)
+    COMPRESS_TRANSCRIPT = proc.get("compress_transcript", COMPRESS_TRANSCRIPT)
+    COMPRESS_DROP_LOW_INFO = proc.get("compress_drop_low_info", COMPRESS_DROP_LOW_INFO)
+    LLM_STRATEGY = proc.get("llm_strategy", LLM_STRATEGY)
+    LLM_CACHE_ENABLED = proc.get("llm_cache", LLM_CACHE_ENABLED)
+    LLM_CACHE_MAX_MB = proc.get("llm_cache_max_mb", LLM_CACHE_MAX_MB)
+    LLM_CACHE_MAX_AGE_DAYS = proc.get("llm_cache_max_age_days", LLM_CACHE_MAX_AGE_DAYS)
     DEFAULT_MODE = proc.get("default_mode", DEFAULT_MODE)
+    PCM_DIR = _expand(proc.get("pcm_dir", PCM_DIR))
+    TRANSCRIBE_WORKERS = proc.get("transcribe_workers", TRANSCRIBE_WORKERS)
+    BATCH_WORKERS = proc.get("batch_workers", BATCH_WORKERS)
+    HASH_ALGORITHM = proc.get("hash_algorithm", HASH_ALGORITHM)
+    CHECKPOINT_MAX_MB = proc.get("checkpoint_max_mb", CHECKPOINT_MAX_MB)
+    CHECKPOINT_MAX_AGE_DAYS = proc.get("checkpoint_max_age_days", CHECKPOINT_MAX_AGE_DAYS)
+    COMPACT_SPEECH = proc.get("compact_speech", COMPACT_SPEECH)
+    COMPACT_PADDING_SECONDS = proc.get("compact_padding", COMPACT_PADDING_SECONDS)
+
+    probe = cfg.get("probe", {})
+    PROBE_ENABLED = probe.get("enabled", PROBE_ENABLED)
+    PROBE_WINDOWS = probe.get("windows", PROBE_WINDOWS)
+    PROBE_WINDOW_SECONDS = probe.get("window_seconds", PROBE_WINDOW_SECONDS)
+    PROBE_MIN_FILE_SECONDS = probe.get("min_file_seconds", PROBE_MIN_FILE_SECONDS)
+    PROBE_MIN_SPEECH_SECONDS = probe.get("min_speech_seconds", PROBE_MIN_SPEECH_SECONDS)
+    PROBE_SPARSE_PENALTY_SECONDS = probe.get("sparse_penalty_seconds", PROBE_SPARSE_PENALTY_SECONDS)
+    PROBE_REJECT_WINDOWS = probe.get("reject_windows", PROBE_REJECT_WINDOWS)
+
+    clf = cfg.get("classifier", {})
+    CLASSIFIER_ENABLED = clf.get("enabled", CLASSIFIER_ENABLED)
+    CLASSIFIER_MIN_CONFIDENCE = clf.get("min_confidence", CLASSIFIER_MIN_CONFIDENCE)
+    CLASSIFIER_PATH = _expand(clf.get("path", CLASSIFIER_PATH))
 
     out = cfg.get("output", {})
     ORACLE_DB = _expand(out.get("oracle_db", ORACLE_DB))
@@ -103,6 +234,26 @@ def load_config():
     watch = cfg.get("watch", {})
     WATCH_VOICE_MEMOS = watch.get("voice_memos", WATCH_VOICE_MEMOS)
     INBOX_DIR = _expand(watch.get("inbox_dir", INBOX_DIR))
+    CATCHUP_INTERVAL_SECONDS = watch.get("catchup_interval", CATCHUP_INTERVAL_SECONDS)
+
+    q = cfg.get("queue", {})
+    STATE_DB = _expand(q.get("db", STATE_DB))
+    QUEUE_WORKERS = q.get("workers", QUEUE_WORKERS)
+    JOB_MAX_ATTEMPTS = q.get("max_attempts", JOB_MAX_ATTEMPTS)
+    JOB_BACKOFF_SECONDS = q.get("backoff_seconds", JOB_BACKOFF_SECONDS)
+    QUEUE_AGING_RATE = q.get("aging_rate", QUEUE_AGING_RATE)
+    ACCELERATOR_SLOTS = q.get("accelerator_slots", ACCELERATOR_SLOTS)
+    IO_SLOTS = q.get("io_slots", IO_SLOTS)
+
+    stages = cfg.get("pipeline", {})
+    STAGE_QUEUE_SIZE = stages.get("queue_size", STAGE_QUEUE_SIZE)
+    STAGE_CONCURRENCY = {
+        name: stages.get(f"{name}_workers", n) for name, n in STAGE_CONCURRENCY.items()
+    }
+
+    server = cfg.get("server", {})
+    MODEL_SERVER_SOCKET = _expand(server.get("socket", MODEL_SERVER_SOCKET))
+    MODEL_IDLE_SECONDS = server.get("idle_timeout", MODEL_IDLE_SECONDS)
 
 
 def ensure_dirs():
@@ -113,6 +264,9 @@ def ensure_dirs():
         ARCHIVE_DIR,
         INBOX_DIR,
         TMP_DIR,
+        PCM_DIR,
+        CHECKPOINT_DIR,
+        LIVE_DIR,
         NOTES_DIR,
         RECORDINGS_DIR,
     ]:
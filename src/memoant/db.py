@@ -4,6 +4,7 @@ import json
 import sqlite3
 
 from .config import ORACLE_DB
+from .words import WordTable
 
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS os_audio_logs (
@@ -35,14 +36,37 @@ CREATE TABLE IF NOT EXISTS os_audio_logs (
     processing_time_seconds REAL,
     model_whisper TEXT DEFAULT 'large-v3-turbo',
     model_llm TEXT DEFAULT 'llama3.1:8b',
-    error TEXT
+    error TEXT,
+    words BLOB,
+    llm_stats TEXT,
+    status TEXT,
+    note_path TEXT,
+    first_note_seconds REAL,
+    probe TEXT
 );
 """
 
+# Columns added after the first release: (name, type)
+MIGRATIONS = [
+    ("words", "BLOB"),  # WordTable.pack()
+    ("llm_stats", "TEXT"),  # generations, retries, JSON parse outcomes, wasted seconds
+    ("status", "TEXT"),  # "preview" until the full pipeline has finished, then NULL
+    ("note_path", "TEXT"),
+    ("first_note_seconds", "REAL"),  # time from start of processing to the first note
+    ("probe", "TEXT"),  # probe verdict behind a "probe_rejected" record
+]
+
+# Records that count as processed for dedup and catch-up: finished ones and
+# files the probe rejected ("probe_rejected", see probe_rejected_sources()),
+# but not previews
+DONE_SQL = "(status IS NULL OR status = 'probe_rejected')"
+
 INDEX_SQL = [
     "CREATE INDEX IF NOT EXISTS idx_audio_recorded_at ON os_audio_logs(recorded_at);",
     "CREATE INDEX IF NOT EXISTS idx_audio_sphere ON os_audio_logs(sphere);",
     "CREATE INDEX IF NOT EXISTS idx_audio_type ON os_audio_logs(conversation_type);",
+    # Covering index for the watcher's catch-up scan
+    "CREATE INDEX IF NOT EXISTS idx_audio_source ON os_audio_logs(source_path, file_id);",
 ]
 
 
@@ -66,6 +90,10 @@ def open_db(db_path=ORACLE_DB):
 def ensure_schema(db):
     """Create the os_audio_logs table and indexes if they don't exist."""
     db.execute(SCHEMA_SQL)
+    columns = {r[1] for r in db.execute("PRAGMA table_info(os_audio_logs)")}
+    for name, col_type in MIGRATIONS:
+        if name not in columns:
+            db.execute(f"ALTER TABLE os_audio_logs ADD COLUMN {name} {col_type}")
     for sql in INDEX_SQL:
         db.execute(sql)
     db.commit()
@@ -80,14 +108,16 @@ def write_audio_log(db, record: dict):
             speaker_count, speakers, segments, summary, topics,
             action_items, decisions, entities, key_quotes, sphere, tags,
             sentiment, conversation_type, calendar_event_id, calendar_event_title,
-            processing_time_seconds, model_whisper, model_llm, error
+            processing_time_seconds, model_whisper, model_llm, error, words, llm_stats,
+            status, note_path, first_note_seconds, probe
         ) VALUES (
             :file_id, :source_file, :source_path, :recorded_at, :duration_seconds,
             :processed_at, :transcript, :transcript_plain, :word_count,
             :speaker_count, :speakers, :segments, :summary, :topics,
             :action_items, :decisions, :entities, :key_quotes, :sphere, :tags,
             :sentiment, :conversation_type, :calendar_event_id, :calendar_event_title,
-            :processing_time_seconds, :model_whisper, :model_llm, :error
+            :processing_time_seconds, :model_whisper, :model_llm, :error, :words, :llm_stats,
+            :status, :note_path, :first_note_seconds, :probe
         )""",
         {
             "file_id": record["file_id"],
@@ -118,14 +148,73 @@ def write_audio_log(db, record: dict):
             "model_whisper": record.get("model_whisper", "large-v3-turbo"),
             "model_llm": record.get("model_llm", "llama3.1:8b"),
             "error": record.get("error"),
+            "words": record["words"].pack() if record.get("words") is not None else None,
+            "llm_stats": _json(record.get("llm_stats")),
+            "status": record.get("status"),
+            "note_path": record.get("note_path"),
+            "first_note_seconds": record.get("first_note_seconds"),
+            "probe": _json(record.get("probe")),
         },
     )
     db.commit()
 
 
+def load_words(db, file_id: str) -> WordTable | None:
+    """Word-level timings for a record, or None if it has none stored."""
+    row = db.execute(
+        "SELECT words FROM os_audio_logs WHERE file_id = ?", (file_id,)
+    ).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return WordTable.unpack(row[0])
+
+
 def file_exists(db, file_id: str) -> bool:
-    """Check if a file_id already exists in os_audio_logs."""
+    """Check if a file_id already exists in os_audio_logs (previews don't count)."""
     row = db.execute(
-        "SELECT 1 FROM os_audio_logs WHERE file_id = ?", (file_id,)
+        f"SELECT 1 FROM os_audio_logs WHERE file_id = ? AND {DONE_SQL}", (file_id,)
     ).fetchone()
     return row is not None
+
+
+def preview_note_path(db, file_id: str) -> str | None:
+    """Note written for an unfinished (preview) record, if any."""
+    row = db.execute(
+        "SELECT note_path FROM os_audio_logs WHERE file_id = ? AND status = 'preview'", (file_id,)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def existing_file_ids(db, file_ids) -> set[str]:
+    """Return the subset of file_ids already processed (previews don't count)."""
+    file_ids = list(file_ids)
+    found = set()
+    for i in range(0, len(file_ids), 500):
+        batch = file_ids[i:i + 500]
+        placeholders = ",".join("?" * len(batch))
+        rows = db.execute(
+            f"SELECT file_id FROM os_audio_logs WHERE file_id IN ({placeholders}) "
+            f"AND {DONE_SQL}",
+            batch,
+        ).fetchall()
+        found.update(r[0] for r in rows)
+    return found
+
+
+def probe_rejected_sources(db) -> list[str]:
+    """Source paths of files the probe rejected, most recent first."""
+    return [r[0] for r in db.execute(
+        "SELECT source_path FROM os_audio_logs WHERE status = 'probe_rejected' "
+        "ORDER BY processed_at DESC"
+    )]
+
+
+def processed_sources(db) -> tuple[set[str], set[str]]:
+    """All (source_path, file_id) values of processed records, as two sets."""
+    paths, file_ids = set(), set()
+    for path, fid in db.execute(
+        f"SELECT source_path, file_id FROM os_audio_logs WHERE {DONE_SQL}"
+    ):
+        paths.add(path)
+        file_ids.add(fid)
+    return paths, file_ids
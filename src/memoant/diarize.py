@@ -4,6 +4,8 @@ import os
 
 from dotenv import load_dotenv
 
+from . import models
+
 load_dotenv(os.path.expanduser("~/.env"))
 
 
@@ -35,16 +37,28 @@ def get_pipeline():
     return pipeline
 
 
-def diarize(wav_path: str, pipeline=None) -> list[dict]:
-    """Run speaker diarization on a WAV file.
+def diarize(audio, pipeline=None) -> list[dict]:
+    """Run speaker diarization on a WAV file or 16kHz int16 sample buffer.
 
     Returns list of speaker segments:
         [{"start": float, "end": float, "speaker": "SPEAKER_00"}, ...]
     """
     if pipeline is None:
-        pipeline = get_pipeline()
+        pipeline = models.get("diarization", get_pipeline)
+
+    if not isinstance(audio, str):
+        # In-memory input avoids pyannote re-reading the file from disk
+        import torch
+
+        from .audio import to_float32
+        from .config import AUDIO_SAMPLE_RATE
+
+        audio = {
+            "waveform": torch.from_numpy(to_float32(audio)).unsqueeze(0),
+            "sample_rate": AUDIO_SAMPLE_RATE,
+        }
 
-    diarization = pipeline(wav_path)
+    diarization = pipeline(audio)
 
     segments = []
     for turn, _, speaker in diarization.itertracks(yield_label=True):
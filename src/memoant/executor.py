@@ -0,0 +1,128 @@
+"""Stage-pipelined executor for processing several files at once.
+
+Each pipeline stage (prepare -> speech -> structure -> write) gets its own
+worker threads and a bounded queue in front of it, so while file N is
+waiting on Ollama, file N+1 can be transcribing and file N+2 decoding.
+Per-stage concurrency comes from STAGE_CONCURRENCY; the accelerator-bound
+"speech" stage defaults to one worker.
+"""
+
+import queue
+import threading
+import time
+
+from . import pipeline
+from .config import STAGE_CONCURRENCY, STAGE_QUEUE_SIZE
+
+_DONE = object()
+
+
+class StagePipeline:
+    """Run jobs through a list of (name, fn, workers) stages.
+
+    fn(job) mutates the job dict; once a stage sets job["result"], later
+    stages are skipped for that job. Exceptions are caught and turned into
+    a "failed" result so one bad file never stalls the pipeline.
+    """
+
+    def __init__(self, stages: list[tuple], queue_size: int = STAGE_QUEUE_SIZE, on_result=None):
+        self.stages = stages
+        self.queues = [queue.Queue(maxsize=queue_size) for _ in stages]
+        self.results = queue.Queue()
+        self.on_result = on_result
+        self.stage_busy = {name: 0.0 for name, _, _ in stages}
+        self._lock = threading.Lock()
+
+    def _worker(self, idx: int, remaining: list):
+        name, fn, _ = self.stages[idx]
+        inbox = self.queues[idx]
+        outbox = self.queues[idx + 1] if idx + 1 < len(self.stages) else None
+        while True:
+            job = inbox.get()
+            if job is _DONE:
+                with self._lock:
+                    remaining[idx] -= 1
+                    last = remaining[idx] == 0
+                # The last worker of a stage closes the next stage
+                if last and outbox is not None:
+                    for _ in range(self.stages[idx + 1][2]):
+                        outbox.put(_DONE)
+                return
+            if "result" not in job:
+                start = time.time()
+                try:
+                    fn(job)
+                except Exception as e:
+                    print(f"  [{name}] {job.get('input_path')}: {type(e).__name__}: {e}")
+                    pipeline._cleanup(job.get("pcm", {}))
+                    job["result"] = {
+                        "status": "failed",
+                        "file_id": job.get("file_id"),
+                        "stage": name,
+                        "error": f"{type(e).__name__}: {e}",
+                    }
+                with self._lock:
+                    self.stage_busy[name] += time.time() - start
+            if outbox is not None and "result" not in job:
+                outbox.put(job)
+            else:
+                self.results.put(job)
+                if self.on_result is not None:
+                    self.on_result(job)
+
+    def run(self, jobs) -> list[dict]:
+        """Feed jobs through all stages; returns finished jobs in completion order."""
+        remaining = [workers for _, _, workers in self.stages]
+        threads = []
+        for idx, (name, _, workers) in enumerate(self.stages):
+            for n in range(workers):
+                t = threading.Thread(
+                    target=self._worker, args=(idx, remaining), name=f"{name}-{n}", daemon=True
+                )
+                t.start()
+                threads.append(t)
+
+        count = 0
+        for job in jobs:
+            self.queues[0].put(job)  # blocks when the first stage is backed up
+            count += 1
+        for _ in range(self.stages[0][2]):
+            self.queues[0].put(_DONE)
+        for t in threads:
+            t.join()
+
+        return [self.results.get() for _ in range(count)]
+
+
+def run_pipelined(
+    paths: list[str],
+    concurrency: dict | None = None,
+    queue_size: int = STAGE_QUEUE_SIZE,
+    on_result=None,
+    **options,
+) -> list[dict]:
+    """Process several files with stages overlapped across files.
+
+    Args:
+        paths: input files (or (path, file_id) tuples to skip rehashing)
+        concurrency: per-stage worker counts, defaults to STAGE_CONCURRENCY
+        queue_size: max jobs waiting in front of each stage
+        on_result: optional callback(job) as each job finishes
+        **options: forwarded to pipeline.new_job (db_path, notes_dir, ...)
+
+    Returns:
+        list of finished job dicts (each has "input_path" and "result")
+    """
+    concurrency = {**STAGE_CONCURRENCY, **(concurrency or {})}
+    stages = [
+        (name, fn, max(1, concurrency.get(name, 1)))
+        for name, fn in pipeline.PIPELINE_STAGES
+    ]
+
+    def jobs():
+        for item in paths:
+            path, file_id = item if isinstance(item, tuple) else (item, None)
+            yield pipeline.new_job(path, file_id=file_id, **options)
+
+    executor = StagePipeline(stages, queue_size=queue_size, on_result=on_result)
+    return executor.run(jobs())
@@ -0,0 +1,138 @@
+"""Fingerprint index: skip rehashing files we have already seen.
+
+file_id is a content hash of the whole recording, which for a multi-GB
+screen recording means re-reading every byte on each watcher event and
+catch-up run. The fingerprints table (in STATE_DB, next to the job queue)
+maps (path, size, mtime_ns, inode) to the file_id computed last time; if
+all four still match, the file is assumed unchanged and the hash is reused.
+
+Hashes are computed with large readinto() buffers. hashlib releases the
+GIL while digesting, so hashing on a worker thread overlaps with the ffmpeg
+decode (see pipeline.prepare_stage).
+"""
+
+import hashlib
+import os
+import sqlite3
+import time
+
+from .config import HASH_ALGORITHM, STATE_DB
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    inode INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    file_id TEXT NOT NULL,
+    hashed_at REAL NOT NULL
+);
+"""
+
+INDEX_SQL = [
+    "CREATE INDEX IF NOT EXISTS idx_fingerprints_file_id ON fingerprints(file_id);",
+]
+
+HASH_BUFFER_BYTES = 4 * 1024 * 1024
+
+
+def open_index(db_path: str = STATE_DB):
+    """Open the fingerprint index (WAL mode) and make sure the schema exists."""
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    db = sqlite3.connect(db_path, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA busy_timeout=10000")
+    db.execute(SCHEMA_SQL)
+    for sql in INDEX_SQL:
+        db.execute(sql)
+    return db
+
+
+def hash_file(path: str, algorithm: str = HASH_ALGORITHM) -> str:
+    """Content hash of a file, read in HASH_BUFFER_BYTES blocks."""
+    h = hashlib.new(algorithm)
+    buf = bytearray(HASH_BUFFER_BYTES)
+    view = memoryview(buf)
+    with open(path, "rb", buffering=0) as f:
+        while n := f.readinto(buf):
+            h.update(view[:n])
+    return h.hexdigest()
+
+
+def _stat_key(st: os.stat_result) -> tuple:
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def lookup(db, path: str, st: os.stat_result | None = None,
+           algorithm: str = HASH_ALGORITHM) -> str | None:
+    """Return the cached file_id for path if the file is unchanged, else None."""
+    path = os.path.abspath(path)
+    st = st or os.stat(path)
+    row = db.execute(
+        "SELECT size, mtime_ns, inode, algorithm, file_id FROM fingerprints WHERE path = ?",
+        (path,),
+    ).fetchone()
+    if row is None or row["algorithm"] != algorithm:
+        return None
+    if (row["size"], row["mtime_ns"], row["inode"]) != _stat_key(st):
+        return None
+    return row["file_id"]
+
+
+def record(db, path: str, file_id: str, st: os.stat_result | None = None,
+           algorithm: str = HASH_ALGORITHM):
+    """Store (or replace) the fingerprint for path."""
+    path = os.path.abspath(path)
+    st = st or os.stat(path)
+    db.execute(
+        "INSERT OR REPLACE INTO fingerprints "
+        "(path, size, mtime_ns, inode, algorithm, file_id, hashed_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (path, *_stat_key(st), algorithm, file_id, time.time()),
+    )
+
+
+def lookup_many(db, stats: dict[str, os.stat_result],
+                algorithm: str = HASH_ALGORITHM) -> dict[str, str]:
+    """Cached file_ids for the unchanged files among stats ({abspath: stat})."""
+    found = {}
+    rows = db.execute(
+        "SELECT path, size, mtime_ns, inode, file_id FROM fingerprints WHERE algorithm = ?",
+        (algorithm,),
+    )
+    for row in rows:
+        st = stats.get(row["path"])
+        if st is not None and (row["size"], row["mtime_ns"], row["inode"]) == _stat_key(st):
+            found[row["path"]] = row["file_id"]
+    return found
+
+
+def cached_file_id(path: str, db_path: str = STATE_DB) -> str | None:
+    """file_id from the index if path is unchanged since it was last hashed."""
+    db = open_index(db_path)
+    try:
+        return lookup(db, path)
+    finally:
+        db.close()
+
+
+def file_id(path: str, db_path: str = STATE_DB) -> str:
+    """file_id for path: from the index when unchanged, otherwise hashed and
+    recorded.
+
+    The stat is taken before hashing, so a file modified mid-hash is
+    fingerprinted with its old mtime and gets rehashed next time.
+    """
+    path = os.path.abspath(path)
+    st = os.stat(path)
+    db = open_index(db_path)
+    try:
+        fid = lookup(db, path, st)
+        if fid is None:
+            fid = hash_file(path)
+            record(db, path, fid, st)
+        return fid
+    finally:
+        db.close()
@@ -0,0 +1,347 @@
+"""Durable SQLite job queue for audio processing.
+
+The watcher and `memoant stop` enqueue files here instead of processing
+them inline; consumer threads claim jobs, run them through the pipeline,
+and retry failures with exponential backoff. A job that keeps failing
+(or keeps killing its worker) is moved to "dead" after JOB_MAX_ATTEMPTS and
+stays there until requeued with `memoant queue requeue`.
+
+Ready jobs are claimed shortest-expected-first: each job stores its probed
+audio duration and an estimated processing time (scheduler.py), and the
+claim order subtracts QUEUE_AGING_RATE * seconds waited so long
+recordings still get their turn.
+
+Job states: pending -> running -> done | pending (retry) | dead
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from . import scheduler
+from .config import (
+    JOB_BACKOFF_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    ORACLE_DB,
+    QUEUE_AGING_RATE,
+    STATE_DB,
+)
+from .recorder import find_sidecar
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    path TEXT NOT NULL,
+    source TEXT NOT NULL,
+    options TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    next_attempt_at REAL NOT NULL,
+    enqueued_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    worker_pid INTEGER,
+    last_error TEXT,
+    result TEXT,
+    audio_seconds REAL,
+    est_seconds REAL,
+    ingest_latency REAL
+);
+"""
+
+# Columns added after the first release: (name, type)
+MIGRATIONS = [
+    ("audio_seconds", "REAL"),
+    ("est_seconds", "REAL"),
+    ("ingest_latency", "REAL"),
+]
+
+INDEX_SQL = [
+    "CREATE INDEX IF NOT EXISTS idx_jobs_ready ON jobs(status, next_attempt_at);",
+    "CREATE INDEX IF NOT EXISTS idx_jobs_path ON jobs(path, enqueued_at);",
+    # At most one active job per file
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_active_path ON jobs(path) "
+    "WHERE status IN ('pending', 'running');",
+]
+
+STATUSES = ["pending", "running", "done", "dead"]
+
+# Wakes in-process consumers as soon as something is enqueued
+_wakeup = threading.Event()
+
+
+def open_queue(db_path: str = STATE_DB):
+    """Open the queue DB (WAL mode) and make sure the schema exists."""
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    db = sqlite3.connect(db_path, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA busy_timeout=10000")
+    db.execute(SCHEMA_SQL)
+    columns = {r[1] for r in db.execute("PRAGMA table_info(jobs)")}
+    for name, col_type in MIGRATIONS:
+        if name not in columns:
+            db.execute(f"ALTER TABLE jobs ADD COLUMN {name} {col_type}")
+    for sql in INDEX_SQL:
+        db.execute(sql)
+    return db
+
+
+def _row(row) -> dict | None:
+    if row is None:
+        return None
+    job = dict(row)
+    job["options"] = json.loads(job["options"]) if job["options"] else {}
+    return job
+
+
+def enqueue(db, path: str, source: str, options: dict | None = None,
+            max_attempts: int = JOB_MAX_ATTEMPTS, ready_at: float | None = None) -> int:
+    """Add a file to the queue. Returns the job id.
+
+    ready_at, when known, is the time the file finished being written;
+    the delay until it is enqueued is stored as ingest_latency.
+    If the file already has a pending or running job, returns that job's id
+    instead of adding a duplicate.
+    """
+    path = os.path.abspath(path)
+    options = options or {}
+    audio_seconds = scheduler.probe_seconds(path)
+    est_seconds = scheduler.estimate_seconds(audio_seconds, options.get("db_path", ORACLE_DB))
+    now = time.time()
+    try:
+        cur = db.execute(
+            """INSERT INTO jobs (path, source, options, status, max_attempts,
+                                 next_attempt_at, enqueued_at, audio_seconds, est_seconds,
+                                 ingest_latency)
+               VALUES (?, ?, ?, 'pending', ?, ?, ?, ?, ?, ?)""",
+            (path, source, json.dumps(options), max_attempts, now, now,
+             audio_seconds, est_seconds, now - ready_at if ready_at else None),
+        )
+        job_id = cur.lastrowid
+    except sqlite3.IntegrityError:
+        job_id = db.execute(
+            "SELECT id FROM jobs WHERE path = ? AND status IN ('pending', 'running')",
+            (path,),
+        ).fetchone()[0]
+    _wakeup.set()
+    return job_id
+
+
+def claim(db, job_id: int | None = None) -> dict | None:
+    """Atomically take the next ready job (or a specific pending job).
+
+    The next job is the one with the lowest aged cost:
+    est_seconds - QUEUE_AGING_RATE * (seconds since enqueued).
+    Marks it running, bumps attempts and records this process as its
+    worker. Returns the job dict, or None if nothing is ready.
+    """
+    now = time.time()
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        if job_id is None:
+            row = db.execute(
+                """SELECT id FROM jobs
+                   WHERE status = 'pending' AND next_attempt_at <= :now
+                   ORDER BY COALESCE(est_seconds, :default) - :aging * (:now - enqueued_at), id
+                   LIMIT 1""",
+                {
+                    "now": now,
+                    "default": scheduler.DEFAULT_OVERHEAD_SECONDS,
+                    "aging": QUEUE_AGING_RATE,
+                },
+            ).fetchone()
+        else:
+            row = db.execute(
+                "SELECT id FROM jobs WHERE id = ? AND status = 'pending'", (job_id,)
+            ).fetchone()
+        if row is None:
+            db.execute("COMMIT")
+            return None
+        db.execute(
+            """UPDATE jobs SET status = 'running', attempts = attempts + 1,
+                   started_at = ?, worker_pid = ?
+               WHERE id = ?""",
+            (now, os.getpid(), row[0]),
+        )
+        job = _row(db.execute("SELECT * FROM jobs WHERE id = ?", (row[0],)).fetchone())
+        db.execute("COMMIT")
+        return job
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+
+def complete(db, job_id: int, result: dict):
+    """Mark a job done and store its pipeline result."""
+    db.execute(
+        "UPDATE jobs SET status = 'done', finished_at = ?, result = ?, last_error = NULL WHERE id = ?",
+        (time.time(), json.dumps(result, default=str), job_id),
+    )
+
+
+def fail(db, job_id: int, error: str) -> str:
+    """Record a failed attempt. Schedules a retry with exponential backoff,
+    or dead-letters the job once it has used all its attempts.
+
+    Returns the job's new status.
+    """
+    attempts, max_attempts = db.execute(
+        "SELECT attempts, max_attempts FROM jobs WHERE id = ?", (job_id,)
+    ).fetchone()
+    now = time.time()
+    if attempts >= max_attempts:
+        status = "dead"
+        next_at = now
+    else:
+        status = "pending"
+        next_at = now + JOB_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    db.execute(
+        """UPDATE jobs SET status = ?, finished_at = ?, next_attempt_at = ?,
+               last_error = ?, worker_pid = NULL
+           WHERE id = ?""",
+        (status, now, next_at, error[:2000], job_id),
+    )
+    return status
+
+
+def _pid_alive(pid: int | None) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def recover_stale(db) -> int:
+    """Return jobs left 'running' by a dead worker to the queue.
+
+    The interrupted run counts as an attempt, so a file that crashes the
+    worker every time ends up dead-lettered instead of looping forever.
+    """
+    rows = db.execute("SELECT id, worker_pid FROM jobs WHERE status = 'running'").fetchall()
+    count = 0
+    for job_id, pid in rows:
+        if pid == os.getpid() or _pid_alive(pid):
+            continue
+        fail(db, job_id, "worker exited while processing")
+        count += 1
+    return count
+
+
+def get_job(db, job_id: int) -> dict | None:
+    """Fetch one job by id."""
+    return _row(db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+
+def list_jobs(db, status: str | None = None, limit: int = 50) -> list[dict]:
+    """Most recent jobs first, optionally filtered by status."""
+    if status:
+        rows = db.execute(
+            "SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)
+        ).fetchall()
+    else:
+        rows = db.execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+    return [_row(r) for r in rows]
+
+
+def last_enqueued(db) -> dict[str, float]:
+    """Most recent enqueued_at per path, over jobs in any state."""
+    return dict(db.execute("SELECT path, MAX(enqueued_at) FROM jobs GROUP BY path").fetchall())
+
+
+def counts(db) -> dict:
+    """Number of jobs per status."""
+    return dict(db.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+
+def requeue(db, job_id: int | None = None, status: str = "dead") -> tuple[int, int]:
+    """Reset a job (or every job with `status`) to pending with fresh attempts.
+
+    A job whose path already has a pending or running job is left alone
+    (only one active job per path). Returns (requeued, skipped).
+    """
+    now = time.time()
+    if job_id is not None:
+        ids = [r[0] for r in db.execute(
+            "SELECT id FROM jobs WHERE id = ? AND status != 'running'", (job_id,)
+        )]
+    else:
+        # Newest first, so that job wins when one path has several
+        ids = [r[0] for r in db.execute(
+            "SELECT id FROM jobs WHERE status = ? ORDER BY id DESC", (status,)
+        )]
+    requeued = 0
+    for jid in ids:
+        # One statement per job, so each sees the jobs requeued before it
+        requeued += db.execute(
+            """UPDATE jobs SET status = 'pending', attempts = 0, next_attempt_at = ?
+               WHERE id = ? AND NOT EXISTS (
+                   SELECT 1 FROM jobs AS active
+                   WHERE active.path = jobs.path AND active.id != jobs.id
+                     AND active.status IN ('pending', 'running'))""",
+            (now, jid),
+        ).rowcount
+    _wakeup.set()
+    return requeued, len(ids) - requeued
+
+
+def run_job(db, job: dict) -> dict:
+    """Run a claimed job through the pipeline and record the outcome.
+
+    Returns the pipeline result, or {"status": "failed", ...} on error.
+    """
+    from .server import run_process_file
+
+    try:
+        result = run_process_file(job["path"], priority=job["est_seconds"], **job["options"])
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        status = fail(db, job["id"], error)
+        print(f"[memoant] Job {job['id']} failed ({status}): {error}")
+        if status == "dead":
+            # Nothing will process it now; don't keep its PCM sidecar around
+            sidecar = find_sidecar(job["path"])
+            if sidecar:
+                os.remove(sidecar)
+        return {"status": "failed", "error": error, "job_status": status}
+    complete(db, job["id"], result)
+    return result
+
+
+def _consume(db_path: str, stop: threading.Event, poll_seconds: float):
+    db = open_queue(db_path)
+    try:
+        while not stop.is_set():
+            job = claim(db)
+            if job is None:
+                _wakeup.wait(poll_seconds)
+                _wakeup.clear()
+                continue
+            print(f"\n[memoant] Job {job['id']} (attempt {job['attempts']}): {os.path.basename(job['path'])}")
+            result = run_job(db, job)
+            print(f"[memoant] Job {job['id']}: {result.get('status')} - {(result.get('summary') or '')[:60]}")
+    finally:
+        db.close()
+
+
+def start_consumers(workers: int, db_path: str = STATE_DB, poll_seconds: float = 5.0) -> threading.Event:
+    """Start consumer threads. Set the returned event to stop them."""
+    db = open_queue(db_path)
+    recovered = recover_stale(db)
+    db.close()
+    if recovered:
+        print(f"[memoant] Recovered {recovered} interrupted job(s)")
+
+    stop = threading.Event()
+    for n in range(workers):
+        threading.Thread(
+            target=_consume, args=(db_path, stop, poll_seconds),
+            name=f"queue-consumer-{n}", daemon=True,
+        ).start()
+    return stop
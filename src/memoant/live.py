@@ -0,0 +1,219 @@
+"""Live transcription while a recording is running.
+
+With `memoant record --live`, ffmpeg writes a second output next to the
+.m4a: 16 kHz mono PCM, split into LIVE_SEGMENT_SECONDS files by the
+segment muxer (seg_00000.pcm, seg_00001.pcm, ...). A worker process
+(`python -m memoant.live <dir> <ffmpeg pid>`) reads segments as they are
+completed, cuts the pending audio at a silence so words are not split at
+segment boundaries, and transcribes each piece. Pieces are appended to
+transcript.jsonl in the live directory:
+
+    {"start", "end", "text", "segments", "words" (WordTable.to_json()),
+     "speech" (VAD segments)}
+
+All times are seconds from the start of the recording. When ffmpeg exits,
+the worker transcribes the tail and writes done.json, so `memoant stop`
+only waits for the last piece. The pipeline then takes the transcript
+and VAD from load() instead of decoding and transcribing the recording
+again. `memoant live` prints pieces as they arrive (follow()).
+"""
+
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from .config import AUDIO_SAMPLE_RATE, LIVE_DIR, LIVE_SEGMENT_SECONDS, MIN_SILENCE_MS
+from .words import WordTable
+
+TRANSCRIPT_FILE = "transcript.jsonl"
+DONE_FILE = "done.json"
+POLL_SECONDS = 1.0
+# Without a pause, pending audio is transcribed anyway at this many segments
+MAX_PENDING_SEGMENTS = 4
+
+
+def live_dir_for(recording_path: str) -> str:
+    """Live directory for a recording (segments, transcript, worker log)."""
+    return os.path.join(LIVE_DIR, os.path.splitext(os.path.basename(recording_path))[0])
+
+
+def segment_output(live_dir: str, segment_seconds: int = LIVE_SEGMENT_SECONDS) -> list[str]:
+    """ffmpeg output options for the segmented 16 kHz stream."""
+    return [
+        "-ac", "1",
+        "-ar", str(AUDIO_SAMPLE_RATE),
+        "-c:a", "pcm_s16le",
+        "-f", "segment",
+        "-segment_time", str(segment_seconds),
+        "-segment_format", "s16le",
+        os.path.join(live_dir, "seg_%05d.pcm"),
+    ]
+
+
+def _segment_path(live_dir: str, index: int) -> str:
+    return os.path.join(live_dir, f"seg_{index:05d}.pcm")
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError:
+        return False
+
+
+def _cut(speech: list[dict], pending_seconds: float, final: bool) -> float | None:
+    """Where to cut the pending audio (seconds), or None to wait for more.
+
+    Cuts in the middle of the last pause that is followed by more audio,
+    so the next piece starts in silence.
+    """
+    if final or not speech:
+        return pending_seconds
+    gap = MIN_SILENCE_MS / 1000
+    bounds = [(a["end"], b["start"]) for a, b in zip(speech, speech[1:])]
+    bounds.append((speech[-1]["end"], pending_seconds))
+    pauses = [(start + end) / 2 for start, end in bounds if end - start >= gap]
+    if pauses:
+        return pauses[-1]
+    if pending_seconds >= MAX_PENDING_SEGMENTS * LIVE_SEGMENT_SECONDS:
+        return pending_seconds
+    return None
+
+
+def _transcribe_piece(samples: np.ndarray, offset: float, speech: list[dict]) -> dict:
+    from .transcribe import transcribe
+
+    result = transcribe(samples)
+    for seg in result["segments"]:
+        seg["start"] += offset
+        seg["end"] += offset
+    return {
+        "start": offset,
+        "end": offset + len(samples) / AUDIO_SAMPLE_RATE,
+        "text": result["text"],
+        "segments": result["segments"],
+        "words": result["words"].shifted(offset).to_json(),
+        "speech": [{"start": s["start"] + offset, "end": s["end"] + offset} for s in speech],
+    }
+
+
+def run_worker(live_dir: str, recorder_pid: int):
+    """Transcribe segments as ffmpeg completes them, until it exits."""
+    from .audio import detect_speech_segments
+
+    out_path = os.path.join(live_dir, TRANSCRIPT_FILE)
+    pending = np.zeros(0, dtype=np.int16)
+    offset = 0.0  # recording time of pending[0]
+    index = 0
+    started = time.time()
+    while True:
+        recording = _alive(recorder_pid)
+        new = 0
+        # A segment is complete once ffmpeg has moved on to the next one
+        while os.path.isfile(_segment_path(live_dir, index)) and (
+            not recording or os.path.isfile(_segment_path(live_dir, index + 1))
+        ):
+            path = _segment_path(live_dir, index)
+            pending = np.concatenate([pending, np.fromfile(path, dtype=np.int16)])
+            os.remove(path)
+            index += 1
+            new += 1
+        final = not recording
+
+        if new or final:
+            while len(pending):
+                pending_seconds = len(pending) / AUDIO_SAMPLE_RATE
+                speech = detect_speech_segments(pending)
+                cut = _cut(speech, pending_seconds, final)
+                n = 0 if cut is None else int(cut * AUDIO_SAMPLE_RATE)
+                if n == 0:
+                    break
+                piece_speech = [
+                    {"start": s["start"], "end": min(s["end"], cut)}
+                    for s in speech if s["start"] < cut
+                ]
+                if piece_speech:
+                    piece = _transcribe_piece(pending[:n], offset, piece_speech)
+                    with open(out_path, "a") as f:
+                        f.write(json.dumps(piece) + "\n")
+                    print(f"[{offset:7.1f}s] {piece['text']}", flush=True)
+                pending = pending[n:]
+                offset += n / AUDIO_SAMPLE_RATE
+
+        if final:
+            with open(os.path.join(live_dir, DONE_FILE), "w") as f:
+                json.dump({"duration": offset, "segments": index,
+                           "worker_seconds": time.time() - started}, f)
+            return
+        time.sleep(POLL_SECONDS)
+
+
+def wait(live_dir: str, worker_pid: int, timeout: float) -> bool:
+    """Wait for the worker to finish the tail. True if done.json was written."""
+    done = os.path.join(live_dir, DONE_FILE)
+    deadline = time.time() + timeout
+    while not os.path.isfile(done) and _alive(worker_pid) and time.time() < deadline:
+        time.sleep(0.2)
+    return os.path.isfile(done)
+
+
+def _pieces(live_dir: str) -> list[dict]:
+    path = os.path.join(live_dir, TRANSCRIPT_FILE)
+    if not os.path.isfile(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.endswith("\n")]
+
+
+def load(live_dir: str) -> dict | None:
+    """The finished live transcript in the pipeline's shapes, or None if
+    the worker did not finish.
+
+    Returns {"duration", "speech_segments", "transcript"}, where transcript
+    matches transcribe.transcribe() output (text, segments, words).
+    """
+    done_path = os.path.join(live_dir, DONE_FILE)
+    if not os.path.isfile(done_path):
+        return None
+    with open(done_path) as f:
+        done = json.load(f)
+    pieces = _pieces(live_dir)
+    return {
+        "duration": done["duration"],
+        "speech_segments": [s for p in pieces for s in p["speech"]],
+        "transcript": {
+            "text": " ".join(p["text"] for p in pieces if p["text"]),
+            "segments": [s for p in pieces for s in p["segments"]],
+            "words": WordTable.concat([WordTable.from_json(p["words"]) for p in pieces]),
+        },
+    }
+
+
+def follow(live_dir: str, keep_following: bool = True):
+    """Yield transcript pieces as they are written; stops at done.json (or
+    after the existing ones when not keep_following)."""
+    path = os.path.join(live_dir, TRANSCRIPT_FILE)
+    done = os.path.join(live_dir, DONE_FILE)
+    pos = 0
+    while True:
+        finished = os.path.isfile(done)
+        if os.path.isfile(path):
+            with open(path) as f:
+                f.seek(pos)
+                while True:
+                    line = f.readline()
+                    if not line.endswith("\n"):
+                        break  # partial line: the worker is still writing it
+                    pos = f.tell()
+                    yield json.loads(line)
+        if finished or not keep_following or not os.path.isdir(live_dir):
+            return
+        time.sleep(POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    run_worker(sys.argv[1], int(sys.argv[2]))
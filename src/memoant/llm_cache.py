@@ -0,0 +1,144 @@
+"""Content-addressed cache for LLM structuring results.
+
+Reprocessing with --force, re-rendering notes or changing downstream code
+often sends the exact same transcript to Ollama again. Results are stored
+in STATE_DB keyed by a hash of the transcript, model, prompt templates and
+request options, so any of those changing is a miss rather than a stale
+hit. Entries unused for LLM_CACHE_MAX_AGE_DAYS are dropped, and the least
+recently used go first once the cache exceeds LLM_CACHE_MAX_MB.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+from .config import LLM_CACHE_MAX_AGE_DAYS, LLM_CACHE_MAX_MB, STATE_DB
+
+SCHEMA_SQL = [
+    """CREATE TABLE IF NOT EXISTS llm_cache (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        last_used_at REAL NOT NULL,
+        hits INTEGER NOT NULL DEFAULT 0
+    );""",
+    "CREATE INDEX IF NOT EXISTS idx_llm_cache_used ON llm_cache(last_used_at);",
+    """CREATE TABLE IF NOT EXISTS llm_cache_stats (
+        name TEXT PRIMARY KEY,
+        count INTEGER NOT NULL DEFAULT 0
+    );""",
+]
+
+
+def open_cache(db_path: str = STATE_DB):
+    """Open the cache DB (WAL mode) and make sure the schema exists."""
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    db = sqlite3.connect(db_path, isolation_level=None)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA busy_timeout=10000")
+    for sql in SCHEMA_SQL:
+        db.execute(sql)
+    return db
+
+
+def cache_key(transcript: str, model: str, prompt_version: str, options: dict) -> str:
+    """sha256 over everything that determines the LLM output."""
+    h = hashlib.sha256()
+    for part in (transcript, model, prompt_version, json.dumps(options, sort_keys=True)):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _count(db, name: str):
+    db.execute(
+        "INSERT INTO llm_cache_stats (name, count) VALUES (?, 1) "
+        "ON CONFLICT(name) DO UPDATE SET count = count + 1",
+        (name,),
+    )
+
+
+def get(key: str, db_path: str = STATE_DB) -> dict | None:
+    """Cached result for key (counted as a hit or miss)."""
+    db = open_cache(db_path)
+    try:
+        row = db.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            _count(db, "misses")
+            return None
+        db.execute(
+            "UPDATE llm_cache SET last_used_at = ?, hits = hits + 1 WHERE key = ?",
+            (time.time(), key),
+        )
+        _count(db, "hits")
+        return json.loads(row[0])
+    finally:
+        db.close()
+
+
+def put(key: str, value: dict, db_path: str = STATE_DB):
+    """Store a result, then evict by age and total size."""
+    data = json.dumps(value, ensure_ascii=False)
+    now = time.time()
+    db = open_cache(db_path)
+    try:
+        db.execute(
+            "INSERT OR REPLACE INTO llm_cache (key, value, size, created_at, last_used_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (key, data, len(data.encode()), now, now),
+        )
+        evict(db, now)
+    finally:
+        db.close()
+
+
+def evict(db, now: float | None = None,
+          max_age_days: float = LLM_CACHE_MAX_AGE_DAYS, max_mb: float = LLM_CACHE_MAX_MB) -> int:
+    """Drop entries unused for max_age_days, then least recently used ones
+    until the cache fits in max_mb. Returns the number removed."""
+    now = now or time.time()
+    removed = db.execute(
+        "DELETE FROM llm_cache WHERE last_used_at < ?", (now - max_age_days * 86400,)
+    ).rowcount
+    total = db.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+    excess = total - max_mb * 1024 * 1024
+    if excess > 0:
+        doomed = []
+        for key, size in db.execute("SELECT key, size FROM llm_cache ORDER BY last_used_at"):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        db.executemany("DELETE FROM llm_cache WHERE key = ?", doomed)
+        removed += len(doomed)
+    return removed
+
+
+def stats(db_path: str = STATE_DB) -> dict:
+    """Entry count, total bytes, and lifetime hit/miss counts."""
+    db = open_cache(db_path)
+    try:
+        entries, size = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()
+        counts = dict(db.execute("SELECT name, count FROM llm_cache_stats").fetchall())
+    finally:
+        db.close()
+    return {
+        "entries": entries,
+        "bytes": size,
+        "hits": counts.get("hits", 0),
+        "misses": counts.get("misses", 0),
+    }
+
+
+def clear(db_path: str = STATE_DB) -> int:
+    """Remove every cached result (stats are kept). Returns entries removed."""
+    db = open_cache(db_path)
+    try:
+        return db.execute("DELETE FROM llm_cache").rowcount
+    finally:
+        db.close()
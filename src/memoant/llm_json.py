@@ -0,0 +1,127 @@
+"""Tolerant parsing of JSON objects from LLM output.
+
+Even in JSON mode a local model sometimes wraps the object in prose or a
+code fence, leaves a trailing comma, uses single quotes or Python
+literals, or stops mid-array when it hits the token limit. parse() fixes
+those locally instead of paying for another generation, and reports what
+it had to do:
+
+    "clean"      the text was valid JSON
+    "extracted"  valid JSON once surrounding prose/fences were removed
+    "repaired"   needed rewriting (quotes, commas, literals, truncation)
+"""
+
+import json
+import re
+
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_WORD = re.compile(r"[A-Za-z_]+")
+
+
+def parse(text: str) -> tuple[dict, str]:
+    """Parse the JSON object in text. Returns (object, outcome); raises
+    ValueError if nothing usable can be recovered."""
+    try:
+        return _object(json.loads(text)), "clean"
+    except ValueError:
+        pass
+
+    start = text.find("{")
+    if start < 0:
+        raise ValueError("no JSON object in response")
+    body = text[start:]
+    end = body.rfind("}")
+    if end >= 0:
+        try:
+            return _object(json.loads(body[:end + 1])), "extracted"
+        except ValueError:
+            pass
+
+    fixed, safe = _rewrite(body)
+    for candidate in (fixed, safe):
+        try:
+            return _object(json.loads(candidate)), "repaired"
+        except ValueError:
+            continue
+    raise ValueError("unrepairable JSON in response")
+
+
+def _object(value) -> dict:
+    if not isinstance(value, dict):
+        raise ValueError("response is not a JSON object")
+    return value
+
+
+def _close(out: list[str], stack: list[str]) -> str:
+    text = "".join(out).rstrip()
+    text = text.rstrip(",:").rstrip()
+    return text + "".join("}" if c == "{" else "]" for c in reversed(stack))
+
+
+def _rewrite(text: str) -> tuple[str, str]:
+    """Rewrite text from the first "{" into strict JSON.
+
+    Converts single-quoted strings, drops trailing commas and Python
+    literals, stops after the top-level object, and closes whatever is
+    still open. Returns (fixed, safe): safe is cut back to the last
+    complete member, for when the truncation point left a dangling key.
+    """
+    out = []
+    stack = []
+    quote = None  # quote char of the string we are in
+    safe = None
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if ch == "\\" and i + 1 < len(text):
+                nxt = text[i + 1]
+                # \' is not a JSON escape
+                out.append("'" if nxt == "'" else ch + nxt)
+                i += 2
+                continue
+            if ch == quote:
+                out.append('"')
+                quote = None
+            elif ch == '"':
+                out.append('\\"')
+            elif ch == "\n":
+                out.append("\\n")
+            else:
+                out.append(ch)
+            i += 1
+            continue
+
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append(ch)
+            out.append(ch)
+        elif ch in "}]":
+            # Drop a trailing comma before the closer
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack:
+                stack.pop()
+            out.append("}" if ch == "}" else "]")
+            if not stack:
+                return "".join(out), "".join(out)
+        elif ch == ",":
+            safe = _close(out, stack)
+            out.append(ch)
+        else:
+            word = _WORD.match(text, i)
+            if word and word.group() in _LITERALS:
+                out.append(_LITERALS[word.group()])
+                i = word.end()
+                continue
+            out.append(ch)
+        i += 1
+
+    if quote:
+        out.append('"')
+    fixed = _close(out, stack)
+    return fixed, safe or fixed
@@ -4,6 +4,8 @@ import os
 import re
 from datetime import datetime
 
+from .words import WordTable
+
 
 def _sanitize_filename(name: str) -> str:
     """Make a string safe for filenames."""
@@ -27,12 +29,15 @@ def _format_timestamp(seconds: float) -> str:
     return f"[{m:02d}:{s:02d}]"
 
 
-def generate_note(record: dict, notes_dir: str) -> str:
+def generate_note(record: dict, notes_dir: str, path: str | None = None, preview: bool = False) -> str:
     """Generate an Obsidian markdown note from a pipeline result.
 
     Args:
         record: dict from pipeline.process_file() with all fields
         notes_dir: directory to write the .md file to
+        path: existing note to rewrite in place (keeps its filename)
+        preview: mark the note as a preview (transcript only, still
+            processing)
 
     Returns:
         path to the created .md file
@@ -67,8 +72,10 @@ def generate_note(record: dict, notes_dir: str) -> str:
     filename = f"{date_prefix} {safe_title}.md"
     filepath = os.path.join(notes_dir, filename)
 
+    if path:
+        filepath = path
     # Avoid overwriting
-    if os.path.exists(filepath):
+    elif os.path.exists(filepath):
         base, ext = os.path.splitext(filename)
         counter = 2
         while os.path.exists(os.path.join(notes_dir, f"{base} ({counter}){ext}")):
@@ -103,6 +110,8 @@ def generate_note(record: dict, notes_dir: str) -> str:
         f"speakers: {speaker_count}",
         f"words: {record.get('word_count', 0)}",
     ])
+    if preview:
+        fm_lines.append("status: preview")
     if record.get("calendar_event_id"):
         fm_lines.append(f"calendar_event: \"{record['calendar_event_id']}\"")
     if tags:
@@ -115,6 +124,12 @@ def generate_note(record: dict, notes_dir: str) -> str:
     # Build body sections
     body_parts = []
 
+    if preview:
+        body_parts.append(
+            "> [!info] Preview\n> Speakers, action items and the full summary are still "
+            "being processed. This note will be updated in place."
+        )
+
     # Summary
     if summary:
         body_parts.append(f"## Summary\n\n{summary}")
@@ -178,6 +193,9 @@ def generate_note(record: dict, notes_dir: str) -> str:
                 segments = json.loads(segments)
             except (json.JSONDecodeError, TypeError):
                 segments = []
+        words = record.get("words")
+        if isinstance(words, bytes):
+            words = WordTable.unpack(words)
 
         if segments and isinstance(segments, list) and len(segments) > 1:
             # Use segments for formatted transcript
@@ -191,13 +209,22 @@ def generate_note(record: dict, notes_dir: str) -> str:
                 else:
                     formatted_lines.append(f"**{ts}** {text}")
             body_parts.append(f"## Transcript\n\n" + "\n\n".join(formatted_lines))
+        elif words is not None and len(words):
+            # Single speaker: break into timestamped paragraphs at pauses
+            formatted_lines = [
+                f"**{_format_timestamp(p['start'])}** {p['text']}" for p in words.paragraphs()
+            ]
+            body_parts.append(f"## Transcript\n\n" + "\n\n".join(formatted_lines))
         else:
             body_parts.append(f"## Transcript\n\n{transcript}")
 
     # Assemble
     content = "\n".join(fm_lines) + "\n\n" + "\n\n".join(body_parts) + "\n"
 
-    with open(filepath, "w") as f:
+    # Replace atomically so Obsidian never sees a half-written update
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, "w") as f:
         f.write(content)
+    os.replace(tmp_path, filepath)
 
     return filepath
@@ -1,23 +1,47 @@
 """Merge transcription words with speaker diarization labels."""
 
+from .words import UNKNOWN, WordTable
 
-def assign_speakers(words: list[dict], diarization_segments: list[dict]) -> list[dict]:
+
+def assign_speakers(words: WordTable, diarization_segments: list[dict]) -> WordTable:
     """Assign speaker labels to transcribed words using majority vote.
 
     For each word, find which diarization segment(s) overlap with it,
     and assign the speaker that covers the most of the word's duration.
+    Returns a copy of the table with its speaker column filled in.
+
+    Words and segments are swept in start order, keeping only the segments
+    that can still overlap the current word, so the cost is roughly
+    O((words + segments) log n) instead of words x segments. Overlaps are
+    summed in the segments' original order, so ties resolve exactly as a
+    full scan would.
     """
-    for word in words:
-        w_start = word["start"]
-        w_end = word["end"]
+    segments = diarization_segments
+    by_start = sorted(range(len(segments)), key=lambda i: segments[i]["start"])
+    next_seg = 0
+    active = []  # indices of segments that started before some word ended
+
+    starts = words.starts.tolist()
+    ends = words.ends.tolist()
+    labels = [UNKNOWN] * len(starts)
+
+    for w in sorted(range(len(starts)), key=starts.__getitem__):
+        w_start = starts[w]
+        w_end = ends[w]
         w_duration = w_end - w_start
 
         if w_duration <= 0:
-            word["speaker"] = "UNKNOWN"
             continue
 
+        while next_seg < len(by_start) and segments[by_start[next_seg]]["start"] < w_end:
+            active.append(by_start[next_seg])
+            next_seg += 1
+        # Word starts only increase, so a segment ending here is done for good
+        active = [i for i in active if segments[i]["end"] > w_start]
+
         speaker_overlap = {}
-        for seg in diarization_segments:
+        for i in sorted(active):
+            seg = segments[i]
             overlap_start = max(w_start, seg["start"])
             overlap_end = min(w_end, seg["end"])
             overlap = overlap_end - overlap_start
@@ -27,81 +51,34 @@ def assign_speakers(words: list[dict], diarization_segments: list[dict]) -> list
                 speaker_overlap[speaker] = speaker_overlap.get(speaker, 0) + overlap
 
         if speaker_overlap:
-            word["speaker"] = max(speaker_overlap, key=speaker_overlap.get)
-        else:
-            word["speaker"] = "UNKNOWN"
+            labels[w] = max(speaker_overlap, key=speaker_overlap.get)
 
-    return words
+    return words.with_speakers(labels)
 
 
-def build_speaker_transcript(words: list[dict]) -> str:
+def build_speaker_transcript(words: WordTable) -> str:
     """Build a speaker-attributed transcript from labeled words.
 
     Groups consecutive words by the same speaker into turns.
     """
-    if not words:
-        return ""
-
-    lines = []
-    current_speaker = None
-    current_words = []
-
-    for word in words:
-        speaker = word.get("speaker", "UNKNOWN")
-        if speaker != current_speaker:
-            if current_words:
-                text = " ".join(w["word"] for w in current_words)
-                lines.append(f"{current_speaker}: {text}")
-            current_speaker = speaker
-            current_words = [word]
-        else:
-            current_words.append(word)
-
-    if current_words:
-        text = " ".join(w["word"] for w in current_words)
-        lines.append(f"{current_speaker}: {text}")
-
-    return "\n".join(lines)
+    return "\n".join(
+        f"{words.speaker_name(speaker)}: {words.span_text(first, stop)}"
+        for speaker, first, stop in words.runs()
+    )
 
 
-def build_segments(words: list[dict]) -> list[dict]:
+def build_segments(words: WordTable) -> list[dict]:
     """Build conversation segments from labeled words.
 
     Each segment represents a continuous speaker turn with timestamps.
     Returns: [{"speaker": str, "start": float, "end": float, "text": str}]
     """
-    if not words:
-        return []
-
-    segments = []
-    current_speaker = None
-    current_words = []
-    seg_start = 0.0
-
-    for word in words:
-        speaker = word.get("speaker", "UNKNOWN")
-        if speaker != current_speaker:
-            if current_words:
-                text = " ".join(w["word"] for w in current_words)
-                segments.append({
-                    "speaker": current_speaker,
-                    "start": seg_start,
-                    "end": current_words[-1]["end"],
-                    "text": text,
-                })
-            current_speaker = speaker
-            current_words = [word]
-            seg_start = word["start"]
-        else:
-            current_words.append(word)
-
-    if current_words:
-        text = " ".join(w["word"] for w in current_words)
-        segments.append({
-            "speaker": current_speaker,
-            "start": seg_start,
-            "end": current_words[-1]["end"],
-            "text": text,
-        })
-
-    return segments
+    return [
+        {
+            "speaker": words.speaker_name(speaker),
+            "start": round(float(words.starts[first]), 3),
+            "end": round(float(words.ends[stop - 1]), 3),
+            "text": words.span_text(first, stop),
+        }
+        for speaker, first, stop in words.runs()
+    ]
@@ -0,0 +1,90 @@
+"""In-process cache of loaded models (Whisper, Silero VAD, pyannote).
+
+Loaders run once per process; later calls return the cached object. The
+model server (server.py) keeps a process alive so these stay warm across
+jobs, and calls unload_all() after an idle timeout to free memory.
+"""
+
+import gc
+import threading
+import time
+
+_models = {}
+_unloaders = {}
+_lock = threading.Lock()  # guards the dicts above; never held while loading
+_loading = {}  # name -> lock held while that model loads
+_last_used = time.time()
+
+
+def get(name: str, loader, unloader=None):
+    """Return the cached model `name`, loading it with loader() on first use.
+
+    unloader, if given, is called with the model when it is evicted (for
+    libraries that keep their own module-level cache, like mlx-whisper).
+    """
+    global _last_used
+    with _lock:
+        _last_used = time.time()
+        if name in _models:
+            return _models[name]
+        loading = _loading.setdefault(name, threading.Lock())
+    # A load can take seconds: only callers of the same model wait for it
+    with loading:
+        with _lock:
+            if name in _models:
+                return _models[name]
+        model = loader()
+        with _lock:
+            _models[name] = model
+            if unloader is not None:
+                _unloaders[name] = unloader
+        return model
+
+
+def unload(name: str):
+    """Drop one cached model (e.g. after it broke), if it is loaded."""
+    with _lock:
+        model = _models.pop(name, None)
+        unloader = _unloaders.pop(name, None)
+    if model is not None and unloader is not None:
+        unloader(model)
+
+
+def touch():
+    """Mark models as in use (resets the idle clock)."""
+    global _last_used
+    _last_used = time.time()
+
+
+def loaded() -> list[str]:
+    """Names of currently loaded models."""
+    with _lock:
+        return sorted(_models)
+
+
+def idle_seconds() -> float:
+    """Seconds since a model was last requested."""
+    return time.time() - _last_used
+
+
+def unload_all() -> list[str]:
+    """Drop every cached model and release accelerator memory."""
+    with _lock:
+        names = sorted(_models)
+        for name in names:
+            model = _models.pop(name)
+            unloader = _unloaders.pop(name, None)
+            if unloader is not None:
+                try:
+                    unloader(model)
+                except Exception as e:
+                    print(f"  Unload of {name} failed: {e}")
+            del model
+    gc.collect()
+    try:
+        import torch
+        if torch.backends.mps.is_available():
+            torch.mps.empty_cache()
+    except Exception:
+        pass
+    return names
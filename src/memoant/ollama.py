@@ -0,0 +1,235 @@
+"""Pooled, streaming Ollama client.
+
+One OllamaClient is shared by every structuring call in the process:
+
+- keep-alive HTTP connections are pooled per endpoint and reused;
+- /api/generate is streamed, and the request is dropped as soon as the
+  response holds one complete JSON object, so trailing tokens are never
+  generated;
+- every request carries a keep_alive hint so Ollama keeps the model loaded
+  between files;
+- with several endpoints (ollama_urls), each request goes to the one with
+  the fewest requests in flight, and an endpoint that fails is skipped for
+  an exponentially growing backoff.
+
+Only the standard library is used, so the client can be pointed at a stub
+http.server for testing.
+"""
+
+import http.client
+import json
+import threading
+import time
+from urllib.parse import urlsplit
+
+from .config import (
+    OLLAMA_BACKOFF_SECONDS,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_TIMEOUT_SECONDS,
+    OLLAMA_URL,
+    OLLAMA_URLS,
+)
+
+MAX_BACKOFF_SECONDS = 60.0
+MAX_IDLE_CONNECTIONS = 4  # per endpoint
+
+
+def json_end(text: str) -> int | None:
+    """Index just past the first complete top-level JSON object in text,
+    or None if it is not complete yet."""
+    depth = 0
+    in_string = escaped = False
+    for i, ch in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"' and depth:
+            in_string = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                return i + 1
+    return None
+
+
+class Endpoint:
+    """One Ollama server: idle connections, load and failure state."""
+
+    def __init__(self, url: str, timeout: float):
+        parts = urlsplit(url)
+        self.url = url
+        self.host = parts.hostname or "127.0.0.1"
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.https = parts.scheme == "https"
+        self.timeout = timeout
+        self.in_flight = 0
+        self.failures = 0
+        self.down_until = 0.0
+        self._idle = []
+
+    def connect(self) -> tuple[http.client.HTTPConnection, bool]:
+        """An idle pooled connection (reused=True) or a new one."""
+        if self._idle:
+            return self._idle.pop(), True
+        return self.new_connection(), False
+
+    def new_connection(self) -> http.client.HTTPConnection:
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return cls(self.host, self.port, timeout=self.timeout)
+
+    def release(self, conn: http.client.HTTPConnection, reusable: bool):
+        if reusable and len(self._idle) < MAX_IDLE_CONNECTIONS:
+            self._idle.append(conn)
+        else:
+            conn.close()
+
+
+class OllamaClient:
+    """Thread-safe client for /api/generate across one or more endpoints."""
+
+    def __init__(
+        self,
+        urls: list[str],
+        keep_alive: str | int = OLLAMA_KEEP_ALIVE,
+        timeout: float = OLLAMA_TIMEOUT_SECONDS,
+        backoff: float = OLLAMA_BACKOFF_SECONDS,
+    ):
+        if not urls:
+            raise RuntimeError("No Ollama endpoints configured")
+        self.endpoints = [Endpoint(url.rstrip("/"), timeout) for url in urls]
+        self.keep_alive = keep_alive
+        self.backoff = backoff
+        self._lock = threading.Lock()
+
+    def _checkout(self) -> tuple[Endpoint, http.client.HTTPConnection, bool]:
+        """Least-loaded endpoint that is not backing off. If all are, wait
+        for the one that comes back first."""
+        while True:
+            with self._lock:
+                now = time.time()
+                ready = [e for e in self.endpoints if e.down_until <= now]
+                if ready:
+                    endpoint = min(ready, key=lambda e: (e.in_flight, e.failures))
+                    endpoint.in_flight += 1
+                    return (endpoint, *endpoint.connect())
+                wait = min(e.down_until for e in self.endpoints) - now
+            time.sleep(max(wait, 0.05))
+
+    def _checkin(self, endpoint: Endpoint, conn, ok: bool, reusable: bool):
+        with self._lock:
+            endpoint.in_flight -= 1
+            endpoint.release(conn, ok and reusable)
+            if ok:
+                endpoint.failures = 0
+                endpoint.down_until = 0.0
+            else:
+                endpoint.failures += 1
+                delay = min(MAX_BACKOFF_SECONDS, self.backoff * 2 ** (endpoint.failures - 1))
+                endpoint.down_until = time.time() + delay
+
+    def generate(
+        self,
+        model: str,
+        prompt: str,
+        options: dict | None = None,
+        retries: int = 2,
+        stop_on_json: bool = True,
+        **params,
+    ) -> dict:
+        """Stream one generation and return the assembled response.
+
+        Returns {"response", "eval_count", "total_duration", "endpoint",
+        "aborted"}. With stop_on_json the stream is dropped once the
+        response contains a complete JSON object (aborted=True). Extra
+        params (e.g. format) are passed through in the request body.
+        Connection errors and 5xx responses are retried on the
+        least-loaded healthy endpoint; raises RuntimeError once retries
+        are used up, or straight away if Ollama rejects the request (4xx).
+        """
+        body = json.dumps({
+            "model": model,
+            "prompt": prompt,
+            "stream": True,
+            "keep_alive": self.keep_alive,
+            "options": options or {},
+            **params,
+        }).encode()
+
+        error = None
+        for _ in range(retries + 1):
+            endpoint, conn, reused = self._checkout()
+            ok = reusable = False
+            try:
+                try:
+                    result = self._stream(conn, body, stop_on_json)
+                except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                    if not reused:
+                        raise
+                    # The server closed the idle keep-alive connection
+                    conn.close()
+                    conn = endpoint.new_connection()
+                    result = self._stream(conn, body, stop_on_json)
+                result["endpoint"] = endpoint.url
+                ok, reusable = True, not result["aborted"]
+                return result
+            except RuntimeError:
+                ok = True  # the endpoint is fine, the request is not
+                raise
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                error = f"{endpoint.url}: {e}"
+            finally:
+                self._checkin(endpoint, conn, ok, reusable)
+        raise RuntimeError(f"Ollama request failed: {error}")
+
+    def _stream(self, conn, body: bytes, stop_on_json: bool) -> dict:
+        start = time.time()
+        conn.request("POST", "/api/generate", body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        if resp.status != 200:
+            detail = resp.read()[:300].decode(errors="replace")
+            if 400 <= resp.status < 500:
+                raise RuntimeError(f"Ollama rejected the request: HTTP {resp.status}: {detail}")
+            raise http.client.HTTPException(f"HTTP {resp.status}: {detail}")
+
+        pieces = []
+        text = ""
+        chunks = 0
+        while True:
+            line = resp.readline()
+            if not line:
+                raise http.client.IncompleteRead(text.encode())
+            if not line.strip():
+                continue
+            msg = json.loads(line)
+            if msg.get("error"):
+                raise http.client.HTTPException(msg["error"])
+            pieces.append(msg.get("response", ""))
+            chunks += 1
+            if msg.get("done"):
+                resp.read()  # drain the chunked terminator so the connection is reusable
+                return {
+                    "response": "".join(pieces),
+                    "eval_count": msg.get("eval_count", chunks),
+                    "total_duration": msg.get("total_duration", (time.time() - start) * 1e9),
+                    "aborted": False,
+                }
+            if stop_on_json and "}" in pieces[-1]:
+                text = "".join(pieces)
+                end = json_end(text)
+                if end is not None:
+                    # Closing the connection makes Ollama stop generating
+                    return {
+                        "response": text[:end],
+                        "eval_count": chunks,
+                        "total_duration": (time.time() - start) * 1e9,
+                        "aborted": True,
+                    }
+
+
+client = OllamaClient(OLLAMA_URLS or [OLLAMA_URL])
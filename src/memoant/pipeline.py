@@ -1,24 +1,68 @@
 """Full processing pipeline: audio file -> Oracle DB record + Obsidian note."""
 
-import hashlib
 import os
 import shutil
+import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 
-from . import audio, chunker, db, merge, structure
+from . import (
+    audio,
+    checkpoint,
+    chunker,
+    classifier,
+    compact,
+    compress,
+    db,
+    fingerprint,
+    live,
+    merge,
+    probe,
+    scheduler,
+    structure,
+)
 from .calendar_match import find_overlapping_event
-from .config import ARCHIVE_DIR, NOTES_DIR, ORACLE_DB, TMP_DIR, ensure_dirs
+from .checkpoint import CheckpointStore, stage_key
+from .config import (
+    ARCHIVE_DIR,
+    AUDIO_SAMPLE_RATE,
+    COMPACT_SPEECH,
+    COMPRESS_TRANSCRIPT,
+    LLM_CACHE_ENABLED,
+    LLM_STRATEGY,
+    LLM_WINDOW_CHARS,
+    NOTES_DIR,
+    OLLAMA_MODEL,
+    ORACLE_DB,
+    PCM_DIR,
+    PREVIEW_NOTES,
+    PROBE_ENABLED,
+    PROBE_MIN_FILE_SECONDS,
+    PROBE_MIN_SPEECH_SECONDS,
+    PROBE_REJECT_WINDOWS,
+    PROBE_SPARSE_PENALTY_SECONDS,
+    PROBE_WINDOW_SECONDS,
+    PROBE_WINDOWS,
+    SILENCE_THRESHOLD,
+    TMP_DIR,
+    TRANSCRIBE_WORKERS,
+    WHISPER_MODEL,
+    ensure_dirs,
+)
 from .markdown import generate_note
+from .recorder import find_sidecar
+from .words import WordTable
+
+# Decodes started while a new file is still being hashed
+_decode_pool = ThreadPoolExecutor(thread_name_prefix="memoant-decode")
+# Preview notes (small-model summary + note), off the stage threads
+_preview_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="memoant-preview")
 
 
 def file_hash(path: str) -> str:
-    """SHA256 hash of file contents (dedup key)."""
-    h = hashlib.sha256()
-    with open(path, "rb") as f:
-        for chunk in iter(lambda: f.read(8192), b""):
-            h.update(chunk)
-    return h.hexdigest()
+    """Content hash of the file (dedup key), ignoring the fingerprint index."""
+    return fingerprint.hash_file(path)
 
 
 def get_recorded_at(path: str) -> str:
@@ -40,9 +84,21 @@ def process_file(
     skip_diarization: bool = False,
     force: bool = False,
     mode: str = "auto",
+    from_stage: str | None = None,
+    file_id: str | None = None,
+    priority: float | None = None,
+    compact: bool | None = None,
+    probe: bool | None = None,
+    preview: bool | None = None,
+    llm_cache: bool | None = None,
+    live_dir: str | None = None,
 ) -> dict:
     """Process a single audio file through the full pipeline.
 
+    Runs the four pipeline stages (prepare, speech, structure, write) back
+    to back. executor.run_pipelined() runs the same stages overlapped
+    across several files.
+
     Args:
         input_path: path to audio file (.m4a, .wav, etc.)
         db_path: path to oracle.db
@@ -50,87 +106,358 @@ def process_file(
         skip_diarization: skip speaker diarization (faster, single-speaker)
         force: reprocess even if file_id exists in DB
         mode: auto | meeting | dictation (hints for structuring)
+        from_stage: invalidate this stage's checkpoint and everything
+            downstream of it (implies force). One of checkpoint.STAGES.
+        file_id: precomputed file_hash(input_path), skips hashing and the
+            fingerprint lookup
+        priority: expected cost in seconds; lower values get accelerator
+            and I/O slots first when several jobs compete (see scheduler)
+        compact: transcribe and diarize only the detected speech regions
+            (see compact.py); None uses COMPACT_SPEECH
+        probe: sample the file before decoding it and record a
+            probe_rejected row if it is silent (see probe.py); None uses
+            PROBE_ENABLED.
+            Always off with from_stage, unless from_stage is "probe".
+        preview: write a preview note (transcript and a quick summary)
+            right after transcription and update it in place at the end;
+            None uses PREVIEW_NOTES
+        llm_cache: reuse a cached structuring result for an identical
+            transcript (see llm_cache.py); None uses LLM_CACHE_ENABLED.
+            Always off with from_stage="llm".
+        live_dir: live transcription directory of a `record --live`
+            recording; its transcript and VAD are used instead of running
+            them again (see live.py). Ignored with from_stage.
 
     Returns:
         dict with processing results and stats
     """
+    job = new_job(
+        input_path,
+        db_path=db_path,
+        notes_dir=notes_dir,
+        skip_diarization=skip_diarization,
+        force=force,
+        mode=mode,
+        from_stage=from_stage,
+        file_id=file_id,
+        priority=priority,
+        compact=compact,
+        probe=probe,
+        preview=preview,
+        llm_cache=llm_cache,
+        live_dir=live_dir,
+    )
+    for _, stage_fn in PIPELINE_STAGES:
+        stage_fn(job)
+        if "result" in job:
+            break
+    return job["result"]
+
+
+def new_job(input_path: str, **options) -> dict:
+    """Create the mutable job dict that the stage functions pass along."""
+    return {
+        "input_path": input_path,
+        "db_path": options.get("db_path", ORACLE_DB),
+        "notes_dir": options.get("notes_dir", NOTES_DIR),
+        "skip_diarization": options.get("skip_diarization", False),
+        "force": options.get("force", False) or bool(options.get("from_stage")),
+        "mode": options.get("mode", "auto"),
+        "from_stage": options.get("from_stage"),
+        "file_id": options.get("file_id"),
+        "priority": options.get("priority"),
+        "compact": COMPACT_SPEECH if options.get("compact") is None else options["compact"],
+        "regions": None,
+        "probe": (
+            (PROBE_ENABLED if options.get("probe") is None else options["probe"])
+            and options.get("from_stage") in (None, "probe")
+        ),
+        "preview": PREVIEW_NOTES if options.get("preview") is None else options["preview"],
+        "llm_cache": (
+            (LLM_CACHE_ENABLED if options.get("llm_cache") is None else options["llm_cache"])
+            and options.get("from_stage") != "llm"
+        ),
+        "live_dir": None if options.get("from_stage") else options.get("live_dir"),
+        "live": None,
+        "start_time": time.time(),
+        "pcm": {},
+    }
+
+
+def _get_samples(job: dict):
+    """Decode the input once to a memory-mapped PCM buffer (lazily -- later
+    stages may all be checkpointed)."""
+    pcm = job["pcm"]
+    if "samples" not in pcm:
+        store = job["store"]
+        pending = pcm.pop("pending", None)
+        cached = pending is None and store.load("convert", job["convert_key"])
+        if pending is not None:
+            print("  Decoding audio... (started while hashing)")
+            pcm["path"] = pending.result()
+            store.save("convert", job["convert_key"], {"pcm_path": pcm["path"]})
+        elif cached and os.path.isfile(cached["pcm_path"]):
+            print("  Decoding audio... (checkpoint)")
+            pcm["path"] = cached["pcm_path"]
+        elif pcm.get("sidecar"):
+            print("  Decoding audio... (recorder sidecar)")
+            pcm["path"] = pcm["sidecar"]
+        else:
+            print("  Decoding audio...")
+            pcm["path"] = audio.decode_pcm(job["input_path"])
+            store.save("convert", job["convert_key"], {"pcm_path": pcm["path"]})
+        pcm["samples"] = audio.load_pcm(pcm["path"])
+    return pcm["samples"]
+
+
+def _speech_samples(job: dict):
+    """The buffer transcription and diarization run on: the full recording,
+    or just its speech regions back to back when compacting."""
+    if not job["regions"]:
+        return _get_samples(job)
+    pcm = job["pcm"]
+    if "compact" not in pcm:
+        fd, pcm["compact_path"] = tempfile.mkstemp(suffix=".pcm", dir=PCM_DIR)
+        os.close(fd)
+        pcm["compact"] = compact.compact_samples(_get_samples(job), job["regions"], pcm["compact_path"])
+    return pcm["compact"]
+
+
+def _probe(job: dict) -> dict | None:
+    """probe.probe() for the job's file, checkpointed. None if it failed
+    (the full decode then reports the real error, if any)."""
+    store = job["store"]
+    key = stage_key(
+        job["file_id"], "probe", probe.PROBE_VERSION, PROBE_WINDOWS, PROBE_WINDOW_SECONDS,
+        PROBE_MIN_FILE_SECONDS, PROBE_MIN_SPEECH_SECONDS, PROBE_REJECT_WINDOWS,
+    )
+    verdict = store.load("probe", key)
+    if verdict is not None:
+        print(f"  Probing... (checkpoint: {verdict['verdict']})")
+        return verdict
+
+    print("  Probing...")
+    pending = job.pop("pending_probe", None)
+    try:
+        if pending is not None:
+            verdict = pending.result()
+        else:
+            verdict = probe.probe(job["input_path"], priority=job["priority"])
+    except (RuntimeError, ValueError, OSError) as e:
+        print(f"  Probe failed (decoding fully): {e}")
+        return None
+    store.save("probe", key, verdict)
+    return verdict
+
+
+def _write_no_speech(job: dict, verdict: dict):
+    """Record a probe rejection, so the decision is visible and the file is
+    not picked up again. The "probe_rejected" status sets these rows apart,
+    so `memoant queue requeue --probe-rejected` can retry them."""
+    database = db.open_db(job["db_path"])
+    db.ensure_schema(database)
+    db.write_audio_log(database, {
+        "file_id": job["file_id"],
+        "source_file": job["source_file"],
+        "source_path": job["source_path"],
+        "recorded_at": job["recorded_at"],
+        "duration_seconds": verdict["duration"],
+        "processed_at": datetime.now(tz=timezone.utc).isoformat(),
+        "transcript": "",
+        "transcript_plain": "",
+        "word_count": 0,
+        "segments": [],
+        "status": "probe_rejected",
+        "probe": verdict,
+    })
+    database.close()
+    checkpoint.prune()
+
+
+def prepare_stage(job: dict):
+    """Hash, dedup check, decode and VAD. Sets job["result"] on early exit."""
     ensure_dirs()
-    start_time = time.time()
+    input_path = job["input_path"]
     print(f"\n{'=' * 60}")
     print(f"Processing: {os.path.basename(input_path)}")
 
-    # Step 1: Hash for dedup
-    fid = file_hash(input_path)
+    # Our own recordings come with 16 kHz PCM already (nothing to decode).
+    # _cleanup() removes it whichever way the job ends.
+    sidecar = find_sidecar(input_path)
+    if sidecar:
+        job["pcm"]["sidecar"] = sidecar
+
+    # Step 1: Hash for dedup (unchanged files come from the fingerprint index)
+    fid = job["file_id"] or fingerprint.cached_file_id(input_path)
+    if fid is None and not sidecar:
+        # New or modified file: probe (or decode) while hashing. The work is
+        # only wasted if the content turns out to be a duplicate.
+        if job["probe"]:
+            job["pending_probe"] = _decode_pool.submit(
+                probe.probe, input_path, priority=job["priority"]
+            )
+        else:
+            job["pcm"]["pending"] = _decode_pool.submit(audio.decode_pcm, input_path)
+    if fid is None:
+        fid = fingerprint.file_id(input_path)
+    job["file_id"] = fid
     print(f"  file_id: {fid[:16]}...")
 
-    database = db.open_db(db_path)
+    database = db.open_db(job["db_path"])
     db.ensure_schema(database)
+    exists = db.file_exists(database, fid)
+    database.close()
 
-    if not force and db.file_exists(database, fid):
+    if not job["force"] and exists:
         print("  SKIP: already processed")
-        database.close()
-        return {"status": "skipped", "file_id": fid}
+        _cleanup(job["pcm"])
+        _remove_live(job)
+        job["result"] = {"status": "skipped", "file_id": fid}
+        return
+
+    job["source_file"] = os.path.basename(input_path)
+    job["source_path"] = os.path.abspath(input_path)
+    job["recorded_at"] = get_recorded_at(input_path)
 
-    source_file = os.path.basename(input_path)
-    source_path = os.path.abspath(input_path)
-    recorded_at = get_recorded_at(input_path)
+    store = CheckpointStore(fid)
+    job["store"] = store
+    if job["from_stage"]:
+        print(f"  Invalidating checkpoints from: {job['from_stage']}")
+        store.invalidate(job["from_stage"])
 
-    # Step 2: Convert to WAV
-    print("  Converting to WAV...")
-    wav_path = audio.convert_to_wav(input_path)
-    duration = audio.get_duration(wav_path)
-    print(f"  Duration: {duration:.1f}s ({duration/60:.1f}m)")
+    # Step 2: Decode (see _get_samples)
+    job["convert_key"] = stage_key(fid, "convert", AUDIO_SAMPLE_RATE, "s16le")
 
     # Step 3: VAD
-    print("  Running VAD...")
-    speech_segments = audio.detect_speech_segments(wav_path)
+    vad_key = stage_key(job["convert_key"], "vad", SILENCE_THRESHOLD)
+    job["vad_key"] = vad_key
+    vad = store.load("vad", vad_key)
+    vad_source = "checkpoint"
+
+    # Step 3a: A finished live transcript already has VAD (and the words)
+    if job["live_dir"]:
+        job["live"] = live.load(job["live_dir"])
+        if vad is None and job["live"] is not None:
+            vad = {
+                "duration": job["live"]["duration"],
+                "speech_segments": job["live"]["speech_segments"],
+            }
+            store.save("vad", vad_key, vad)
+            vad_source = "live"
+
+    # Step 3b: Probe sampled windows before paying for the full decode
+    if vad is None and job["probe"] and "sidecar" not in job["pcm"]:
+        verdict = _probe(job)
+        if verdict and verdict["verdict"] == "silent":
+            print(f"  SKIP: probe says silent ({verdict['reason']})")
+            _cleanup(job["pcm"])
+            _remove_live(job)
+            _write_no_speech(job, verdict)
+            job["result"] = {
+                "status": "no_speech", "file_id": fid,
+                "duration": verdict["duration"], "probe": verdict,
+            }
+            return
+        if verdict and verdict["verdict"] == "sparse":
+            print(f"  Probe: little speech ({verdict['reason']}), deprioritized")
+            job["priority"] = (job["priority"] or 0) + PROBE_SPARSE_PENALTY_SECONDS
+
+    if vad is None:
+        with scheduler.io.acquire(job["priority"]):
+            samples = _get_samples(job)
+            duration = audio.pcm_duration(samples)
+            print(f"  Duration: {duration:.1f}s ({duration/60:.1f}m)")
+            print("  Running VAD...")
+            vad = {
+                "duration": duration,
+                "speech_segments": audio.detect_speech_segments(samples),
+            }
+        store.save("vad", vad_key, vad)
+    else:
+        print(f"  Duration: {vad['duration']:.1f}s ({vad['duration']/60:.1f}m)")
+        print(f"  Running VAD... ({vad_source})")
+    duration = vad["duration"]
+    job["duration"] = duration
+    speech_segments = vad["speech_segments"]
     speech_duration = audio.total_speech_duration(speech_segments)
     print(f"  Speech: {speech_duration:.1f}s ({len(speech_segments)} segments)")
 
     if speech_duration < 1.0:
         print("  SKIP: less than 1 second of speech detected")
-        _cleanup(wav_path)
-        database.close()
-        return {"status": "no_speech", "file_id": fid, "duration": duration}
+        _cleanup(job["pcm"])
+        _remove_live(job)
+        job["result"] = {"status": "no_speech", "file_id": fid, "duration": duration}
+        return
 
     # Step 4: Plan chunks (if needed)
-    silence_gaps = chunker.find_silence_gaps(speech_segments)
-    chunks = chunker.plan_chunks(duration, silence_gaps)
-    print(f"  Chunks: {len(chunks)}")
+    if job["compact"]:
+        # Transcribe/diarize only the speech; chunk at the joins between regions
+        regions = compact.plan_regions(speech_segments, duration)
+        job["regions"] = regions
+        speech_seconds = compact.compact_duration(regions)
+        job["compute_saved"] = 1 - speech_seconds / duration
+        print(
+            f"  Compacted: {duration:.1f}s -> {speech_seconds:.1f}s "
+            f"({job['compute_saved']:.0%} less audio to transcribe and diarize)"
+        )
+        job["chunks"] = chunker.plan_chunks(
+            speech_seconds, compact.junctions(regions), workers=TRANSCRIBE_WORKERS
+        )
+    else:
+        silence_gaps = chunker.find_silence_gaps(speech_segments)
+        job["chunks"] = chunker.plan_chunks(duration, silence_gaps, workers=TRANSCRIBE_WORKERS)
+    print(f"  Chunks: {len(job['chunks'])}")
+
+
+def speech_stage(job: dict):
+    """Transcription, diarization and word/speaker merge (accelerator work)."""
+    store = job["store"]
+    duration = job["duration"]
+
+    # Compacted runs see different audio, so they get their own checkpoints
+    regions = job["regions"]
+    compaction = [("compact", regions)] if regions else []
 
     # Step 5: Transcribe
-    print("  Transcribing...")
-    if len(chunks) == 1:
-        from .transcribe import transcribe
-        transcript_result = transcribe(wav_path)
+    transcribe_key = stage_key(
+        job["vad_key"], "transcribe", WHISPER_MODEL, job["chunks"], *compaction
+    )
+    transcript_result = store.load("transcribe", transcribe_key)
+    if transcript_result is not None:
+        print("  Transcribing... (checkpoint)")
+        words = WordTable.from_json(transcript_result["words"])
+    elif job["live"] is not None:
+        print("  Transcribing... (live)")
+        # Live words are already in recording time, compacted or not
+        transcript_result = job["live"]["transcript"]
+        words = transcript_result["words"]
+        store.save("transcribe", transcribe_key, {**transcript_result, "words": words.to_json()})
     else:
-        from .transcribe import transcribe_chunk
-        all_text = []
-        all_words = []
-        all_segments = []
-        for i, chunk in enumerate(chunks):
-            print(f"    Chunk {i+1}/{len(chunks)}: {chunk['start']:.0f}s - {chunk['end']:.0f}s")
-            result = transcribe_chunk(wav_path, chunk["start"], chunk["end"])
-            all_text.append(result["text"])
-            all_words.extend(result["words"])
-            all_segments.extend(result["segments"])
-        transcript_result = {
-            "text": " ".join(all_text),
-            "words": all_words,
-            "segments": all_segments,
-        }
+        print("  Transcribing...")
+        samples = _speech_samples(job)
+        pcm_path = job["pcm"]["compact_path"] if regions else job["pcm"]["path"]
+        transcript_result = _transcribe(samples, job["chunks"], job["priority"], pcm_path)
+        words = transcript_result["words"]
+        if regions:
+            words = compact.map_words(words, regions)
+            compact.map_points(transcript_result["segments"], regions)
+        store.save("transcribe", transcribe_key, {**transcript_result, "words": words.to_json()})
 
     plain_text = transcript_result["text"]
-    words = transcript_result["words"]
-    word_count = len(plain_text.split())
-    print(f"  Words: {word_count}")
+    job["plain_text"] = plain_text
+    job["word_count"] = len(plain_text.split())
+    print(f"  Words: {job['word_count']}")
+
+    # Step 5a: Preview note while diarization and structuring run
+    if job["preview"] and job["word_count"]:
+        job["preview_note"] = _preview_pool.submit(_write_preview, job, words)
 
     # Step 6: Diarization (optional)
     # In dictation mode or short recordings, skip diarization
     should_diarize = (
-        not skip_diarization
+        not job["skip_diarization"]
         and duration > 10
-        and mode != "dictation"
+        and job["mode"] != "dictation"
     )
 
     speaker_count = 1
@@ -138,24 +465,50 @@ def process_file(
     speaker_transcript = plain_text
     conversation_segments = []
 
+    diarize_key = stage_key(job["convert_key"], "diarize", should_diarize, *compaction)
+    job["merge_key"] = merge_key = stage_key(transcribe_key, diarize_key, "merge")
+
     if should_diarize:
-        print("  Diarizing...")
-        try:
-            from .diarize import diarize, get_speaker_labels
-            diarization_segments = diarize(wav_path)
+        diarization_segments = store.load("diarize", diarize_key)
+        if diarization_segments is not None:
+            print("  Diarizing... (checkpoint)")
+        else:
+            print("  Diarizing...")
+            try:
+                from .diarize import diarize
+                samples = _speech_samples(job)
+                with scheduler.accelerator.acquire(job["priority"]):
+                    diarization_segments = diarize(samples)
+                if regions:
+                    diarization_segments = compact.map_intervals(diarization_segments, regions)
+                store.save("diarize", diarize_key, diarization_segments)
+            except Exception as e:
+                print(f"  Diarization failed (proceeding without): {e}")
+
+        if diarization_segments is not None:
+            from .diarize import get_speaker_labels
             speakers = get_speaker_labels(diarization_segments)
             speaker_count = len(speakers)
             print(f"  Speakers: {speaker_count} ({', '.join(speakers)})")
 
             # Step 7: Merge words + speakers
-            if words and diarization_segments:
-                labeled_words = merge.assign_speakers(words, diarization_segments)
-                speaker_transcript = merge.build_speaker_transcript(labeled_words)
-                conversation_segments = merge.build_segments(labeled_words)
-        except Exception as e:
-            print(f"  Diarization failed (proceeding without): {e}")
+            if len(words) and diarization_segments:
+                merged = store.load("merge", merge_key)
+                # Checkpoints from before word tables were stored lack "words"
+                if merged is None or "words" not in merged:
+                    words = merge.assign_speakers(words, diarization_segments)
+                    merged = {
+                        "speaker_transcript": merge.build_speaker_transcript(words),
+                        "segments": merge.build_segments(words),
+                        "words": words.to_json(),
+                    }
+                    store.save("merge", merge_key, merged)
+                words = WordTable.from_json(merged["words"])
+                speaker_transcript = merged["speaker_transcript"]
+                conversation_segments = merged["segments"]
     else:
         # Single speaker, build simple segments
+        words = words.with_speakers(["SPEAKER_00"] * len(words))
         conversation_segments = [{
             "speaker": "SPEAKER_00",
             "start": 0.0,
@@ -163,15 +516,122 @@ def process_file(
             "text": plain_text,
         }]
 
+    # Audio is no longer needed once transcription and diarization are done
+    _cleanup(job["pcm"])
+
+    job["speaker_count"] = speaker_count
+    job["speakers"] = speakers
+    job["speaker_transcript"] = speaker_transcript
+    job["segments"] = conversation_segments
+    job["words"] = words
+
+
+def _preview_record(job: dict, words: WordTable) -> dict:
+    return {
+        "file_id": job["file_id"],
+        "source_file": job["source_file"],
+        "source_path": job["source_path"],
+        "recorded_at": job["recorded_at"],
+        "duration_seconds": job["duration"],
+        "processed_at": datetime.now(tz=timezone.utc).isoformat(),
+        "transcript": job["plain_text"],
+        "transcript_plain": job["plain_text"],
+        "word_count": job["word_count"],
+        "segments": [],
+        "words": words,
+        "status": "preview",
+    }
+
+
+def _write_preview(job: dict, words: WordTable):
+    """Quick summary, then the preview note and a preview DB row. Runs on
+    _preview_pool while diarization and structuring continue. Skipped when
+    a finished record exists (--force), so a failed rerun cannot replace
+    a complete record or note with a preview."""
+    database = db.open_db(job["db_path"])
+    db.ensure_schema(database)
+    finished = db.file_exists(database, job["file_id"])
+    database.close()
+    if finished:
+        print("  Preview skipped (finished record exists)")
+        return
+
+    record = _preview_record(job, words)
+    # Not under a slot: the Ollama call would hold up decodes and DB writes
+    record["summary"] = structure.quick_summary(job["plain_text"])
+    with scheduler.io.acquire(job["priority"]):
+        database = db.open_db(job["db_path"])
+        # A previous run that stopped after its preview reuses that note
+        note_path = db.preview_note_path(database, job["file_id"])
+        job["note_path"] = generate_note(record, job["notes_dir"], path=note_path, preview=True)
+        job["first_note_seconds"] = time.time() - job["start_time"]
+        record["note_path"] = job["note_path"]
+        record["first_note_seconds"] = job["first_note_seconds"]
+        db.write_audio_log(database, record)
+        database.close()
+    print(f"  Preview note: {job['note_path']} ({job['first_note_seconds']:.1f}s)")
+
+
+def structure_stage(job: dict):
+    """LLM structuring via Ollama."""
+    store = job["store"]
+    mode = job["mode"]
+
+    # Step 8a: Local classifier for the categorical fields it is sure about
+    started = time.perf_counter()
+    known = classifier.classify(job["plain_text"], job["speaker_count"], job["duration"])
+    if known:
+        filled = ", ".join(f"{k}={v}" for k, v in known.items())
+        print(f"  Classifier: {filled} ({(time.perf_counter() - started) * 1000:.0f}ms)")
+
     # Step 8: LLM structuring
-    print("  Extracting structure (Ollama)...")
-    structured = structure.extract_structure(
-        speaker_transcript if speaker_transcript else plain_text
+    llm_input = job["speaker_transcript"] if job["speaker_transcript"] else job["plain_text"]
+    compression = None
+    if COMPRESS_TRANSCRIPT:
+        llm_input, compression = compress.compress_transcript(llm_input)
+        before, after = compression["tokens_before"], compression["tokens_after"]
+        if before:
+            print(
+                f"  Compressed transcript: ~{before:,} -> ~{after:,} tokens "
+                f"({1 - after / before:.0%} saved)"
+            )
+    # Map-reduce and the per-field strategy have their own prompts
+    map_reduce = (
+        [("map_reduce", LLM_WINDOW_CHARS, structure.WINDOW_PROMPT, structure.MERGE_PROMPT)]
+        if len(llm_input) > LLM_WINDOW_CHARS else []
+    )
+    fields = (
+        [("fields", structure.FIELD_PROMPTS)]
+        if LLM_STRATEGY == "fields" and not map_reduce else []
+    )
+    llm_key = stage_key(
+        job["merge_key"], "llm", OLLAMA_MODEL, structure.EXTRACT_PROMPT, llm_input,
+        *map_reduce, *fields, *([("known", known)] if known else []),
     )
+    structured = store.load("llm", llm_key)
+    if structured is not None:
+        print("  Extracting structure (Ollama)... (checkpoint)")
+    else:
+        with scheduler.io.acquire(job["priority"]):
+            structured = structure.extract_structure(
+                llm_input, use_cache=job["llm_cache"], known=known
+            )
+        cached = structured.pop("_cached", False)
+        print(f"  Extracting structure (Ollama)...{' (cache)' if cached else ''}")
+        # Failed extractions are not checkpointed so a rerun retries them
+        if not structured.get("error"):
+            store.save("llm", llm_key, structured)
 
     llm_error = structured.pop("error", None)
-    llm_tokens = structured.pop("_tokens", 0)
-    llm_duration = structured.pop("_duration", 0)
+    structured.pop("_tokens", 0)
+    structured.pop("_duration", 0)
+    llm_stats = structured.pop("_llm", None)
+    if llm_stats and (llm_stats["retries"] or llm_stats["outcomes"].get("repaired")):
+        outcomes = ", ".join(f"{k} {v}" for k, v in sorted(llm_stats["outcomes"].items()))
+        print(
+            f"  LLM: {llm_stats['generations']} generations ({outcomes}), "
+            f"{llm_stats['wasted_seconds']:.1f}s discarded"
+        )
     if llm_error:
         print(f"  LLM warning: {llm_error}")
     else:
@@ -184,8 +644,36 @@ def process_file(
     elif mode == "dictation":
         structured["conversation_type"] = "dictation"
 
+    job["structured"] = structured
+    job["llm_error"] = llm_error
+    llm_stats = dict(llm_stats or {})
+    if compression:
+        llm_stats["compression"] = compression
+    if known:
+        # Not LLM labels: classifier.load_examples() leaves these out
+        llm_stats["classified"] = sorted(known)
+    job["llm_stats"] = llm_stats or None
+
+
+def write_stage(job: dict):
+    """Calendar match, Oracle DB record, Obsidian note and archive copy."""
+    # Before taking a slot: the preview needs one of its own to finish
+    if "preview_note" in job:
+        try:
+            job.pop("preview_note").result()
+        except Exception as e:
+            print(f"  Preview note failed: {e}")
+    with scheduler.io.acquire(job["priority"]):
+        _write(job)
+
+
+def _write(job: dict):
+    structured = job["structured"]
+    duration = job["duration"]
+    source_file = job["source_file"]
+
     # Step 9: Calendar match
-    cal_match = find_overlapping_event(recorded_at, duration, db_path)
+    cal_match = find_overlapping_event(job["recorded_at"], duration, job["db_path"])
     cal_event_id = None
     cal_event_title = None
     if cal_match:
@@ -193,21 +681,21 @@ def process_file(
         cal_event_title = cal_match["title"]
         print(f"  Calendar match: {cal_event_title}")
 
-    # Step 10: Write to DB
-    processing_time = time.time() - start_time
+    processing_time = time.time() - job["start_time"]
     record = {
-        "file_id": fid,
+        "file_id": job["file_id"],
         "source_file": source_file,
-        "source_path": source_path,
-        "recorded_at": recorded_at,
+        "source_path": job["source_path"],
+        "recorded_at": job["recorded_at"],
         "duration_seconds": duration,
         "processed_at": datetime.now(tz=timezone.utc).isoformat(),
-        "transcript": speaker_transcript,
-        "transcript_plain": plain_text,
-        "word_count": word_count,
-        "speaker_count": speaker_count,
-        "speakers": speakers if speakers else None,
-        "segments": conversation_segments,
+        "transcript": job["speaker_transcript"],
+        "transcript_plain": job["plain_text"],
+        "word_count": job["word_count"],
+        "speaker_count": job["speaker_count"],
+        "speakers": job["speakers"] if job["speakers"] else None,
+        "segments": job["segments"],
+        "words": job["words"],
         "summary": structured.get("summary"),
         "topics": structured.get("topics"),
         "action_items": structured.get("action_items"),
@@ -221,48 +709,128 @@ def process_file(
         "calendar_event_id": cal_event_id,
         "calendar_event_title": cal_event_title,
         "processing_time_seconds": processing_time,
-        "error": llm_error,
+        "error": job["llm_error"],
+        "llm_stats": job["llm_stats"],
     }
 
-    print("  Writing to Oracle DB...")
-    db.write_audio_log(database, record)
-    database.close()
+    database = db.open_db(job["db_path"])
+    db.ensure_schema(database)
 
-    # Step 11: Generate Obsidian note
+    # Step 10: Generate Obsidian note (replaces the preview note in place;
+    # written before the DB row, which records its path)
     print("  Generating Obsidian note...")
-    note_path = generate_note(record, notes_dir)
+    preview_path = job.get("note_path") or db.preview_note_path(database, job["file_id"])
+    note_path = generate_note(record, job["notes_dir"], path=preview_path)
     print(f"  Note: {note_path}")
+    record["note_path"] = note_path
+    record["first_note_seconds"] = job.get("first_note_seconds", time.time() - job["start_time"])
+
+    # Step 11: Write to DB
+    print("  Writing to Oracle DB...")
+    db.write_audio_log(database, record)
+    database.close()
+    # Kept for reruns (--force after an LLM failure, --from-stage), within limits
+    checkpoint.prune()
 
     # Step 12: Archive
     archive_path = os.path.join(ARCHIVE_DIR, source_file)
     if not os.path.exists(archive_path):
-        shutil.copy2(input_path, archive_path)
+        shutil.copy2(job["input_path"], archive_path)
         print(f"  Archived: {archive_path}")
+    _remove_live(job)
 
     # Cleanup
-    _cleanup(wav_path)
+    _cleanup(job["pcm"])
 
     print(f"  Done in {processing_time:.1f}s")
     print(f"{'=' * 60}")
 
-    return {
+    job["result"] = {
         "status": "processed",
-        "file_id": fid,
+        "file_id": job["file_id"],
         "duration": duration,
-        "word_count": word_count,
-        "speaker_count": speaker_count,
+        "word_count": job["word_count"],
+        "speaker_count": job["speaker_count"],
         "sphere": structured.get("sphere"),
         "conversation_type": structured.get("conversation_type"),
         "summary": structured.get("summary"),
         "note_path": note_path,
         "processing_time": processing_time,
+        "first_note_seconds": record["first_note_seconds"],
+        "compute_saved": job.get("compute_saved"),
     }
 
 
-def _cleanup(wav_path: str):
-    """Remove temporary WAV file."""
-    try:
-        if os.path.exists(wav_path) and TMP_DIR in wav_path:
-            os.unlink(wav_path)
-    except OSError:
-        pass
+# (name, function) in execution order
+PIPELINE_STAGES = [
+    ("prepare", prepare_stage),
+    ("speech", speech_stage),
+    ("structure", structure_stage),
+    ("write", write_stage),
+]
+
+
+def _transcribe(
+    samples, chunks: list[dict], priority: float | None = None, pcm_path: str | None = None
+) -> dict:
+    """Transcribe a sample buffer, chunks concurrently if the plan has several.
+
+    Each chunk takes a slot separately, so other jobs can be scheduled
+    between the chunks of a long recording. With TRANSCRIBE_WORKERS > 1 the
+    chunks of pcm_path (the file behind samples) run in the Whisper worker
+    processes (transcribe.transcribe_file_chunk) under scheduler.transcribe;
+    otherwise one at a time in-process under scheduler.accelerator.
+    """
+    from .transcribe import transcribe, transcribe_chunk, transcribe_file_chunk
+
+    if len(chunks) == 1:
+        with scheduler.accelerator.acquire(priority):
+            return transcribe(samples)
+
+    workers = min(TRANSCRIBE_WORKERS, len(chunks)) if pcm_path else 1
+
+    def run(i: int, chunk: dict) -> dict:
+        label = f"    Chunk {i+1}/{len(chunks)}: {chunk['start']:.0f}s - {chunk['end']:.0f}s"
+        if workers > 1:
+            with scheduler.transcribe.acquire(priority):
+                print(label)
+                return transcribe_file_chunk(pcm_path, chunk["audio_start"], chunk["audio_end"])
+        with scheduler.accelerator.acquire(priority):
+            print(label)
+            return transcribe_chunk(samples, chunk["audio_start"], chunk["audio_end"])
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(run, range(len(chunks)), chunks))
+    return chunker.stitch_transcripts(results, chunks)
+
+
+def _cleanup(pcm: dict):
+    """Release the sample buffer and remove its temporary PCM file (and the
+    recorder sidecar, if there was one)."""
+    pcm.pop("samples", None)
+    pcm.pop("compact", None)
+    pending = pcm.pop("pending", None)
+    if pending is not None:
+        # Decode started while hashing but never used; remove it once done
+        pending.add_done_callback(_discard_decode)
+    for path in (pcm.get("path"), pcm.pop("compact_path", None)):
+        try:
+            if path and os.path.exists(path) and (TMP_DIR in path or PCM_DIR in path):
+                os.unlink(path)
+        except OSError:
+            pass
+    sidecar = pcm.pop("sidecar", None)
+    if sidecar and os.path.exists(sidecar):
+        os.unlink(sidecar)
+
+
+def _remove_live(job: dict):
+    """Remove the live transcription directory once the file has an outcome
+    (a failed job keeps it for the retry)."""
+    if job["live_dir"]:
+        shutil.rmtree(job["live_dir"], ignore_errors=True)
+
+
+def _discard_decode(future):
+    if future.exception() is None:
+        _cleanup({"path": future.result()})
@@ -0,0 +1,131 @@
+"""Cheap pre-check for recordings that are almost certainly silent.
+
+Pocket recordings and accidental Voice Memos can be an hour of nothing.
+Before the full decode, probe() reads the container metadata and decodes
+PROBE_WINDOWS short windows spread across the recording, then runs VAD on
+just those. Verdicts:
+
+    "silent"  no audio stream, under a second long, or no speech in any of
+              at least PROBE_REJECT_WINDOWS windows -> the pipeline
+              records no_speech without decoding
+    "sparse"  less than PROBE_MIN_SPEECH_SECONDS of speech in the windows
+              (or none, in fewer windows than PROBE_REJECT_WINDOWS) ->
+              processed, but behind other work
+    "speech"  processed normally
+    "short"   too short to be worth probing (the full decode is cheap)
+
+The windows cover only a few percent of a long recording, so a window-based
+rejection can lose speech that fell between them. scripts/eval_probe.py
+measures the false-rejection rate on a fixture set to tune the threshold,
+and `memoant queue requeue --probe-rejected` processes rejected files again
+without the probe.
+"""
+
+import json
+import subprocess
+
+import numpy as np
+
+from . import audio, scheduler
+from .config import (
+    AUDIO_SAMPLE_RATE,
+    PROBE_MIN_FILE_SECONDS,
+    PROBE_MIN_SPEECH_SECONDS,
+    PROBE_REJECT_WINDOWS,
+    PROBE_WINDOW_SECONDS,
+    PROBE_WINDOWS,
+)
+
+# Part of the checkpoint key: bump when verdict rules change
+PROBE_VERSION = 3
+
+
+def container_info(path: str) -> dict:
+    """Duration and number of audio streams, from one ffprobe call."""
+    cmd = [
+        "ffprobe",
+        "-v", "quiet",
+        "-show_entries", "format=duration:stream=codec_type",
+        "-of", "json",
+        path,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffprobe failed: {result.stderr[:500]}")
+    info = json.loads(result.stdout or "{}")
+    streams = info.get("streams", [])
+    return {
+        "duration": float(info.get("format", {}).get("duration") or 0.0),
+        "audio_streams": sum(1 for s in streams if s.get("codec_type") == "audio"),
+    }
+
+
+def decode_window(path: str, start: float, seconds: float) -> np.ndarray:
+    """Decode [start, start + seconds) to 16kHz mono int16 (input seeking,
+    so only the window is read)."""
+    cmd = [
+        "ffmpeg",
+        "-v", "error",
+        "-ss", f"{start:.3f}",
+        "-t", f"{seconds:.3f}",
+        "-i", path,
+        "-vn",
+        "-ar", str(AUDIO_SAMPLE_RATE),
+        "-ac", "1",
+        "-f", "s16le",
+        "-",
+    ]
+    result = subprocess.run(cmd, capture_output=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr[:500]!r}")
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+
+def window_starts(duration: float, windows: int, seconds: float) -> list[float]:
+    """Evenly spaced window starts covering the recording end to end."""
+    if windows <= 1:
+        return [max(0.0, duration / 2 - seconds / 2)]
+    step = (duration - seconds) / (windows - 1)
+    return [round(i * step, 3) for i in range(windows)]
+
+
+def probe(
+    path: str,
+    windows: int = PROBE_WINDOWS,
+    window_seconds: float = PROBE_WINDOW_SECONDS,
+    min_file_seconds: float = PROBE_MIN_FILE_SECONDS,
+    min_speech_seconds: float = PROBE_MIN_SPEECH_SECONDS,
+    reject_windows: int = PROBE_REJECT_WINDOWS,
+    priority: float | None = None,
+) -> dict:
+    """Classify a recording without decoding all of it.
+
+    Window decodes and VAD take an io slot (scheduler.io) at `priority`.
+    Returns {"verdict", "reason", "duration", "windows", "speech_seconds"}.
+    """
+    info = container_info(path)
+    duration = info["duration"]
+    result = {"duration": duration, "windows": 0, "speech_seconds": 0.0}
+
+    if info["audio_streams"] == 0:
+        return {**result, "verdict": "silent", "reason": "no audio stream"}
+    if duration < 1.0:
+        return {**result, "verdict": "silent", "reason": "shorter than 1s"}
+    if duration < max(min_file_seconds, windows * window_seconds):
+        return {**result, "verdict": "short", "reason": "full decode is cheap"}
+
+    speech = 0.0
+    with scheduler.io.acquire(priority):
+        for start in window_starts(duration, windows, window_seconds):
+            samples = decode_window(path, start, window_seconds)
+            if len(samples):
+                speech += audio.total_speech_duration(audio.detect_speech_segments(samples))
+            result["windows"] += 1
+    result["speech_seconds"] = round(speech, 2)
+
+    if speech == 0:
+        verdict = "silent" if reject_windows and result["windows"] >= reject_windows else "sparse"
+        return {**result, "verdict": verdict, "reason": f"no speech in {result['windows']} windows"}
+    if speech < min_speech_seconds:
+        return {**result, "verdict": "sparse", "reason": f"{speech:.1f}s speech in windows"}
+    return {**result, "verdict": "speech", "reason": f"{speech:.1f}s speech in windows"}
@@ -4,12 +4,16 @@ import json
 import os
 import signal
 import subprocess
+import sys
 import time
 from datetime import datetime
 
 from .config import (
     AUDIO_DEVICE,
+    AUDIO_SAMPLE_RATE,
     CHANNELS,
+    LIVE_TRANSCRIPTION,
+    RECORD_SIDECAR,
     RECORDINGS_DIR,
     SAMPLE_RATE,
     STATE_DIR,
@@ -20,6 +24,26 @@ from .config import (
 from .devices import resolve_audio_device
 
 STATE_FILE = os.path.join(STATE_DIR, "recording.json")
+# Raw 16 kHz mono int16 PCM next to the recording (same format as
+# audio.decode_pcm(), so the pipeline can memory-map it without decoding)
+SIDECAR_SUFFIX = ".16k.pcm"
+# How long stop() waits for the live worker to transcribe the tail
+LIVE_FINISH_TIMEOUT_SECONDS = 300
+
+
+def sidecar_path(recording_path: str) -> str:
+    """Where the recorder writes the PCM sidecar of a recording."""
+    return os.path.splitext(recording_path)[0] + SIDECAR_SUFFIX
+
+
+def find_sidecar(recording_path: str) -> str | None:
+    """The recording's PCM sidecar, if there is a usable one."""
+    path = sidecar_path(recording_path)
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return None
+    return path if size and size % 2 == 0 else None
 
 
 def _read_state() -> dict | None:
@@ -107,15 +131,18 @@ def _stop_process(pid: int):
         pass
 
 
-def start(device: str | None = None, mode: str = "auto") -> dict:
+def start(device: str | None = None, mode: str = "auto", live: bool | None = None) -> dict:
     """Start an audio recording.
 
     Args:
         device: Audio device name, index, or "default". Uses config if None.
         mode: Processing mode hint ("auto", "meeting", "dictation").
+        live: Also write 16 kHz segments and transcribe them while recording
+            (see live.py). None uses LIVE_TRANSCRIPTION.
 
     Returns:
-        Dict with pid, path, start_time, mode, recording_type.
+        Dict with pid, path, start_time, mode, recording_type (plus
+        live_dir and live_pid for live recordings).
 
     Raises:
         RuntimeError: If already recording or ffmpeg fails to start.
@@ -142,6 +169,24 @@ def start(device: str | None = None, mode: str = "auto") -> dict:
         "-y",  # overwrite if exists
         output_path,
     ]
+    if RECORD_SIDECAR:
+        # Whisper-ready copy from the same capture: no decode pass later
+        cmd += [
+            "-ac", "1",
+            "-ar", str(AUDIO_SAMPLE_RATE),
+            "-c:a", "pcm_s16le",
+            "-f", "s16le",
+            sidecar_path(output_path),
+        ]
+
+    live_dir = None
+    if LIVE_TRANSCRIPTION if live is None else live:
+        from . import live as live_mod
+
+        # Second output: 16 kHz mono segments for the live worker
+        live_dir = live_mod.live_dir_for(output_path)
+        os.makedirs(live_dir, exist_ok=True)
+        cmd += live_mod.segment_output(live_dir)
 
     # Start ffmpeg in background
     with open(log_path, "w") as log_f:
@@ -172,6 +217,17 @@ def start(device: str | None = None, mode: str = "auto") -> dict:
         "device": device_input,
         "recording_type": "audio",
     }
+    if live_dir:
+        with open(os.path.join(live_dir, "worker.log"), "w") as log_f:
+            worker = subprocess.Popen(
+                [sys.executable, "-m", "memoant.live", live_dir, str(proc.pid)],
+                stdout=log_f,
+                stderr=log_f,
+                stdin=subprocess.DEVNULL,
+                start_new_session=True,
+            )
+        state["live_dir"] = live_dir
+        state["live_pid"] = worker.pid
     _write_state(state)
 
     return state
@@ -266,14 +322,16 @@ def start_screen(mode: str = "meeting") -> dict:
     return state
 
 
-def stop(process: bool = True) -> dict:
+def stop(process: bool = True, background: bool = False) -> dict:
     """Stop the current recording.
 
     Works for both audio (ffmpeg) and screen (WindowRecorder) recordings.
     Both respond to SIGINT for graceful shutdown.
 
     Args:
-        process: If True, run the recording through the pipeline after stopping.
+        process: If True, queue the recording for processing and run it now.
+        background: With process, only queue it (the watcher's consumers
+            pick it up).
 
     Returns:
         Dict with recording info and optionally pipeline results.
@@ -295,6 +353,16 @@ def stop(process: bool = True) -> dict:
     # Wait for file to be fully written
     time.sleep(1)
 
+    live_dir = state.get("live_dir")
+    if live_dir:
+        from . import live
+
+        # The worker sees ffmpeg exit, transcribes the tail and writes done.json
+        print("Finishing live transcript...")
+        if not live.wait(live_dir, state["live_pid"], LIVE_FINISH_TIMEOUT_SECONDS):
+            print("Live transcript incomplete; the recording will be transcribed in full")
+            _stop_process(state["live_pid"])
+
     _clear_state()
 
     elapsed = time.time() - state["start_time"]
@@ -305,6 +373,8 @@ def stop(process: bool = True) -> dict:
         "duration_seconds": elapsed,
         "exists": os.path.isfile(recording_path),
     }
+    if live_dir:
+        result["live_dir"] = live_dir
 
     if not result["exists"]:
         result["error"] = "Recording file not found after stopping"
@@ -316,18 +386,28 @@ def stop(process: bool = True) -> dict:
     if file_size < 1000:
         result["warning"] = "Recording file is very small, may be empty"
 
-    # Optionally process through pipeline
+    # Optionally process through pipeline (via the durable job queue, so a
+    # crash mid-processing leaves the recording queued rather than lost)
     if process and result["exists"] and file_size >= 1000:
+        from . import jobs
         from .config import NOTES_DIR, ORACLE_DB
-        from .pipeline import process_file
-
-        print("\nProcessing recording through pipeline...")
-        pipeline_result = process_file(
-            recording_path,
-            db_path=ORACLE_DB,
-            notes_dir=NOTES_DIR,
-            mode=mode,
-        )
-        result["pipeline"] = pipeline_result
+
+        queue = jobs.open_queue()
+        try:
+            job_id = jobs.enqueue(queue, recording_path, "recorder", {
+                "db_path": ORACLE_DB,
+                "notes_dir": NOTES_DIR,
+                "mode": mode,
+                **({"live_dir": live_dir} if live_dir else {}),
+            })
+            result["job_id"] = job_id
+            job = None if background else jobs.claim(queue, job_id)
+            if job is not None:
+                print("\nProcessing recording through pipeline...")
+                result["pipeline"] = jobs.run_job(queue, job)
+            else:
+                result["pipeline"] = {"status": "queued", "job_id": job_id}
+        finally:
+            queue.close()
 
     return result
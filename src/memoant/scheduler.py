@@ -0,0 +1,140 @@
+"""Cost estimates and resource slots for shortest-job-first scheduling.
+
+Expected processing time is predicted from a file's duration with a linear
+fit (fixed overhead + seconds per audio second) over recent
+os_audio_logs rows. The queue uses it to claim the cheapest job first,
+with an aging term so long recordings are not starved.
+
+Inside a process, pipeline stages take a slot before doing work: the
+"accelerator" pool (Whisper, pyannote) and the "io" pool (decode/VAD,
+Ollama, DB/note writes). Free slots go to the waiter with the lowest
+aged priority, and transcription takes the slot per chunk, so a short
+memo can slip in between the chunks of a long meeting. Chunks sent to the
+Whisper worker processes take a "transcribe" slot instead, one per worker.
+"""
+
+import itertools
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from .config import ACCELERATOR_SLOTS, IO_SLOTS, ORACLE_DB, QUEUE_AGING_RATE, TRANSCRIBE_WORKERS
+
+# Used until os_audio_logs has enough history
+DEFAULT_OVERHEAD_SECONDS = 20.0
+DEFAULT_SECONDS_PER_AUDIO_SECOND = 0.15
+MIN_HISTORY = 5
+_MODEL_TTL = 600
+
+_model_cache = {}
+
+
+def fit_cost_model(db_path: str = ORACLE_DB, limit: int = 200) -> tuple[float, float]:
+    """Least-squares fit of processing_time = overhead + rate * duration.
+
+    Uses the most recent `limit` processed files. Returns (overhead, rate).
+    """
+    cached = _model_cache.get(db_path)
+    if cached and time.time() - cached[0] < _MODEL_TTL:
+        return cached[1]
+
+    model = (DEFAULT_OVERHEAD_SECONDS, DEFAULT_SECONDS_PER_AUDIO_SECOND)
+    try:
+        db = sqlite3.connect(db_path)
+        try:
+            rows = db.execute(
+                """SELECT duration_seconds, processing_time_seconds FROM os_audio_logs
+                   WHERE processing_time_seconds > 0 AND duration_seconds > 0
+                   ORDER BY processed_at DESC LIMIT ?""",
+                (limit,),
+            ).fetchall()
+        finally:
+            db.close()
+    except sqlite3.Error:
+        rows = []
+
+    if len(rows) >= MIN_HISTORY:
+        n = len(rows)
+        mean_x = sum(r[0] for r in rows) / n
+        mean_y = sum(r[1] for r in rows) / n
+        var_x = sum((r[0] - mean_x) ** 2 for r in rows)
+        if var_x > 0:
+            rate = sum((r[0] - mean_x) * (r[1] - mean_y) for r in rows) / var_x
+            rate = max(rate, 0.0)
+            overhead = max(mean_y - rate * mean_x, 0.0)
+        else:
+            rate, overhead = mean_y / mean_x, 0.0
+        model = (overhead, rate)
+
+    _model_cache[db_path] = (time.time(), model)
+    return model
+
+
+def estimate_seconds(audio_seconds: float | None, db_path: str = ORACLE_DB) -> float | None:
+    """Expected processing time for a file of audio_seconds, or None if unknown."""
+    if audio_seconds is None:
+        return None
+    overhead, rate = fit_cost_model(db_path)
+    return overhead + rate * audio_seconds
+
+
+def probe_seconds(path: str) -> float | None:
+    """Container duration via ffprobe, or None if it can't be read yet."""
+    from .audio import get_duration
+
+    try:
+        return get_duration(path)
+    except (RuntimeError, ValueError, OSError):
+        return None
+
+
+class PrioritySlots:
+    """Counting semaphore that hands free slots to the cheapest waiter.
+
+    A waiter's effective priority is its expected cost minus aging_rate
+    times the seconds it has waited; ties go to the earliest arrival.
+    """
+
+    def __init__(self, name: str, slots: int, aging_rate: float = QUEUE_AGING_RATE):
+        self.name = name
+        self.slots = slots
+        self.aging_rate = aging_rate
+        self._free = slots
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _best(self):
+        now = time.time()
+        return min(
+            self._waiters,
+            key=lambda w: (w[0] - self.aging_rate * (now - w[1]), w[2]),
+        )
+
+    @contextmanager
+    def acquire(self, priority: float | None = None):
+        ticket = (priority or 0.0, time.time(), next(self._seq))
+        with self._cond:
+            self._waiters.append(ticket)
+            while not (self._free > 0 and self._best() is ticket):
+                # Re-check periodically so aging can reorder waiters
+                self._cond.wait(timeout=1.0)
+            self._waiters.remove(ticket)
+            self._free -= 1
+            self._cond.notify_all()
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._free += 1
+                self._cond.notify_all()
+
+    def status(self) -> dict:
+        with self._cond:
+            return {"slots": self.slots, "busy": self.slots - self._free, "waiting": len(self._waiters)}
+
+
+accelerator = PrioritySlots("accelerator", ACCELERATOR_SLOTS)
+io = PrioritySlots("io", IO_SLOTS)
+transcribe = PrioritySlots("transcribe", TRANSCRIBE_WORKERS)
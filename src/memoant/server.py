@@ -0,0 +1,245 @@
+"""Long-lived model server that keeps Whisper, Silero VAD and pyannote warm.
+
+The server listens on a local Unix socket (MODEL_SERVER_SOCKET) and accepts
+one JSON request per connection, answering with one JSON response:
+
+    {"cmd": "health"}                     -> {"ok": true}
+    {"cmd": "status"}                     -> {"ok": true, "status": {...}}
+    {"cmd": "process", "path": ..., ...}  -> {"ok": true, "result": {...}}
+    {"cmd": "warm"} / {"cmd": "unload"}   -> {"ok": true, "models": [...]}
+    {"cmd": "shutdown"}                   -> {"ok": true}
+
+Processing jobs run concurrently; within them, accelerator and I/O work is
+rationed by the priority slots in scheduler.py (cheapest job first). Models are
+unloaded after MODEL_IDLE_SECONDS without a job and reloaded on demand.
+"""
+
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from . import models, scheduler
+from .config import MODEL_IDLE_SECONDS, MODEL_SERVER_SOCKET, NOTES_DIR, ORACLE_DB
+
+# Options forwarded from clients to pipeline.process_file
+PROCESS_OPTIONS = (
+    "db_path", "notes_dir", "skip_diarization", "force", "mode", "from_stage", "file_id",
+    "priority", "compact", "probe", "preview", "llm_cache", "live_dir",
+)
+
+
+class _State:
+    """Mutable server state shared between request threads."""
+
+    def __init__(self, idle_timeout: float):
+        self.started_at = time.time()
+        self.idle_timeout = idle_timeout
+        self.job_lock = threading.Lock()
+        self.current_jobs = {}
+        self.jobs_completed = 0
+        self.jobs_failed = 0
+        self.shutdown = threading.Event()
+
+
+def _warm():
+    """Load every model the pipeline uses."""
+    from .audio import load_vad_model
+    from .transcribe import load_model
+
+    models.get("vad", load_vad_model)
+    load_model()
+    try:
+        from .diarize import get_pipeline
+        models.get("diarization", get_pipeline)
+    except Exception as e:
+        print(f"[modeld] Diarization model not loaded: {e}")
+    return models.loaded()
+
+
+def _status(state: _State) -> dict:
+    with state.job_lock:
+        current_jobs = list(state.current_jobs.values())
+        completed, failed = state.jobs_completed, state.jobs_failed
+    return {
+        "pid": os.getpid(),
+        "uptime_seconds": time.time() - state.started_at,
+        "models_loaded": models.loaded(),
+        "idle_seconds": models.idle_seconds(),
+        "idle_timeout": state.idle_timeout,
+        "current_jobs": current_jobs,
+        "slots": {s.name: s.status() for s in (scheduler.accelerator, scheduler.io, scheduler.transcribe)},
+        "jobs_completed": completed,
+        "jobs_failed": failed,
+    }
+
+
+def _run_job(state: _State, req: dict) -> dict:
+    from .pipeline import process_file
+
+    kwargs = {k: req[k] for k in PROCESS_OPTIONS if k in req}
+    key = threading.get_ident()
+    with state.job_lock:
+        state.current_jobs[key] = {"path": req["path"], "started_at": time.time()}
+    models.touch()
+    ok = False
+    try:
+        result = process_file(req["path"], **kwargs)
+        ok = True
+        return result
+    finally:
+        with state.job_lock:
+            state.current_jobs.pop(key, None)
+            if ok:
+                state.jobs_completed += 1
+            else:
+                state.jobs_failed += 1
+        models.touch()
+
+
+def _dispatch(state: _State, req: dict) -> dict:
+    cmd = req.get("cmd")
+    if cmd == "health":
+        return {"ok": True}
+    if cmd == "status":
+        return {"ok": True, "status": _status(state)}
+    if cmd == "process":
+        return {"ok": True, "result": _run_job(state, req)}
+    if cmd == "warm":
+        return {"ok": True, "models": _warm()}
+    if cmd == "unload":
+        with state.job_lock:
+            if state.current_jobs:
+                return {"ok": False, "error": "Jobs in progress"}
+            return {"ok": True, "models": models.unload_all()}
+    if cmd == "shutdown":
+        state.shutdown.set()
+        return {"ok": True}
+    return {"ok": False, "error": f"Unknown command: {cmd!r}"}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            req = json.loads(line)
+            resp = _dispatch(self.server.state, req)
+        except Exception as e:
+            resp = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+        self.wfile.write(json.dumps(resp, default=str).encode() + b"\n")
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _idle_reaper(state: _State, interval: float = 10.0):
+    """Unload models once nothing has used them for idle_timeout seconds."""
+    while not state.shutdown.wait(interval):
+        if not models.loaded() or models.idle_seconds() < state.idle_timeout:
+            continue
+        with state.job_lock:
+            if state.current_jobs:
+                continue
+            names = models.unload_all()
+        print(f"[modeld] Idle {state.idle_timeout:.0f}s, unloaded: {', '.join(names)}")
+
+
+def serve(
+    socket_path: str = MODEL_SERVER_SOCKET,
+    idle_timeout: float = MODEL_IDLE_SECONDS,
+    warm: bool = True,
+):
+    """Run the model server in the foreground until shutdown or Ctrl+C."""
+    if os.path.exists(socket_path):
+        if is_running(socket_path):
+            raise RuntimeError(f"Model server already running on {socket_path}")
+        os.unlink(socket_path)  # stale socket from a crashed server
+    os.makedirs(os.path.dirname(socket_path), exist_ok=True)
+
+    state = _State(idle_timeout)
+    server = _Server(socket_path, _Handler)
+    server.state = state
+    os.chmod(socket_path, 0o600)
+
+    print("memoant model server started")
+    print(f"  Socket: {socket_path}")
+    print(f"  Idle unload: {idle_timeout:.0f}s")
+    if warm:
+        print("  Loading models...")
+        print(f"  Loaded: {', '.join(_warm())}")
+    print("  Press Ctrl+C to stop\n")
+
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    threading.Thread(target=_idle_reaper, args=(state,), daemon=True).start()
+    try:
+        state.shutdown.wait()
+    except KeyboardInterrupt:
+        pass
+    print("\nShutting down model server...")
+    server.shutdown()
+    server.server_close()
+    try:
+        os.unlink(socket_path)
+    except FileNotFoundError:
+        pass
+
+
+def request(payload: dict, socket_path: str = MODEL_SERVER_SOCKET, timeout: float | None = None) -> dict:
+    """Send one request to the model server and return its response.
+
+    Raises OSError if the server is not reachable, RuntimeError if it
+    reports an error.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(payload).encode() + b"\n")
+        with sock.makefile("rb") as f:
+            line = f.readline()
+    if not line:
+        raise RuntimeError("Model server closed the connection")
+    resp = json.loads(line)
+    if not resp.get("ok"):
+        raise RuntimeError(resp.get("error", "Model server error"))
+    return resp
+
+
+def is_running(socket_path: str = MODEL_SERVER_SOCKET) -> bool:
+    """True if a model server answers a health check on socket_path."""
+    if not os.path.exists(socket_path):
+        return False
+    try:
+        request({"cmd": "health"}, socket_path, timeout=2)
+        return True
+    except (OSError, RuntimeError, ValueError):
+        return False
+
+
+def run_process_file(
+    input_path: str,
+    db_path: str = ORACLE_DB,
+    notes_dir: str = NOTES_DIR,
+    socket_path: str = MODEL_SERVER_SOCKET,
+    **kwargs,
+) -> dict:
+    """Process a file on the model server if one is running, else in-process.
+
+    Accepts the same keyword arguments as pipeline.process_file.
+    """
+    if is_running(socket_path):
+        print(f"Submitting to model server ({socket_path})...")
+        payload = {
+            "cmd": "process",
+            "path": os.path.abspath(input_path),
+            "db_path": os.path.abspath(db_path),
+            "notes_dir": os.path.abspath(notes_dir),
+            **{k: v for k, v in kwargs.items() if k in PROCESS_OPTIONS},
+        }
+        return request(payload, socket_path)["result"]
+
+    from .pipeline import process_file
+
+    return process_file(input_path, db_path=db_path, notes_dir=notes_dir, **kwargs)
@@ -0,0 +1,125 @@
+"""Coalescing detector for "this file has finished being written".
+
+Filesystem events for the same path are merged: every event pushes the
+path's deadline back by SETTLE_DEBOUNCE_SECONDS. When a close-after-write
+event is available (inotify IN_CLOSE_WRITE on Linux, or an atomic rename
+into place) the file is settled immediately. Otherwise (FSEvents on macOS)
+the detector compares size and mtime after the debounce period and keeps
+re-checking with a doubling interval, capped at FILE_SETTLE_SECONDS, until
+two checks agree.
+
+Everything runs on one background thread, so watchdog callbacks never
+block.
+"""
+
+import os
+import threading
+import time
+
+from .config import FILE_SETTLE_SECONDS, SETTLE_DEBOUNCE_SECONDS, SETTLE_TIMEOUT_SECONDS
+
+
+class SettleDetector:
+    """Calls on_settled(path, ready_at) once per burst of writes to a file.
+
+    ready_at is when the file was complete: the close event time, or the
+    file's last modification time when no close event was seen.
+    """
+
+    def __init__(
+        self,
+        on_settled,
+        debounce: float = SETTLE_DEBOUNCE_SECONDS,
+        max_interval: float = FILE_SETTLE_SECONDS,
+        timeout: float = SETTLE_TIMEOUT_SECONDS,
+    ):
+        self.on_settled = on_settled
+        self.debounce = debounce
+        self.max_interval = max_interval
+        self.timeout = timeout
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="settle", daemon=True)
+        self._thread.start()
+
+    def touch(self, path: str):
+        """Record a created/modified event for path."""
+        now = time.time()
+        with self._cond:
+            entry = self._pending.get(path)
+            if entry is None:
+                entry = {"first_event": now, "interval": self.debounce, "stat": None, "closed_at": None}
+                self._pending[path] = entry
+            entry["deadline"] = now + self.debounce
+            entry["interval"] = self.debounce
+            self._cond.notify()
+
+    def closed(self, path: str):
+        """Record a close-after-write (or rename into place) for path."""
+        now = time.time()
+        with self._cond:
+            entry = self._pending.setdefault(
+                path, {"first_event": now, "interval": self.debounce, "stat": None}
+            )
+            entry["closed_at"] = now
+            entry["deadline"] = now
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+
+    def _check(self, path: str, entry: dict, now: float):
+        """Return ready_at if path has settled, None to keep waiting.
+
+        Raises OSError if the file disappeared.
+        """
+        st = os.stat(path)
+        stat = (st.st_size, st.st_mtime_ns)
+        if st.st_size > 0:
+            if entry.get("closed_at") is not None:
+                return entry["closed_at"]
+            if stat == entry["stat"]:
+                return st.st_mtime
+            if now - entry["first_event"] >= self.timeout:
+                print(f"[memoant] {os.path.basename(path)} still changing after {self.timeout:.0f}s")
+                return st.st_mtime
+        entry["stat"] = stat
+        entry["interval"] = min(entry["interval"] * 2, self.max_interval)
+        entry["deadline"] = now + entry["interval"]
+        return None
+
+    def _run(self):
+        while True:
+            settled = []
+            with self._cond:
+                if self._stopped:
+                    return
+                now = time.time()
+                for path, entry in list(self._pending.items()):
+                    if entry["deadline"] > now:
+                        continue
+                    try:
+                        ready_at = self._check(path, entry, now)
+                    except OSError:
+                        del self._pending[path]  # deleted or moved away
+                        continue
+                    if ready_at is not None:
+                        del self._pending[path]
+                        settled.append((path, ready_at))
+                if not settled:
+                    deadlines = [e["deadline"] for e in self._pending.values()]
+                    wait = min(deadlines) - now if deadlines else None
+                    self._cond.wait(timeout=max(wait, 0.01) if wait is not None else None)
+                    continue
+            for path, ready_at in settled:
+                try:
+                    self.on_settled(path, ready_at)
+                except Exception as e:
+                    print(f"[memoant] Error handling {path}: {e}")
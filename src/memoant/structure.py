@@ -1,10 +1,49 @@
-"""LLM structuring via Ollama. Extract summary, topics, actions, etc."""
+"""LLM structuring via Ollama. Extract summary, topics, actions, etc.
 
+Transcripts longer than LLM_WINDOW_CHARS are handled map-reduce style:
+the speaker transcript is split into windows on turn boundaries, each
+window is extracted with WINDOW_PROMPT (LLM_PARALLEL requests at a time),
+and a final MERGE_PROMPT call writes the summary and classification from
+the window results. Action items, decisions and entities are merged and
+deduplicated locally so nothing from a window is dropped.
+
+Requests use Ollama's structured output (OLLAMA_FORMAT: "schema" sends
+the JSON schema for the prompt's fields, "json" plain JSON mode), and
+replies are parsed with llm_json.parse, which repairs common defects
+locally; a field is only regenerated when the reply is beyond repair.
+Each result carries _llm stats (generations, retries, parse outcomes,
+seconds spent on discarded generations), recorded per file as llm_stats.
+
+With LLM_STRATEGY = "fields", transcripts that fit in one window are
+extracted with the four smaller FIELD_PROMPTS (summary; action items and
+decisions; entities and quotes; classification), LLM_PARALLEL at a time.
+Each output is short, but every prompt carries the whole transcript, so
+prompt evaluation costs about four times as much. With the default
+LLM_PARALLEL = 2 the four run in two rounds, so latency only improves
+when decoding dominates and Ollama runs OLLAMA_NUM_PARALLEL >= 4.
+scripts/bench_llm.py compares the two strategies.
+
+Successful results are cached by content (see llm_cache.py): the key
+covers the transcript, model, PROMPT_VERSION and the request options.
+"""
+
+import hashlib
 import json
-import time
-import urllib.request
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 
-from .config import OLLAMA_MODEL, OLLAMA_URL
+from . import llm_cache, llm_json, ollama
+from .config import (
+    LLM_CACHE_ENABLED,
+    LLM_PARALLEL,
+    LLM_STRATEGY,
+    LLM_WINDOW_CHARS,
+    OLLAMA_FORMAT,
+    OLLAMA_MODEL,
+    PREVIEW_CHARS,
+    PREVIEW_MODEL,
+)
 
 EXTRACT_PROMPT = """You are analyzing a transcript from a personal audio recording. Extract structured information.
 
@@ -18,7 +57,7 @@ Respond with ONLY valid JSON (no markdown, no explanation):
   "action_items": ["action1", "action2"],
   "decisions": ["decision1"],
   "entities": ["person/place/org mentioned"],
-  "key_quotes": ["notable direct quotes"],
+  "key_quotes": ["notable quotes (the transcript may have fillers and repeated words removed)"],
   "sphere": "one of: Work|Ventures|Family|Finance|Health|Learning",
   "tags": ["tag1", "tag2"],
   "sentiment": "one of: positive|negative|neutral|mixed",
@@ -32,74 +71,492 @@ Rules:
 - Keep summary concise, action_items specific, tags lowercase
 """
 
+WINDOW_PROMPT = """You are analyzing part {part} of {parts} of a transcript from a personal audio recording. Extract structured information from this part only.
+
+TRANSCRIPT (PART {part} OF {parts}):
+{transcript}
+
+Respond with ONLY valid JSON (no markdown, no explanation):
+{{
+  "summary": "1-2 sentence summary of this part",
+  "topics": ["topic1", "topic2"],
+  "action_items": ["action1", "action2"],
+  "decisions": ["decision1"],
+  "entities": ["person/place/org mentioned"],
+  "key_quotes": ["notable quotes (the transcript may have fillers and repeated words removed)"],
+  "sphere": "one of: Work|Ventures|Family|Finance|Health|Learning",
+  "tags": ["tag1", "tag2"],
+  "sentiment": "one of: positive|negative|neutral|mixed",
+  "conversation_type": "one of: meeting|phone_call|dictation|brainstorm|ambient"
+}}
+
+Rules:
+- sphere must be exactly one of: Work, Ventures, Family, Finance, Health, Learning
+- If unsure about a field, use null or empty array
+- Keep action_items specific, tags lowercase
+"""
+
+MERGE_PROMPT = """You are combining notes taken on consecutive parts of one long personal audio recording into notes for the whole recording.
+
+NOTES PER PART (JSON):
+{windows}
+
+Respond with ONLY valid JSON (no markdown, no explanation):
+{{
+  "summary": "2-3 sentence summary of the whole recording",
+  "topics": ["up to 8 main topics"],
+  "key_quotes": ["up to 5 of the most notable quotes, copied exactly"],
+  "sphere": "one of: Work|Ventures|Family|Finance|Health|Learning",
+  "tags": ["up to 8 tags"],
+  "sentiment": "one of: positive|negative|neutral|mixed",
+  "conversation_type": "one of: meeting|phone_call|dictation|brainstorm|ambient"
+}}
+
+Rules:
+- The summary covers the whole recording, not just the first part
+- sphere must be exactly one of: Work, Ventures, Family, Finance, Health, Learning
+- conversation_type: meeting (2+ people scheduled), phone_call (2 people remote), dictation (1 person notes), brainstorm (1 person thinking aloud), ambient (background/unclear)
+- Keep tags lowercase
+"""
+
+PREVIEW_PROMPT = """Summarize this transcript of a personal audio recording in 1-2 sentences.
+
+TRANSCRIPT:
+{transcript}
+
+Respond with ONLY valid JSON (no markdown, no explanation):
+{{"summary": "1-2 sentence summary"}}
+"""
+
+_FIELD_HEADER = """You are analyzing a transcript from a personal audio recording.
+
+TRANSCRIPT:
+{transcript}
+
+Respond with ONLY valid JSON (no markdown, no explanation):
+"""
+
+# LLM_STRATEGY = "fields": (fields, prompt) per concurrent request
+FIELD_PROMPTS = {
+    "summary": (["summary", "topics", "tags"], _FIELD_HEADER + """{{
+  "summary": "2-3 sentence summary of what happened",
+  "topics": ["topic1", "topic2"],
+  "tags": ["tag1", "tag2"]
+}}
+
+Rules:
+- Keep summary concise, tags lowercase
+"""),
+    "actions": (["action_items", "decisions"], _FIELD_HEADER + """{{
+  "action_items": ["action1", "action2"],
+  "decisions": ["decision1"]
+}}
+
+Rules:
+- Keep action_items specific
+- Use an empty array if there are none
+"""),
+    "entities": (["entities", "key_quotes"], _FIELD_HEADER + """{{
+  "entities": ["person/place/org mentioned"],
+  "key_quotes": ["notable quotes (the transcript may have fillers and repeated words removed)"]
+}}
+
+Rules:
+- Copy quotes exactly
+- Use an empty array if there are none
+"""),
+    "classification": (["sphere", "sentiment", "conversation_type"], _FIELD_HEADER + """{{
+  "sphere": "one of: Work|Ventures|Family|Finance|Health|Learning",
+  "sentiment": "one of: positive|negative|neutral|mixed",
+  "conversation_type": "one of: meeting|phone_call|dictation|brainstorm|ambient"
+}}
+
+Rules:
+- sphere must be exactly one of: Work, Ventures, Family, Finance, Health, Learning
+- conversation_type: meeting (2+ people scheduled), phone_call (2 people remote), dictation (1 person notes), brainstorm (1 person thinking aloud), ambient (background/unclear)
+- If unsure, use null
+"""),
+}
+
+# EXTRACT_PROMPT lines, for prompts that leave out fields the local
+# classifier already filled
+FIELD_LINES = {
+    "summary": '"summary": "2-3 sentence summary of what happened"',
+    "topics": '"topics": ["topic1", "topic2"]',
+    "action_items": '"action_items": ["action1", "action2"]',
+    "decisions": '"decisions": ["decision1"]',
+    "entities": '"entities": ["person/place/org mentioned"]',
+    "key_quotes": '"key_quotes": ["notable quotes (the transcript may have fillers and repeated words removed)"]',
+    "sphere": '"sphere": "one of: Work|Ventures|Family|Finance|Health|Learning"',
+    "tags": '"tags": ["tag1", "tag2"]',
+    "sentiment": '"sentiment": "one of: positive|negative|neutral|mixed"',
+    "conversation_type": '"conversation_type": "one of: meeting|phone_call|dictation|brainstorm|ambient"',
+}
+
+FIELD_RULES = {
+    "sphere": "- sphere must be exactly one of: Work, Ventures, Family, Finance, Health, Learning",
+    "conversation_type": "- conversation_type: meeting (2+ people scheduled), phone_call (2 people remote), dictation (1 person notes), brainstorm (1 person thinking aloud), ambient (background/unclear)",
+}
+
+
+def _partial_prompt(fields: list[str]) -> str:
+    """EXTRACT_PROMPT asking for just these fields."""
+    body = ",\n".join(f"  {FIELD_LINES[field]}" for field in fields)
+    rules = [FIELD_RULES[field] for field in fields if field in FIELD_RULES]
+    rules += [
+        "- If unsure about a field, use null or empty array",
+        "- Keep summary concise, action_items specific, tags lowercase",
+    ]
+    return _FIELD_HEADER + "{{\n" + body + "\n}}\n\nRules:\n" + "\n".join(rules) + "\n"
+
+
+# Changes whenever a prompt template is edited, so cached results from the
+# old wording are not reused
+PROMPT_VERSION = hashlib.sha256(
+    "\0".join([
+        EXTRACT_PROMPT, WINDOW_PROMPT, MERGE_PROMPT, *(p for _, p in FIELD_PROMPTS.values()),
+        _partial_prompt(list(FIELD_LINES)),
+    ]).encode()
+).hexdigest()[:16]
+
+GENERATE_OPTIONS = {"temperature": 0}
+
+VALID_SPHERES = {"Work", "Ventures", "Family", "Finance", "Health", "Learning"}
+VALID_TYPES = {"meeting", "phone_call", "dictation", "brainstorm", "ambient"}
+LIST_FIELDS = ["topics", "action_items", "decisions", "entities", "key_quotes", "tags"]
+
+FIELD_SCHEMAS = {
+    "summary": {"type": "string"},
+    **{field: {"type": "array", "items": {"type": "string"}} for field in LIST_FIELDS},
+    "sphere": {"enum": [*sorted(VALID_SPHERES), None]},
+    "sentiment": {"enum": ["positive", "negative", "neutral", "mixed", None]},
+    "conversation_type": {"enum": [*sorted(VALID_TYPES), None]},
+}
+
+
+def _schema(fields: list[str]) -> dict:
+    return {
+        "type": "object",
+        "properties": {field: FIELD_SCHEMAS[field] for field in fields},
+        "required": fields,
+    }
+
+
+EXTRACT_SCHEMA = _schema(list(FIELD_SCHEMAS))
+MERGE_SCHEMA = _schema(
+    ["summary", "topics", "key_quotes", "sphere", "tags", "sentiment", "conversation_type"]
+)
+
+
+def _empty_result(error: str) -> dict:
+    return {
+        "summary": None,
+        "topics": [],
+        "action_items": [],
+        "decisions": [],
+        "entities": [],
+        "key_quotes": [],
+        "sphere": None,
+        "tags": [],
+        "sentiment": None,
+        "conversation_type": None,
+        "error": error,
+    }
+
+
+def _format(schema: dict) -> dict:
+    """Request params for the configured structured-output mode."""
+    if OLLAMA_FORMAT == "schema":
+        return {"format": schema}
+    if OLLAMA_FORMAT == "json":
+        return {"format": "json"}
+    return {}
+
+
+def _new_stats() -> dict:
+    return {"generations": 0, "retries": 0, "outcomes": {}, "wasted_seconds": 0.0}
+
+
+def _add_stats(total: dict, stats: dict):
+    for key in ("generations", "retries", "wasted_seconds"):
+        total[key] += stats[key]
+    for outcome, n in stats["outcomes"].items():
+        total["outcomes"][outcome] = total["outcomes"].get(outcome, 0) + n
+
+
+def _generate(prompt: str, model: str, retries: int, schema: dict = EXTRACT_SCHEMA) -> dict:
+    """One Ollama generation parsed as JSON, with retries.
+
+    Connection failures are retried by the client (with backoff across
+    endpoints); output that llm_json cannot repair is regenerated up to
+    `retries` times. Returns the parsed dict plus _tokens/_duration/_llm,
+    or an empty result with an error field (and _llm).
+    """
+    tokens = 0
+    duration = 0.0
+    stats = _new_stats()
+    for attempt in range(retries + 1):
+        stats["generations"] += 1
+        stats["retries"] = attempt
+        try:
+            resp = ollama.client.generate(
+                model, prompt, options=GENERATE_OPTIONS, retries=retries, **_format(schema)
+            )
+        except RuntimeError as e:
+            stats["outcomes"]["error"] = stats["outcomes"].get("error", 0) + 1
+            return {**_empty_result(f"LLM extraction failed: {e}"), "_llm": stats}
+
+        seconds = resp["total_duration"] / 1e9
+        tokens += resp["eval_count"]
+        duration += seconds
+        try:
+            parsed, outcome = llm_json.parse(resp["response"].strip())
+        except ValueError as e:
+            stats["outcomes"]["failed"] = stats["outcomes"].get("failed", 0) + 1
+            stats["wasted_seconds"] += seconds
+            if attempt == retries:
+                return {**_empty_result(f"LLM extraction failed: {e}"), "_llm": stats}
+            continue
+        stats["outcomes"][outcome] = stats["outcomes"].get(outcome, 0) + 1
+
+        if parsed.get("sphere") not in VALID_SPHERES:
+            parsed["sphere"] = None
+
+        if parsed.get("conversation_type") not in VALID_TYPES:
+            parsed["conversation_type"] = None
+
+        parsed["_tokens"] = tokens
+        parsed["_duration"] = duration
+        parsed["_llm"] = stats
+        return parsed
 
-def extract_structure(transcript: str, model: str = OLLAMA_MODEL, retries: int = 2) -> dict:
+
+def extract_structure(
+    transcript: str,
+    model: str = OLLAMA_MODEL,
+    retries: int = 2,
+    use_cache: bool = LLM_CACHE_ENABLED,
+    strategy: str = LLM_STRATEGY,
+    known: dict | None = None,
+) -> dict:
     """Call Ollama to extract structured data from transcript.
 
     Returns dict with: summary, topics, action_items, decisions, entities,
     key_quotes, sphere, tags, sentiment, conversation_type.
-    Returns partial dict with error field on failure.
+    Returns partial dict with error field on failure. Results served from
+    the cache carry _cached=True; use_cache=False skips the cache entirely.
+    strategy is "single" (one prompt) or "fields" (FIELD_PROMPTS in
+    parallel); transcripts over LLM_WINDOW_CHARS always use map-reduce.
+    known holds fields already decided (by the local classifier); the LLM
+    is not asked for them where the prompts allow, and they override its
+    answers.
     """
-    if len(transcript) > 12000:
-        transcript = transcript[:12000] + "\n\n[TRANSCRIPT TRUNCATED]"
+    known = known or {}
+    key = None
+    if use_cache:
+        options = {**GENERATE_OPTIONS, "format": OLLAMA_FORMAT, "known": known}
+        if len(transcript) > LLM_WINDOW_CHARS:
+            options["window_chars"] = LLM_WINDOW_CHARS
+        elif strategy == "fields":
+            options["strategy"] = strategy
+        key = llm_cache.cache_key(transcript, model, PROMPT_VERSION, options)
+        cached = llm_cache.get(key)
+        if cached is not None:
+            cached["_cached"] = True
+            cached["_llm"] = _new_stats()
+            return cached
 
-    prompt = EXTRACT_PROMPT.format(transcript=transcript)
+    if len(transcript) > LLM_WINDOW_CHARS:
+        result = _extract_map_reduce(transcript, model, retries)
+    elif strategy == "fields":
+        result = _extract_fields(transcript, model, retries, known)
+    elif known:
+        pending = [field for field in FIELD_SCHEMAS if field not in known]
+        result = _generate(
+            _partial_prompt(pending).format(transcript=transcript), model, retries,
+            schema=_schema(pending),
+        )
+    else:
+        result = _generate(EXTRACT_PROMPT.format(transcript=transcript), model, retries)
+    result.update(known)
 
-    for attempt in range(retries + 1):
-        try:
-            payload = json.dumps({
-                "model": model,
-                "prompt": prompt,
-                "stream": False,
-                "options": {"temperature": 0},
-            }).encode()
-
-            req = urllib.request.Request(
-                f"{OLLAMA_URL}/api/generate",
-                data=payload,
-                headers={"Content-Type": "application/json"},
-            )
-            resp = json.loads(
-                urllib.request.urlopen(req, timeout=120).read()
-            )
-            text = resp.get("response", "").strip()
-            tokens = resp.get("eval_count", 0)
-            duration = resp.get("total_duration", 0) / 1e9
-
-            # Parse JSON from response (handle markdown code blocks)
-            if "```" in text:
-                text = text.split("```")[1]
-                if text.startswith("json"):
-                    text = text[4:]
-
-            parsed = json.loads(text)
-
-            valid_spheres = {"Work", "Ventures", "Family", "Finance", "Health", "Learning"}
-            if parsed.get("sphere") not in valid_spheres:
-                parsed["sphere"] = None
-
-            valid_types = {"meeting", "phone_call", "dictation", "brainstorm", "ambient"}
-            if parsed.get("conversation_type") not in valid_types:
-                parsed["conversation_type"] = None
-
-            parsed["_tokens"] = tokens
-            parsed["_duration"] = duration
-            return parsed
-
-        except (json.JSONDecodeError, KeyError, urllib.error.URLError) as e:
-            if attempt < retries:
-                time.sleep(2)
-            else:
-                return {
-                    "summary": None,
-                    "topics": [],
-                    "action_items": [],
-                    "decisions": [],
-                    "entities": [],
-                    "key_quotes": [],
-                    "sphere": None,
-                    "tags": [],
-                    "sentiment": None,
-                    "conversation_type": None,
-                    "error": f"LLM extraction failed: {e}",
-                }
+    # Failures are not cached so the next call retries them
+    if key and not result.get("error"):
+        llm_cache.put(key, result)
+    return result
+
+
+def quick_summary(transcript: str, model: str | None = None) -> str | None:
+    """One-shot summary of the start of a transcript for preview notes
+    (PREVIEW_MODEL, else OLLAMA_MODEL). None if it fails."""
+    model = model or PREVIEW_MODEL or OLLAMA_MODEL
+    result = _generate(
+        PREVIEW_PROMPT.format(transcript=transcript[:PREVIEW_CHARS]), model, retries=0,
+        schema=_schema(["summary"]),
+    )
+    error = result.get("error")
+    if error and "not found" in error:
+        print(f"  Warning: preview model {model} is not available in Ollama (ollama pull {model})")
+    elif error:
+        print(f"  Quick summary failed: {error}")
+    return result.get("summary")
+
+
+def _extract_fields(transcript: str, model: str, retries: int, known: dict) -> dict:
+    """FIELD_PROMPTS sent concurrently and assembled into one result.
+    Groups whose fields are all in known are not sent."""
+    groups = [
+        (name, fields, prompt) for name, (fields, prompt) in FIELD_PROMPTS.items()
+        if not set(fields) <= set(known)
+    ]
+    with ThreadPoolExecutor(max_workers=max(1, min(LLM_PARALLEL, len(groups)))) as pool:
+        results = list(pool.map(
+            lambda group: _generate(
+                group[2].format(transcript=transcript), model, retries, schema=_schema(group[1])
+            ),
+            groups,
+        ))
+
+    merged = _empty_result(None)
+    stats = _new_stats()
+    failed = []
+    for (name, fields, _), r in zip(groups, results):
+        _add_stats(stats, r["_llm"])
+        if r.get("error"):
+            failed.append(name)
+            continue
+        for field in fields:
+            if r.get(field) is not None:
+                merged[field] = r[field]
+    # Wall time is the slowest request, tokens are the sum
+    merged["_tokens"] = sum(r.get("_tokens", 0) for r in results)
+    merged["_duration"] = max(r.get("_duration", 0) for r in results)
+    merged["_llm"] = stats
+    if failed:
+        first = next(r["error"] for r in results if r.get("error"))
+        merged["error"] = f"LLM extraction failed for {', '.join(failed)}: {first}"
+    return merged
+
+
+def split_windows(transcript: str, max_chars: int = LLM_WINDOW_CHARS) -> list[str]:
+    """Split a transcript into windows of at most max_chars.
+
+    Breaks on speaker turns (lines) where possible, then sentences, and
+    only cuts mid-sentence when a single sentence is longer than a window.
+    """
+    pieces = []  # (text, separator from the previous piece)
+    for line in transcript.splitlines():
+        if len(line) <= max_chars:
+            pieces.append((line, "\n"))
+            continue
+        sep = "\n"
+        for sentence in re.split(r"(?<=[.!?])\s+", line):
+            while len(sentence) > max_chars:
+                pieces.append((sentence[:max_chars], sep))
+                sentence, sep = sentence[max_chars:], ""
+            if sentence:
+                pieces.append((sentence, sep))
+            sep = " "
+
+    windows = []
+    current = ""
+    for piece, sep in pieces:
+        if current and len(current) + len(sep) + len(piece) > max_chars:
+            windows.append(current)
+            current = piece
+        else:
+            current = current + sep + piece if current else piece
+    if current:
+        windows.append(current)
+    return windows
+
+
+def _norm(item) -> str:
+    return re.sub(r"[^\w]+", " ", str(item).lower()).strip()
+
+
+def _dedupe(items: list) -> list:
+    """Drop repeats (case/punctuation-insensitive), keeping first wording."""
+    seen = set()
+    kept = []
+    for item in items:
+        if not item:
+            continue
+        key = _norm(item)
+        if key and key not in seen:
+            seen.add(key)
+            kept.append(item)
+    return kept
+
+
+def _vote(values: list):
+    """Most common non-empty value (earliest wins ties), or None."""
+    values = [v for v in values if v]
+    if not values:
+        return None
+    counts = Counter(values)
+    return max(values, key=lambda v: counts[v])
+
+
+def _extract_map_reduce(transcript: str, model: str, retries: int) -> dict:
+    windows = split_windows(transcript)
+    parts = len(windows)
+    prompts = [
+        WINDOW_PROMPT.format(part=i + 1, parts=parts, transcript=text)
+        for i, text in enumerate(windows)
+    ]
+    print(f"    Long transcript: {parts} windows, {LLM_PARALLEL} at a time")
+
+    with ThreadPoolExecutor(max_workers=max(1, LLM_PARALLEL)) as pool:
+        results = list(pool.map(lambda p: _generate(p, model, retries), prompts))
+
+    stats = _new_stats()
+    for r in results:
+        _add_stats(stats, r["_llm"])
+
+    ok = [r for r in results if not r.get("error")]
+    if not ok:
+        return {
+            **_empty_result(f"LLM extraction failed for all {parts} windows: {results[0]['error']}"),
+            "_llm": stats,
+        }
+
+    # Lists that must not lose anything are merged locally
+    merged = {field: _dedupe([x for r in ok for x in r.get(field) or []]) for field in LIST_FIELDS}
+    merged["summary"] = " ".join(r["summary"] for r in ok if r.get("summary")) or None
+    for field in ("sphere", "sentiment", "conversation_type"):
+        merged[field] = _vote([r.get(field) for r in ok])
+    tokens = sum(r.get("_tokens", 0) for r in results)
+    duration = sum(r.get("_duration", 0) for r in results)
+
+    # Reduce: one short call over the window results for the whole-recording
+    # summary, topics, tags, quotes and classification
+    window_notes = [
+        {k: r.get(k) for k in ("summary", "topics", "key_quotes", "sphere", "tags",
+                               "sentiment", "conversation_type")}
+        for r in ok
+    ]
+    final = _generate(
+        MERGE_PROMPT.format(windows=json.dumps(window_notes, ensure_ascii=False, indent=1)),
+        model, retries, schema=MERGE_SCHEMA,
+    )
+    _add_stats(stats, final["_llm"])
+    if not final.get("error"):
+        for field in ("summary", "sphere", "sentiment", "conversation_type"):
+            if final.get(field):
+                merged[field] = final[field]
+        for field in ("topics", "key_quotes", "tags"):
+            if final.get(field):
+                merged[field] = _dedupe(final[field])
+        tokens += final.get("_tokens", 0)
+        duration += final.get("_duration", 0)
+
+    merged["_tokens"] = tokens
+    merged["_duration"] = duration
+    merged["_llm"] = stats
+    failed = parts - len(ok)
+    if failed:
+        merged["error"] = f"LLM extraction failed for {failed} of {parts} windows"
+    elif final.get("error"):
+        merged["error"] = f"LLM merge step failed: {final['error']}"
+    return merged
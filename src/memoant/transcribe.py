@@ -1,20 +1,58 @@
-"""MLX-Whisper transcription wrapper."""
+"""MLX-Whisper transcription wrapper.
+
+MLX is not thread-safe, so concurrent chunks (transcribe_file_chunk) run in
+TRANSCRIBE_WORKERS spawned worker processes, each with its own model. They
+read the chunk from the job's PCM file, so no audio is copied between
+processes.
+"""
+
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 import mlx_whisper
+import numpy as np
+
+from . import models
+from .audio import load_pcm, slice_seconds, to_float32
+from .config import TRANSCRIBE_WORKERS, WHISPER_MODEL
+from .words import WordTable
+
+
+def _load_whisper():
+    """Load WHISPER_MODEL into mlx-whisper's own model cache."""
+    import mlx.core as mx
+    from mlx_whisper.transcribe import ModelHolder
+
+    return ModelHolder.get_model(WHISPER_MODEL, mx.float16)
+
+
+def _unload_whisper(_model):
+    """Clear mlx-whisper's module-level model cache."""
+    from mlx_whisper.transcribe import ModelHolder
+
+    ModelHolder.model = None
+    ModelHolder.model_path = None
+
 
-from .config import WHISPER_MODEL
+def load_model():
+    """Make sure the Whisper model is loaded (and registered for unloading)."""
+    return models.get("whisper", _load_whisper, _unload_whisper)
 
 
-def transcribe(wav_path: str, language: str = "en") -> dict:
-    """Transcribe a WAV file using mlx-whisper.
+def transcribe(audio: str | np.ndarray, language: str = "en") -> dict:
+    """Transcribe a WAV file or 16kHz sample buffer using mlx-whisper.
 
     Returns dict with:
         - "text": full transcript string
         - "segments": list of segment dicts with timestamps
-        - "words": list of word-level dicts (if available)
+        - "words": WordTable of word-level timestamps (empty if unavailable)
     """
+    load_model()
+    if isinstance(audio, np.ndarray):
+        audio = to_float32(audio)
     result = mlx_whisper.transcribe(
-        wav_path,
+        audio,
         path_or_hf_repo=WHISPER_MODEL,
         language=language,
         word_timestamps=True,
@@ -22,55 +60,67 @@ def transcribe(wav_path: str, language: str = "en") -> dict:
     )
 
     # Extract word-level timestamps from segments
-    words = []
+    texts, starts, ends = [], [], []
     for seg in result.get("segments", []):
         for w in seg.get("words", []):
-            words.append({
-                "word": w["word"].strip(),
-                "start": w["start"],
-                "end": w["end"],
-            })
+            texts.append(w["word"].strip())
+            starts.append(w["start"])
+            ends.append(w["end"])
+        # Word timings now live in the table
+        seg.pop("words", None)
 
     return {
         "text": result.get("text", "").strip(),
         "segments": result.get("segments", []),
-        "words": words,
+        "words": WordTable.from_columns(texts, starts, ends),
     }
 
 
-def transcribe_chunk(wav_path: str, start: float, end: float, language: str = "en") -> dict:
-    """Transcribe a specific time range of a WAV file.
+def transcribe_chunk(samples: np.ndarray, start: float, end: float, language: str = "en") -> dict:
+    """Transcribe a specific time range of a 16kHz sample buffer.
 
-    Uses ffmpeg to extract the chunk first, then transcribes.
+    Slices a view of the buffer (no re-decode), transcribes it, and shifts
+    timestamps back to absolute positions.
     """
-    import subprocess
-    import tempfile
-
-    from .config import AUDIO_SAMPLE_RATE, TMP_DIR
-
-    chunk_path = tempfile.mktemp(suffix=".wav", dir=TMP_DIR)
-    cmd = [
-        "ffmpeg", "-y",
-        "-i", wav_path,
-        "-ss", str(start),
-        "-to", str(end),
-        "-ar", str(AUDIO_SAMPLE_RATE),
-        "-ac", "1",
-        "-c:a", "pcm_s16le",
-        chunk_path,
-    ]
-    subprocess.run(cmd, capture_output=True, text=True, timeout=60)
+    result = transcribe(slice_seconds(samples, start, end), language)
+    result["words"] = result["words"].shifted(start)
+    for seg in result["segments"]:
+        seg["start"] += start
+        seg["end"] += start
+    return result
 
+
+def _start_workers():
+    # spawn, not fork: a forked child would inherit the parent's MLX state
+    return ProcessPoolExecutor(
+        max_workers=TRANSCRIBE_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=load_model,
+    )
+
+
+def _stop_workers(pool):
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _worker_chunk(pcm_path: str, start: float, end: float, language: str) -> dict:
+    result = transcribe_chunk(load_pcm(pcm_path), start, end, language)
+    result["words"] = result["words"].to_json()
+    return result
+
+
+def transcribe_file_chunk(pcm_path: str, start: float, end: float, language: str = "en") -> dict:
+    """transcribe_chunk() of a PCM file from decode_pcm(), in a worker process.
+
+    The pool is started on first use and registered with models, so the
+    model server's idle unload stops the workers too.
+    """
+    pool = models.get("whisper_workers", _start_workers, _stop_workers)
     try:
-        result = transcribe(chunk_path, language)
-        # Offset timestamps back to absolute positions
-        for w in result["words"]:
-            w["start"] += start
-            w["end"] += start
-        for seg in result["segments"]:
-            seg["start"] += start
-            seg["end"] += start
-        return result
-    finally:
-        import os
-        os.unlink(chunk_path)
+        result = pool.submit(_worker_chunk, pcm_path, start, end, language).result()
+    except BrokenProcessPool:
+        # A worker died (e.g. out of memory); start fresh workers next time
+        models.unload("whisper_workers")
+        raise
+    result["words"] = WordTable.from_json(result["words"])
+    return result
@@ -1,4 +1,10 @@
-"""Folder watcher for automatic audio processing."""
+"""Folder watcher for automatic audio processing.
+
+New files are enqueued in the durable job queue (jobs.py); a pool of
+consumer threads started alongside the observer does the processing.
+Files that arrived while the watcher was down are picked up by a catch-up
+scan at startup and every CATCHUP_INTERVAL_SECONDS.
+"""
 
 import os
 import time
@@ -6,78 +12,154 @@ import time
 from watchdog.events import FileSystemEventHandler
 from watchdog.observers import Observer
 
+from . import db, fingerprint, jobs
 from .config import (
     AUDIO_EXTENSIONS,
-    FILE_SETTLE_SECONDS,
+    CATCHUP_INTERVAL_SECONDS,
     INBOX_DIR,
     NOTES_DIR,
+    QUEUE_WORKERS,
+    STATE_DB,
     VOICE_MEMOS_DIR,
     ensure_dirs,
 )
-from .pipeline import process_file
+from .settle import SettleDetector
 
 
 class AudioHandler(FileSystemEventHandler):
-    """Watch for new audio files and process them."""
+    """Watch for new audio files and enqueue them once they have settled."""
 
-    def __init__(self, db_path: str, notes_dir: str, skip_diarization: bool = False):
+    def __init__(self, db_path: str, notes_dir: str, skip_diarization: bool = False,
+                 queue_db: str = STATE_DB):
         self.db_path = db_path
         self.notes_dir = notes_dir
         self.skip_diarization = skip_diarization
-        self._processing = set()
+        self.queue_db = queue_db
+        self.settle = SettleDetector(self._enqueue)
+        self.latencies = []
 
     def on_created(self, event):
-        if event.is_directory:
-            return
-        self._handle(event.src_path)
+        if not event.is_directory and _is_audio(event.src_path):
+            self.settle.touch(event.src_path)
 
     def on_modified(self, event):
-        if event.is_directory:
-            return
-        self._handle(event.src_path)
+        if not event.is_directory and _is_audio(event.src_path):
+            self.settle.touch(event.src_path)
+
+    def on_closed(self, event):
+        # inotify IN_CLOSE_WRITE (Linux): the writer is done
+        if not event.is_directory and _is_audio(event.src_path):
+            self.settle.closed(event.src_path)
+
+    def on_moved(self, event):
+        # Atomic rename into place (iCloud, most sync tools)
+        if not event.is_directory and _is_audio(event.dest_path):
+            self.settle.closed(event.dest_path)
+
+    def _options(self) -> dict:
+        return {
+            "db_path": self.db_path,
+            "notes_dir": self.notes_dir,
+            "skip_diarization": self.skip_diarization,
+        }
+
+    def _enqueue(self, path: str, ready_at: float):
+        print(f"\n[memoant] New audio file: {os.path.basename(path)}")
+        queue = jobs.open_queue(self.queue_db)
+        try:
+            job_id = jobs.enqueue(queue, path, "watcher", self._options(), ready_at=ready_at)
+            latency = jobs.get_job(queue, job_id)["ingest_latency"]
+        finally:
+            queue.close()
+        if latency is not None:
+            self.latencies.append(latency)
+            print(f"[memoant] Queued as job {job_id} (ingest latency {latency:.1f}s)")
+        else:
+            print(f"[memoant] Queued as job {job_id}")
+
+    def catch_up(self, dirs: list[str]) -> int:
+        """Enqueue files in dirs that were never processed, newest first.
+
+        Files still being written (modified within the settle timeout) go
+        through the settle detector instead. Returns the number queued.
+        """
+        start = time.perf_counter()
+        missed, scanned = find_unprocessed(dirs, self.db_path, self.queue_db)
+        scan_ms = (time.perf_counter() - start) * 1000
+        if not missed:
+            print(f"[memoant] Catch-up: {scanned} files checked in {scan_ms:.0f}ms, none missed")
+            return 0
+
+        print(f"[memoant] Catch-up: {len(missed)} of {scanned} files unprocessed "
+              f"(checked in {scan_ms:.0f}ms)")
+        now = time.time()
+        queued = 0
+        queue = jobs.open_queue(self.queue_db)
+        try:
+            for path, st in missed:
+                if now - st.st_mtime < self.settle.timeout:
+                    self.settle.touch(path)
+                    continue
+                job_id = jobs.enqueue(queue, path, "catchup", self._options())
+                print(f"  Queued {os.path.basename(path)} as job {job_id}")
+                queued += 1
+        finally:
+            queue.close()
+        return queued
 
-    def _handle(self, path: str):
-        ext = os.path.splitext(path)[1].lower()
-        if ext not in AUDIO_EXTENSIONS:
-            return
 
-        # Skip if already being processed
-        if path in self._processing:
-            return
-        self._processing.add(path)
+def _is_audio(path: str) -> bool:
+    return os.path.splitext(path)[1].lower() in AUDIO_EXTENSIONS
 
+
+def find_unprocessed(dirs: list[str], db_path: str,
+                     queue_db: str = STATE_DB) -> tuple[list[tuple], int]:
+    """Audio files in dirs with no os_audio_logs record and no job since
+    their last modification.
+
+    Each store is read with one query and compared in memory, so the cost
+    is a stat per file plus one query per table, whatever the library size.
+    A file counts as processed if its path is a recorded source_path, or
+    if its fingerprint (unchanged since last hashed) maps to a recorded
+    file_id. A job enqueued after the file's mtime covers no-speech files,
+    duplicates and dead-lettered jobs, which never get a record.
+
+    Returns ([(path, stat), ...] newest first, number of files scanned).
+    """
+    stats = {}
+    for d in dirs:
         try:
-            # Wait for file to finish writing (iCloud sync, etc.)
-            self._wait_for_stable(path)
-
-            print(f"\n[memoant] New audio file: {os.path.basename(path)}")
-            result = process_file(
-                path,
-                db_path=self.db_path,
-                notes_dir=self.notes_dir,
-                skip_diarization=self.skip_diarization,
-            )
-            print(f"[memoant] Result: {result.get('status')} - {result.get('summary', '')[:60]}")
-
-        except Exception as e:
-            print(f"[memoant] Error processing {path}: {e}")
-        finally:
-            self._processing.discard(path)
-
-    def _wait_for_stable(self, path: str, timeout: int = 60):
-        """Wait until file size stops changing."""
-        prev_size = -1
-        waited = 0
-        while waited < timeout:
-            try:
-                size = os.path.getsize(path)
-            except OSError:
-                return
-            if size == prev_size and size > 0:
-                return
-            prev_size = size
-            time.sleep(FILE_SETTLE_SECONDS)
-            waited += FILE_SETTLE_SECONDS
+            entries = os.scandir(d)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if _is_audio(entry.name) and entry.is_file():
+                    stats[os.path.abspath(entry.path)] = entry.stat()
+    if not stats:
+        return [], 0
+
+    database = db.open_db(db_path)
+    db.ensure_schema(database)
+    done_paths, done_ids = db.processed_sources(database)
+    database.close()
+
+    queue = jobs.open_queue(queue_db)
+    last_job = jobs.last_enqueued(queue)
+    queue.close()
+
+    index = fingerprint.open_index(queue_db)
+    cached_ids = fingerprint.lookup_many(index, stats)
+    index.close()
+
+    missed = [
+        (path, st) for path, st in stats.items()
+        if path not in done_paths
+        and cached_ids.get(path) not in done_ids
+        and last_job.get(path, 0) < st.st_mtime
+    ]
+    missed.sort(key=lambda item: item[1].st_mtime, reverse=True)
+    return missed, len(stats)
 
 
 def start_watcher(
@@ -86,6 +168,7 @@ def start_watcher(
     skip_diarization: bool = False,
     watch_voice_memos: bool = True,
     watch_inbox: bool = True,
+    workers: int = QUEUE_WORKERS,
 ):
     """Start watching folders for new audio files.
 
@@ -95,20 +178,24 @@ def start_watcher(
         skip_diarization: skip speaker diarization
         watch_voice_memos: watch Apple Voice Memos folder
         watch_inbox: watch ~/.memoant/inbox/ folder
+        workers: number of queue consumer threads
     """
     ensure_dirs()
     handler = AudioHandler(db_path, notes_dir, skip_diarization)
     observer = Observer()
 
     watched = []
+    dirs = []
     if watch_voice_memos and os.path.isdir(VOICE_MEMOS_DIR):
         observer.schedule(handler, VOICE_MEMOS_DIR, recursive=False)
         watched.append(f"Voice Memos: {VOICE_MEMOS_DIR}")
+        dirs.append(VOICE_MEMOS_DIR)
 
     if watch_inbox:
         os.makedirs(INBOX_DIR, exist_ok=True)
         observer.schedule(handler, INBOX_DIR, recursive=False)
         watched.append(f"Inbox: {INBOX_DIR}")
+        dirs.append(INBOX_DIR)
 
     if not watched:
         print("No folders to watch!")
@@ -118,15 +205,32 @@ def start_watcher(
     print(f"  DB: {db_path}")
     print(f"  Notes: {notes_dir}")
     print(f"  Diarization: {'off' if skip_diarization else 'on'}")
+    print(f"  Queue: {STATE_DB} ({workers} workers)")
     for w in watched:
         print(f"  Watching: {w}")
     print("  Press Ctrl+C to stop\n")
 
+    stop_consumers = jobs.start_consumers(workers)
+    # Start watching before the scan so nothing falls between the two;
+    # enqueue() ignores files that already have an active job
     observer.start()
     try:
+        handler.catch_up(dirs)
+        next_scan = time.monotonic() + CATCHUP_INTERVAL_SECONDS
         while True:
             time.sleep(1)
+            if CATCHUP_INTERVAL_SECONDS and time.monotonic() >= next_scan:
+                handler.catch_up(dirs)
+                next_scan = time.monotonic() + CATCHUP_INTERVAL_SECONDS
     except KeyboardInterrupt:
         print("\nShutting down watcher...")
         observer.stop()
+        handler.settle.stop()
+        stop_consumers.set()
     observer.join()
+    if handler.latencies:
+        lat = sorted(handler.latencies)
+        print(
+            f"Ingest latency over {len(lat)} files: "
+            f"median {lat[len(lat) // 2]:.1f}s, max {lat[-1]:.1f}s"
+        )
@@ -0,0 +1,250 @@
+"""Columnar word table: word text, timings and speakers in flat arrays.
+
+A long meeting has tens of thousands of words; as a list of dicts that is
+tens of thousands of small objects to build, shift, relabel and serialize.
+WordTable keeps the same data as:
+
+    text      all words joined by single spaces
+    offsets   uint32[n + 1], word i is text[offsets[i]:offsets[i + 1] - 1]
+    starts    float32[n] seconds
+    ends      float32[n] seconds
+    speakers  int16[n], index into speaker_names, -1 = unknown
+
+pack() / unpack() convert to a compact binary blob (stored in
+os_audio_logs.words), and seek() finds the word spoken at a given time.
+"""
+
+import base64
+import json
+import struct
+
+import numpy as np
+
+UNKNOWN = "UNKNOWN"
+
+_MAGIC = b"MWT1"
+_HEADER = struct.Struct("<4sIII")  # magic, word count, names bytes, text bytes
+
+
+class WordTable:
+    """Word-level transcript with timings and (optional) speaker labels."""
+
+    __slots__ = ("text", "offsets", "starts", "ends", "speakers", "speaker_names")
+
+    def __init__(self, text: str, offsets, starts, ends, speakers=None, speaker_names=None):
+        n = len(starts)
+        self.text = text
+        self.offsets = np.asarray(offsets, dtype=np.uint32)
+        self.starts = np.asarray(starts, dtype=np.float32)
+        self.ends = np.asarray(ends, dtype=np.float32)
+        self.speakers = (
+            np.full(n, -1, dtype=np.int16) if speakers is None
+            else np.asarray(speakers, dtype=np.int16)
+        )
+        self.speaker_names = list(speaker_names or [])
+
+    # -- construction ---------------------------------------------------
+
+    @classmethod
+    def from_columns(cls, texts: list[str], starts, ends, speakers=None, speaker_names=None):
+        """Build a table from per-word texts and parallel timing columns."""
+        offsets = np.zeros(len(texts) + 1, dtype=np.uint32)
+        if texts:
+            offsets[1:] = np.cumsum([len(t) + 1 for t in texts])
+        return cls(" ".join(texts), offsets, starts, ends, speakers, speaker_names)
+
+    @classmethod
+    def from_words(cls, words: list[dict]) -> "WordTable":
+        """Build a table from [{"word", "start", "end", "speaker"?}, ...]."""
+        names = {}
+        speakers = []
+        for w in words:
+            label = w.get("speaker")
+            if label is None or label == UNKNOWN:
+                speakers.append(-1)
+            else:
+                speakers.append(names.setdefault(label, len(names)))
+        return cls.from_columns(
+            [w["word"] for w in words],
+            [w["start"] for w in words],
+            [w["end"] for w in words],
+            speakers,
+            list(names),
+        )
+
+    @classmethod
+    def empty(cls) -> "WordTable":
+        return cls.from_columns([], [], [])
+
+    @classmethod
+    def concat(cls, tables: list["WordTable"]) -> "WordTable":
+        """Join tables end to end, merging their speaker names."""
+        names = {}
+        texts, speakers = [], []
+        for table in tables:
+            texts.extend(table.texts())
+            remap = np.array(
+                [names.setdefault(n, len(names)) for n in table.speaker_names] + [-1],
+                dtype=np.int16,
+            )
+            speakers.append(remap[table.speakers])  # -1 picks the trailing -1
+        return cls.from_columns(
+            texts,
+            np.concatenate([t.starts for t in tables] or [np.empty(0, np.float32)]),
+            np.concatenate([t.ends for t in tables] or [np.empty(0, np.float32)]),
+            np.concatenate(speakers or [np.empty(0, np.int16)]),
+            list(names),
+        )
+
+    # -- access ---------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def word(self, i: int) -> str:
+        return self.text[int(self.offsets[i]):int(self.offsets[i + 1]) - 1]
+
+    def texts(self) -> list[str]:
+        bounds = self.offsets.tolist()
+        return [self.text[a:b - 1] for a, b in zip(bounds, bounds[1:])]
+
+    def span_text(self, first: int, stop: int) -> str:
+        """Text of words first..stop-1, space separated."""
+        if stop <= first:
+            return ""
+        return self.text[int(self.offsets[first]):int(self.offsets[stop]) - 1]
+
+    def labels(self) -> list[str]:
+        """Speaker label per word (UNKNOWN where unassigned)."""
+        names = self.speaker_names + [UNKNOWN]
+        return [names[i] for i in self.speakers.tolist()]
+
+    def midpoints(self) -> np.ndarray:
+        return (self.starts.astype(np.float64) + self.ends) / 2
+
+    def to_words(self) -> list[dict]:
+        """The table as [{"word", "start", "end", "speaker"}, ...]."""
+        return [
+            {"word": t, "start": s, "end": e, "speaker": sp}
+            for t, s, e, sp in zip(self.texts(), self.starts.tolist(), self.ends.tolist(), self.labels())
+        ]
+
+    def seek(self, seconds: float) -> int:
+        """Index of the word being spoken at `seconds` (or the last one
+        before it; 0 if it is before the first word). Assumes start order."""
+        return max(0, int(np.searchsorted(self.starts, seconds, side="right")) - 1)
+
+    def runs(self) -> list[tuple[int, int, int]]:
+        """Consecutive runs of the same speaker: [(speaker, first, stop), ...]."""
+        n = len(self)
+        if n == 0:
+            return []
+        bounds = np.flatnonzero(np.diff(self.speakers)) + 1
+        firsts = [0] + bounds.tolist()
+        stops = bounds.tolist() + [n]
+        return [(int(self.speakers[a]), a, b) for a, b in zip(firsts, stops)]
+
+    def speaker_name(self, index: int) -> str:
+        return self.speaker_names[index] if index >= 0 else UNKNOWN
+
+    # -- derived tables -------------------------------------------------
+
+    def select(self, index) -> "WordTable":
+        """Rows picked by a boolean mask or an index array, in that order."""
+        index = np.asarray(index)
+        if index.dtype == bool:
+            index = np.flatnonzero(index)
+        texts = self.texts()
+        return WordTable.from_columns(
+            [texts[i] for i in index.tolist()],
+            self.starts[index],
+            self.ends[index],
+            self.speakers[index],
+            self.speaker_names,
+        )
+
+    def sorted(self) -> "WordTable":
+        """Rows in start order (stable)."""
+        return self.select(np.argsort(self.starts, kind="stable"))
+
+    def shifted(self, seconds: float) -> "WordTable":
+        """Copy with every timestamp moved by `seconds`."""
+        return WordTable(
+            self.text, self.offsets, self.starts + np.float32(seconds),
+            self.ends + np.float32(seconds), self.speakers, self.speaker_names,
+        )
+
+    def with_speakers(self, labels: list[str]) -> "WordTable":
+        """Copy labelled with one speaker name (or UNKNOWN) per word."""
+        names = {}
+        speakers = [
+            -1 if label == UNKNOWN else names.setdefault(label, len(names)) for label in labels
+        ]
+        return WordTable(self.text, self.offsets, self.starts, self.ends, speakers, list(names))
+
+    def paragraphs(self, max_pause: float = 2.0, max_seconds: float = 60.0) -> list[dict]:
+        """Split into [{"start", "end", "text"}] at pauses (or every max_seconds)."""
+        if len(self) == 0:
+            return []
+        starts = self.starts.tolist()
+        ends = self.ends.tolist()
+        paragraphs = []
+        first = 0
+        for i in range(1, len(self) + 1):
+            if (
+                i < len(self)
+                and starts[i] - ends[i - 1] < max_pause
+                and starts[i] - starts[first] < max_seconds
+            ):
+                continue
+            paragraphs.append({
+                "start": round(starts[first], 3),
+                "end": round(ends[i - 1], 3),
+                "text": self.span_text(first, i),
+            })
+            first = i
+        return paragraphs
+
+    # -- serialization --------------------------------------------------
+
+    def pack(self) -> bytes:
+        """Compact little-endian binary form (see unpack)."""
+        names = json.dumps(self.speaker_names).encode()
+        text = self.text.encode()
+        return b"".join([
+            _HEADER.pack(_MAGIC, len(self), len(names), len(text)),
+            self.offsets.astype("<u4").tobytes(),
+            self.starts.astype("<f4").tobytes(),
+            self.ends.astype("<f4").tobytes(),
+            self.speakers.astype("<i2").tobytes(),
+            names,
+            text,
+        ])
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "WordTable":
+        magic, n, names_len, text_len = _HEADER.unpack_from(data)
+        if magic != _MAGIC:
+            raise ValueError("not a packed word table")
+        pos = _HEADER.size
+        columns = []
+        for dtype, count in (("<u4", n + 1), ("<f4", n), ("<f4", n), ("<i2", n)):
+            col = np.frombuffer(data, dtype=dtype, count=count, offset=pos)
+            columns.append(col)
+            pos += col.nbytes
+        names = json.loads(data[pos:pos + names_len])
+        pos += names_len
+        text = data[pos:pos + text_len].decode()
+        offsets, starts, ends, speakers = columns
+        return cls(text, offsets, starts, ends, speakers, names)
+
+    def to_json(self) -> str:
+        """pack() as base64, for JSON checkpoints."""
+        return base64.b64encode(self.pack()).decode("ascii")
+
+    @classmethod
+    def from_json(cls, value) -> "WordTable":
+        """Inverse of to_json(); also accepts a list of word dicts."""
+        if isinstance(value, list):
+            return cls.from_words(value)
+        return cls.unpack(base64.b64decode(value))